@@ -0,0 +1,223 @@
+"""
+Batch pre-processing for Location Wizard lookups
+Deduplicates exact and near-duplicate coordinates, orders the unique points
+along a space-filling curve for index locality, and scatters results back
+"""
+
+import importlib.util
+import math
+from typing import Dict, List, Optional, Sequence
+
+import metrics
+from engine import empty_result
+
+# Coordinates closer than this (degrees, ~0.1 m) share one lookup
+DEFAULT_PRECISION = 1e-6
+
+# Bits per axis of the space-filling curve grid
+CURVE_ORDER = 16
+
+_HAVE_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+def hilbert_index(x: int, y: int, order: int = CURVE_ORDER) -> int:
+    """Distance of integer cell (x, y) along a Hilbert curve of 2**order cells per side"""
+    n = 1 << order
+    d = 0
+    s = n >> 1
+    while s:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if not ry:
+            if rx:
+                x, y = n - 1 - x, n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return d
+
+def z_index(x: int, y: int, order: int = CURVE_ORDER) -> int:
+    """Morton (Z-order) code of integer cell (x, y)"""
+    d = 0
+    for bit in range(order):
+        d |= ((x >> bit) & 1) << (2 * bit) | ((y >> bit) & 1) << (2 * bit + 1)
+    return d
+
+def _hilbert_array(x, y, order):
+    import numpy as np
+    n = np.int64(1 << order)
+    x = x.astype(np.int64)
+    y = y.astype(np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
+    s = n >> 1
+    while s:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return d
+
+def _z_array(x, y, order):
+    import numpy as np
+    x = x.astype(np.int64)
+    y = y.astype(np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
+    for bit in range(order):
+        d |= ((x >> bit) & 1) << (2 * bit) | ((y >> bit) & 1) << (2 * bit + 1)
+    return d
+
+
+class BatchPlan:
+    """
+    Deduplicated, curve-ordered view of a batch of coordinates
+
+    Non-finite coordinates (NaN, or inf from a reprojection outside the
+    CRS's domain) are left out of the unique points; their inverse is
+    unique_count, one past the last unique point.
+
+    Args:
+        lats: Latitudes in decimal degrees
+        lons: Longitudes in decimal degrees
+        precision: Quantization step in degrees for near-duplicates; None
+            dedupes exact duplicates only
+        curve: 'hilbert', 'z' or None to keep first-seen order
+    """
+
+    def __init__(self, lats: Sequence[float], lons: Sequence[float],
+                 precision: Optional[float] = DEFAULT_PRECISION, curve: Optional[str] = 'hilbert'):
+        if curve not in ('hilbert', 'z', None):
+            raise ValueError(f"Unknown curve '{curve}', expected 'hilbert', 'z' or None")
+        self.size = len(lats)
+        if _HAVE_NUMPY:
+            import numpy as np
+            lat = np.asarray(lats, dtype=float)
+            lon = np.asarray(lons, dtype=float)
+            finite = np.isfinite(lat) & np.isfinite(lon)
+            self.nonfinite = int(self.size - finite.sum())
+            if self.nonfinite:
+                self._plan_numpy(lat[finite], lon[finite], precision, curve)
+                inverse = np.full(self.size, len(self.lats), dtype=np.int64)
+                inverse[finite] = self.inverse
+                self.inverse = inverse
+            else:
+                self._plan_numpy(lat, lon, precision, curve)
+        else:
+            self._plan_python(lats, lons, precision, curve)
+        metrics.incr('batch_points', self.size)
+        metrics.incr('batch_unique_points', len(self.lats))
+
+    def _plan_numpy(self, lats, lons, precision, curve):
+        import numpy as np
+        lat = np.asarray(lats, dtype=float)
+        lon = np.asarray(lons, dtype=float)
+        if precision:
+            keys = np.stack([np.round(lat / precision), np.round(lon / precision)], axis=1).astype(np.int64)
+        else:
+            keys = np.stack([lat, lon], axis=1).view(np.int64)
+        if len(keys):
+            _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        else:
+            first, inverse = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        inverse = inverse.reshape(-1)
+        u_lat, u_lon = lat[first], lon[first]
+
+        if curve and len(first) > 1:
+            cells = (1 << CURVE_ORDER) - 1
+            gx = _grid(u_lon, cells)
+            gy = _grid(u_lat, cells)
+            order = np.argsort((_hilbert_array if curve == 'hilbert' else _z_array)(gx, gy, CURVE_ORDER), kind='stable')
+        else:
+            order = np.argsort(first, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        self.lats = u_lat[order]
+        self.lons = u_lon[order]
+        self.inverse = rank[inverse]
+
+    def _plan_python(self, lats, lons, precision, curve):
+        index = {}
+        inverse = []
+        u_lat, u_lon = [], []
+        for lat, lon in zip(lats, lons):
+            lat, lon = float(lat), float(lon)
+            if not (math.isfinite(lat) and math.isfinite(lon)):
+                inverse.append(None)
+                continue
+            key = (round(lat / precision), round(lon / precision)) if precision else (lat, lon)
+            if key not in index:
+                index[key] = len(u_lat)
+                u_lat.append(lat)
+                u_lon.append(lon)
+            inverse.append(index[key])
+
+        order = list(range(len(u_lat)))
+        if curve and len(u_lat) > 1:
+            cells = (1 << CURVE_ORDER) - 1
+            min_x, max_x, min_y, max_y = min(u_lon), max(u_lon), min(u_lat), max(u_lat)
+            sx = cells / (max_x - min_x) if max_x > min_x else 0.0
+            sy = cells / (max_y - min_y) if max_y > min_y else 0.0
+            key_fn = hilbert_index if curve == 'hilbert' else z_index
+            keys = [key_fn(int((x - min_x) * sx), int((y - min_y) * sy)) for x, y in zip(u_lon, u_lat)]
+            order.sort(key=keys.__getitem__)
+        rank = [0] * len(order)
+        for position, u in enumerate(order):
+            rank[u] = position
+        self.lats = [u_lat[u] for u in order]
+        self.lons = [u_lon[u] for u in order]
+        self.inverse = [len(order) if u is None else rank[u] for u in inverse]
+        self.nonfinite = inverse.count(None)
+
+    @property
+    def unique_count(self) -> int:
+        return len(self.lats)
+
+    def scatter(self, results: List[Dict], lats: Sequence[float], lons: Sequence[float]) -> List[Dict]:
+        """Expand per-unique-point results to the original order and coordinates"""
+        if self.nonfinite:
+            results = list(results) + [empty_result(math.nan, math.nan)]
+        return [dict(results[u], lat=float(lat), lon=float(lon))
+                for u, lat, lon in zip(self.inverse, lats, lons)]
+
+
+def _grid(values, cells: int):
+    """Scale values onto integer cells 0..cells over their own range"""
+    import numpy as np
+    low, high = values.min(), values.max()
+    if high <= low:
+        return np.zeros(len(values), dtype=np.int64)
+    return ((values - low) * (cells / (high - low))).astype(np.int64)
+
+def lookup_batch(engine, lats: Sequence[float], lons: Sequence[float],
+                 precision: Optional[float] = DEFAULT_PRECISION, curve: Optional[str] = 'hilbert',
+                 compact: bool = False, crs=None):
+    """
+    engine.lookup_many() behind deduplication and curve ordering
+
+    Each unique (quantized) coordinate is looked up once; every input point
+    gets its own result dict carrying its original lat/lon, in input order.
+    With compact=True the results come as one results.ResultBatch instead,
+    built from the matched features without a dict per point. With a source
+    crs, the points are first reprojected to WGS84 in one call (see crs.py)
+    and results carry the WGS84 lat/lon. Non-finite points, e.g. outside the
+    crs's domain, get empty results.
+    """
+    if crs is not None:
+        from crs import to_wgs84
+        lats, lons = to_wgs84(lats, lons, crs)
+    with metrics.timer('batch_plan'):
+        plan = BatchPlan(lats, lons, precision, curve)
+    if compact:
+        from results import ResultBatch
+        located = engine.locate_many(plan.lats, plan.lons)
+        if plan.nonfinite:
+            # Non-finite points match no feature
+            located = {name: (layer, list(found) + [None]) for name, (layer, found) in located.items()}
+        with metrics.timer('materialize'):
+            return ResultBatch.from_located(located, plan.inverse, lats, lons)
+    results = engine.lookup_many(plan.lats, plan.lons)
+    with metrics.timer('materialize'):
+        return plan.scatter(results, lats, lons)
@@ -0,0 +1,28 @@
+"""
+Benchmarks for the UI helpers that scan the gazetteer
+get_nearby_cities and get_search_suggestions at growing gazetteer sizes
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import synthetic_gazetteer
+
+GAZETTEER_SIZES = [10, 1_000, 100_000]
+
+@pytest.mark.parametrize("size", GAZETTEER_SIZES)
+def bench_get_nearby_cities(benchmark, size):
+    """Nearby-city scan around Delhi"""
+    from core import get_nearby_cities
+    cities = synthetic_gazetteer(size)
+    benchmark.extra_info['gazetteer'] = size
+    benchmark(get_nearby_cities, 28.6139, 77.2090, 50, cities)
+
+@pytest.mark.parametrize("size", GAZETTEER_SIZES)
+def bench_get_search_suggestions(benchmark, size):
+    """Autocomplete over a gazetteer with a rare substring"""
+    from core import get_search_suggestions
+    names = list(synthetic_gazetteer(size))
+    benchmark.extra_info['gazetteer'] = size
+    benchmark(get_search_suggestions, 'ment 99', names)
@@ -0,0 +1,69 @@
+"""
+Benchmarks for layer loading and zone lookups
+Run with: pytest benchmarks/ --benchmark-only
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import BATCH_SIZES, random_points
+from engine import LookupEngine, available_backends, load_layers
+
+def bench_load_shapefiles_cold(benchmark, dense_data_dir):
+    """Cold load_shapefiles() plus engine build on the dense layers"""
+    import core
+
+    def cold_load():
+        core.clear_cache()
+        core.load_shapefiles(dense_data_dir)
+        return core.get_lookup_engine()
+
+    benchmark.pedantic(cold_load, rounds=3, iterations=1)
+    core.clear_cache()
+
+def bench_load_layers_stdlib(benchmark, dense_data_dir):
+    """Cold engine.load_layers() without geopandas"""
+    benchmark.pedantic(load_layers, args=(dense_data_dir,), rounds=3, iterations=1)
+
+def bench_get_location_properties_warm(benchmark, core_on_dense):
+    """Warm single-point latency through core"""
+    core_on_dense.get_location_properties(20.0, 78.0)
+    result = benchmark(core_on_dense.get_location_properties, 28.6139, 77.2090)
+    assert result['seismic_zone'] != 'Unknown'
+
+@pytest.mark.parametrize("backend", available_backends())
+def bench_engine_single_lookup(benchmark, dense_data_dir, backend):
+    """Warm single-point latency per backend"""
+    engine = LookupEngine(load_layers(dense_data_dir), backend=backend)
+    benchmark(engine.lookup, 28.6139, 77.2090)
+
+@pytest.mark.parametrize("size", BATCH_SIZES)
+@pytest.mark.parametrize("backend", [b for b in available_backends() if b in ('shapely', 'numpy')])
+def bench_batch_throughput(benchmark, dense_data_dir, backend, size):
+    """Batch lookup throughput; points per second = size / mean"""
+    engine = LookupEngine(load_layers(dense_data_dir), backend=backend)
+    lats, lons = random_points(size)
+    benchmark.extra_info['points'] = size
+    results = benchmark.pedantic(engine.lookup_many, args=(lats, lons), rounds=1 if size > 100_000 else 3, iterations=1)
+    assert len(results) == size
+
+@pytest.mark.parametrize("backend", ['grid', 'python'])
+def bench_batch_throughput_stdlib(benchmark, dense_data_dir, backend):
+    """Batch lookup throughput of the standard library backends on 1k points"""
+    engine = LookupEngine(load_layers(dense_data_dir), backend=backend)
+    lats, lons = random_points(1_000)
+    benchmark.extra_info['points'] = 1_000
+    benchmark.pedantic(engine.lookup_many, args=(lats.tolist(), lons.tolist()), rounds=3, iterations=1)
+
+@pytest.mark.parametrize("curve", ['hilbert', 'z', None])
+def bench_batch_survey_points(benchmark, dense_data_dir, curve):
+    """100k survey-like points (10k sites, repeated) through batch.lookup_batch"""
+    import numpy as np
+    from batch import lookup_batch
+    engine = LookupEngine(load_layers(dense_data_dir))
+    lats, lons = random_points(10_000)
+    picks = np.random.default_rng(32).integers(0, 10_000, 100_000)
+    benchmark.extra_info['points'] = 100_000
+    benchmark.pedantic(lookup_batch, args=(engine, lats[picks], lons[picks]), kwargs={'curve': curve},
+                       rounds=3, iterations=1)
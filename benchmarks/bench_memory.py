@@ -0,0 +1,54 @@
+"""
+Memory footprint of loaded layers and batch results
+Peak traced allocations are stored in the benchmark extra_info
+"""
+
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import random_points
+from engine import LookupEngine, available_backends, load_layers
+
+def traced_peak_mb(func, *args):
+    """Run func and return (result, peak traced MB)"""
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 2**20
+
+def bench_memory_loaded_layers(benchmark, dense_data_dir):
+    """Peak memory while parsing the dense layers"""
+    def measure():
+        _, peak = traced_peak_mb(load_layers, dense_data_dir)
+        benchmark.extra_info['peak_mb'] = round(peak, 1)
+
+    benchmark.pedantic(measure, rounds=1, iterations=1)
+
+@pytest.mark.parametrize("backend", available_backends())
+def bench_memory_engine_build(benchmark, dense_data_dir, backend):
+    """Peak memory of building each backend's index"""
+    layers = load_layers(dense_data_dir)
+
+    def measure():
+        _, peak = traced_peak_mb(LookupEngine, layers, backend)
+        benchmark.extra_info['peak_mb'] = round(peak, 1)
+
+    benchmark.pedantic(measure, rounds=1, iterations=1)
+
+def bench_memory_batch_results(benchmark, dense_data_dir):
+    """Peak memory of 100k batch results"""
+    engine = LookupEngine(load_layers(dense_data_dir))
+    lats, lons = random_points(100_000)
+
+    def measure():
+        results, peak = traced_peak_mb(engine.lookup_many, lats, lons)
+        benchmark.extra_info['peak_mb'] = round(peak, 1)
+        benchmark.extra_info['bytes_per_result'] = round(peak * 2**20 / len(results))
+
+    benchmark.pedantic(measure, rounds=1, iterations=1)
@@ -0,0 +1,58 @@
+"""
+Shared fixtures for the Location Wizard benchmark suite
+Synthetic dense polygon layers come from synthetic_data.py, generated once
+per session (or reused from $LOCATION_WIZARD_BENCH_DATA)
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data import INDIA_EXTENT as EXTENT, write_layers
+
+# Size of the synthetic admin layer used by the suite
+ADMIN_CELLS = 10_000
+
+# Set LOCATION_WIZARD_BENCH_FULL=1 to include the 10M point batch
+BATCH_SIZES = [1_000, 100_000] + ([10_000_000] if os.environ.get('LOCATION_WIZARD_BENCH_FULL') == '1' else [])
+
+def random_points(n, seed=1893):
+    """n uniformly distributed points over EXTENT as (lats, lons) arrays"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    min_x, min_y, max_x, max_y = EXTENT
+    return rng.uniform(min_y, max_y, n), rng.uniform(min_x, max_x, n)
+
+def synthetic_gazetteer(n, seed=875):
+    """n synthetic settlements in the shape of core.MAJOR_CITIES"""
+    rng = random.Random(seed)
+    min_x, min_y, max_x, max_y = EXTENT
+    return {f"Settlement {i}": {"lat": rng.uniform(min_y, max_y), "lon": rng.uniform(min_x, max_x)}
+            for i in range(n)}
+
+@pytest.fixture(scope='session')
+def dense_data_dir(tmp_path_factory):
+    """Directory holding the synthetic dense layers"""
+    directory = os.environ.get('LOCATION_WIZARD_BENCH_DATA')
+    if directory and os.path.exists(os.path.join(directory, 'admin_boundaries.geojson')):
+        return directory
+    directory = directory or str(tmp_path_factory.mktemp('dense_layers'))
+    write_layers(directory, admin_cells=ADMIN_CELLS)
+    return directory
+
+@pytest.fixture
+def core_on_dense(dense_data_dir):
+    """core module with its caches pointed at the dense layers"""
+    import core
+    core.clear_cache()
+    core.load_shapefiles(dense_data_dir)
+    yield core
+    core.clear_cache()
+
+def pytest_report_header(config):
+    return f"location-wizard benchmarks: batch sizes {BATCH_SIZES}"
@@ -0,0 +1,190 @@
+"""
+Zone boundary proximity for Location Wizard
+Distance from sites to the nearest zone boundary and the attributes of the
+zone across it, vectorized over batches with a boundary-segment index
+
+Building the index needs shapely and numpy.
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence
+
+from engine import LAYER_FIELDS, Layer, LookupEngine
+from geometry import EARTH_RADIUS_KM
+
+# Field ranking zones for nearest-higher-zone queries
+RANK_FIELDS = {
+    'seismic': 'zone_factor',
+    'wind': 'basic_wind_speed'
+}
+
+# Offset (degrees, ~0.1 m) used to read the zone on either side of a segment
+SIDE_OFFSET = 1e-6
+
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+
+class BoundaryIndex:
+    """
+    Labelled zone-boundary segments of one layer
+
+    Feature boundaries are noded into one linework so each segment has a
+    single zone on either side; segments with the same zone on both sides
+    (e.g. two districts in one seismic zone) are dropped.
+
+    Args:
+        name: Layer name, a key of LAYER_FIELDS
+        layer: The layer's features
+        backend: Engine backend used to label segment sides
+    """
+
+    def __init__(self, name: str, layer: Layer, backend: Optional[str] = None):
+        import numpy as np
+        import shapely
+        from shapely.geometry import shape
+
+        if name not in LAYER_FIELDS:
+            raise ValueError(f"No zone fields for layer '{name}', expected one of {sorted(LAYER_FIELDS)}")
+        self.name = name
+        self.source = layer
+        self.fields = LAYER_FIELDS[name]
+        self._np = np
+        self._shapely = shapely
+        self._engine = LookupEngine({name: layer}, backend=backend)
+
+        # Node all boundaries and split them into two-point segments
+        linework = shapely.union_all(shapely.boundary([shape(g) for g in layer.geometries]))
+        coords, part = shapely.get_coordinates(shapely.get_parts(linework), return_index=True)
+        same = part[:-1] == part[1:]
+        a, b = coords[:-1][same], coords[1:][same]
+        keep = np.any(a != b, axis=1)
+        a, b = a[keep], b[keep]
+
+        # Read the zone just left and right of each segment midpoint
+        d = b - a
+        normal = np.stack([-d[:, 1], d[:, 0]], axis=1) / np.hypot(d[:, 0], d[:, 1])[:, None]
+        mid = (a + b) / 2
+        left = self._keys(*(mid + SIDE_OFFSET * normal).T[::-1])
+        right = self._keys(*(mid - SIDE_OFFSET * normal).T[::-1])
+        differs = np.asarray([l != r for l, r in zip(left, right)], dtype=bool)
+
+        self.zones = sorted(set(left) | set(right), key=repr)
+        zone_id = {zone: i for i, zone in enumerate(self.zones)}
+        self.a, self.b = a[differs], b[differs]
+        self.left = np.asarray([zone_id[z] for z, keep in zip(left, differs) if keep], dtype=np.int64)
+        self.right = np.asarray([zone_id[z] for z, keep in zip(right, differs) if keep], dtype=np.int64)
+        self._segments = shapely.linestrings(np.stack([self.a, self.b], axis=1))
+        self._trees = {}
+
+    def _keys(self, lats, lons) -> List[tuple]:
+        return [tuple(r[f] for f in self.fields) for r in self._engine.lookup_many(lats, lons)]
+
+    def _rank(self, zone: tuple) -> float:
+        value = dict(zip(self.fields, zone)).get(RANK_FIELDS[self.name])
+        return -math.inf if value is None else value
+
+    def _tree(self, zone: int, higher: bool):
+        """STRtree over segments bordering zone (optionally only towards higher zones)"""
+        key = (zone, higher)
+        if key not in self._trees:
+            np = self._np
+            other = np.where(self.left == zone, self.right, np.where(self.right == zone, self.left, -1))
+            mask = other >= 0
+            if higher:
+                rank = self._rank(self.zones[zone])
+                mask &= np.asarray([o >= 0 and self._rank(self.zones[o]) > rank for o in other.tolist()], dtype=bool)
+            ids = np.nonzero(mask)[0]
+            tree = self._shapely.STRtree(self._segments[ids]) if len(ids) else None
+            self._trees[key] = (tree, ids, other)
+        return self._trees[key]
+
+    def query(self, lats: Sequence[float], lons: Sequence[float], higher: bool = False,
+              max_km: Optional[float] = None) -> List[Optional[Dict]]:
+        """
+        Nearest zone boundary for each point
+
+        Args:
+            lats: Latitudes in decimal degrees
+            lons: Longitudes in decimal degrees
+            higher: Only consider boundaries towards a higher zone (seismic
+                zone factor or wind speed)
+            max_km: Ignore boundaries farther than this; much cheaper than an
+                unbounded search when only nearby boundaries matter
+
+        Returns:
+            Per point a dict with distance_km, boundary_lat, boundary_lon and
+            adjacent (the zone fields across the boundary), or None if the
+            point's zone has no qualifying boundary (within max_km) or the
+            point is not finite
+        """
+        np = self._np
+        shapely = self._shapely
+        if higher and self.name not in RANK_FIELDS:
+            raise ValueError(f"Layer '{self.name}' has no zone ranking")
+        lat = np.asarray(lats, dtype=float)
+        lon = np.asarray(lons, dtype=float)
+        zone_id = {zone: i for i, zone in enumerate(self.zones)}
+        own = np.asarray([zone_id.get(k, -1) for k in self._keys(lat, lon)], dtype=np.int64)
+        # NaN or inf (e.g. outside a source CRS's domain) has no boundary
+        own[~(np.isfinite(lat) & np.isfinite(lon))] = -1
+        results = [None] * len(lat)
+
+        for zone in np.unique(own[own >= 0]).tolist():
+            tree, ids, other = self._tree(zone, higher)
+            if tree is None:
+                continue
+            rows = np.nonzero(own == zone)[0]
+            points = shapely.points(lon[rows], lat[rows])
+
+            # Search radius in raw degrees: degrees of longitude shrink by
+            # cos(lat), so widen it before the exact pass. Without max_km the
+            # nearest segment in raw degrees bounds the search.
+            if max_km is None:
+                _, reach = tree.query_nearest(points, return_distance=True, all_matches=False)
+            else:
+                reach = np.full(len(rows), max_km / KM_PER_DEGREE)
+            radius = reach / np.cos(np.radians(np.abs(lat[rows]))) * (1 + 1e-9) + 1e-12
+            point_idx, seg_idx = tree.query(points, predicate='dwithin', distance=radius)
+
+            seg = ids[seg_idx]
+            row = rows[point_idx]
+            distance, bx, by = _local_distance(np, lat[row], lon[row], self.a[seg], self.b[seg])
+
+            # Keep the closest candidate per point
+            order = np.lexsort((distance, point_idx))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = point_idx[order][1:] != point_idx[order][:-1]
+            for k in order[first].tolist():
+                if max_km is not None and distance[k] > max_km:
+                    continue
+                adjacent = self.zones[other[seg[k]]]
+                results[int(row[k])] = {
+                    'distance_km': float(distance[k]),
+                    'boundary_lat': float(by[k]),
+                    'boundary_lon': float(bx[k]),
+                    'adjacent': dict(zip(self.fields, adjacent))
+                }
+        return results
+
+
+def _local_distance(np, lat, lon, a, b):
+    """
+    Distance in km from points to segments, in an equirectangular frame
+    centred on each point, plus the nearest point on each segment (lon, lat)
+    """
+    scale = np.cos(np.radians(lat))
+    ax, ay = (a[:, 0] - lon) * scale, a[:, 1] - lat
+    bx, by = (b[:, 0] - lon) * scale, b[:, 1] - lat
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = np.clip(-(ax * dx + ay * dy) / np.where(length2 > 0, length2, 1), 0.0, 1.0)
+    px, py = ax + t * dx, ay + t * dy
+    distance = np.hypot(px, py) * KM_PER_DEGREE
+    return distance, a[:, 0] + t * (b[:, 0] - a[:, 0]), a[:, 1] + t * (b[:, 1] - a[:, 1])
+
+
+def nearest_boundaries(indexes: Dict[str, BoundaryIndex], lats: Sequence[float], lons: Sequence[float],
+                       higher: bool = False, max_km: Optional[float] = None) -> List[Dict[str, Optional[Dict]]]:
+    """Per point, layer name -> BoundaryIndex.query() result for every index"""
+    per_layer = {name: index.query(lats, lons, higher, max_km) for name, index in indexes.items()}
+    return [{name: per_layer[name][i] for name in indexes} for i in range(len(lats))]
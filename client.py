@@ -0,0 +1,219 @@
+"""
+Thin client for the Location Wizard daemon
+Standard library only, so callers skip the geopandas import and layer load
+
+Usage: python client.py LAT LON [LAT LON ...]
+"""
+
+import json
+import math
+import os
+import socket
+import struct
+import sys
+import threading
+from typing import Dict, List, Optional, Sequence
+
+# Request opcodes
+OP_PING = 0
+OP_LOOKUP = 1
+OP_CALL = 2
+
+# Reply status codes
+STATUS_RECORDS = 0
+STATUS_JSON = 1
+STATUS_ERROR = 2
+
+# Frame header: payload length; then one opcode / status byte
+HEADER = struct.Struct('>I')
+CODE = struct.Struct('>B')
+
+# Lookup request point and reply record
+POINT = struct.Struct('<dd')
+RECORD = struct.Struct('<ddHHH')
+STRINGS_LENGTH = struct.Struct('<I')
+
+# Result fields carried in a record, in order
+RECORD_FIELDS = ('zone_factor', 'basic_wind_speed', 'seismic_zone', 'place_name', 'state')
+
+# core functions the daemon serves through OP_CALL
+CALLS = ('get_address', 'get_zone_boundaries', 'get_alignment_profile', 'search_location',
+         'search_locations', 'get_reverse_geocoding', 'get_nearby_cities', 'get_search_suggestions')
+
+
+def default_socket_path() -> str:
+    """$LOCATION_WIZARD_SOCKET, or a per-user socket in the temp directory"""
+    return os.environ.get('LOCATION_WIZARD_SOCKET') or f"/tmp/location_wizard-{os.getuid()}.sock"
+
+
+class DaemonError(RuntimeError):
+    """The daemon answered with an error"""
+
+
+def send_frame(sock: socket.socket, code: int, body: bytes = b''):
+    sock.sendall(HEADER.pack(len(body) + 1) + CODE.pack(code) + body)
+
+def recv_frame(sock: socket.socket):
+    """(code, body) of the next frame, or None at end of stream"""
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, HEADER.unpack(header)[0])
+    if payload is None:
+        raise ConnectionError("Connection closed mid-frame")
+    return payload[0], payload[1:]
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(size - len(chunks))
+        if not chunk:
+            return None
+        chunks += chunk
+    return bytes(chunks)
+
+def encode_records(results: List[Dict]) -> Optional[bytes]:
+    """
+    Packed lookup results: string table, then one RECORD per result
+
+    Returns None when a result does not fit the record layout (extra keys,
+    too many distinct strings), in which case JSON is sent instead.
+    """
+    strings = {}
+    records = []
+    for result in results:
+        if len(result) != len(RECORD_FIELDS) + 2 or any(f not in result for f in RECORD_FIELDS):
+            return None
+        numbers = [math.nan if result[f] is None else result[f] for f in RECORD_FIELDS[:2]]
+        names = [result[f] for f in RECORD_FIELDS[2:]]
+        if not all(isinstance(name, str) for name in names):
+            return None
+        codes = [strings.setdefault(name, len(strings)) for name in names]
+        records.append((numbers, codes))
+    if len(strings) > 0xFFFF:
+        return None
+    table = json.dumps(list(strings)).encode()
+    return STRINGS_LENGTH.pack(len(table)) + table + b''.join(RECORD.pack(*n, *c) for n, c in records)
+
+def decode_records(body: bytes, lats: Sequence[float], lons: Sequence[float]) -> List[Dict]:
+    (table_length,) = STRINGS_LENGTH.unpack_from(body)
+    start = STRINGS_LENGTH.size + table_length
+    strings = json.loads(body[STRINGS_LENGTH.size:start])
+    results = []
+    for (zone_factor, wind_speed, zone, place, state), lat, lon in zip(RECORD.iter_unpack(body[start:]), lats, lons):
+        results.append({
+            'lat': lat, 'lon': lon,
+            'seismic_zone': strings[zone],
+            'zone_factor': None if math.isnan(zone_factor) else zone_factor,
+            'basic_wind_speed': None if math.isnan(wind_speed) else wind_speed,
+            'place_name': strings[place],
+            'state': strings[state]
+        })
+    return results
+
+
+class LocationClient:
+    """
+    Persistent connection to a running daemon
+
+    Args:
+        path: Socket path; default_socket_path() by default
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 5.0):
+        self.path = path or default_socket_path()
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _request(self, code: int, body: bytes = b''):
+        with self._lock:
+            if self._sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                self._sock = sock
+            try:
+                send_frame(self._sock, code, body)
+                reply = recv_frame(self._sock)
+                if reply is None:
+                    raise ConnectionError("Daemon closed the connection")
+            except OSError:
+                self.close()
+                raise
+        status, body = reply
+        if status == STATUS_ERROR:
+            raise DaemonError(body.decode())
+        return status, body
+
+    def ping(self) -> bool:
+        """True if the daemon answers"""
+        try:
+            self._request(OP_PING)
+            return True
+        except OSError:
+            return False
+
+    def lookup(self, lat: float, lon: float) -> Dict:
+        """get_location_properties() in the daemon"""
+        return self.lookup_many([lat], [lon])[0]
+
+    def lookup_many(self, lats: Sequence[float], lons: Sequence[float]) -> List[Dict]:
+        """get_location_properties_batch() in the daemon"""
+        lats, lons = [float(v) for v in lats], [float(v) for v in lons]
+        body = b''.join(POINT.pack(lat, lon) for lat, lon in zip(lats, lons))
+        status, reply = self._request(OP_LOOKUP, body)
+        if status == STATUS_RECORDS:
+            return decode_records(reply, lats, lons)
+        return json.loads(reply)
+
+    def call(self, method: str, *args, **kwargs):
+        """Call one of CALLS in the daemon; arguments and result go as JSON"""
+        status, reply = self._request(OP_CALL, json.dumps({'method': method, 'args': args, 'kwargs': kwargs}).encode())
+        return json.loads(reply)
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Shared client of the module-level helpers
+_client = None
+
+def get_location_properties(lat: float, lon: float, fallback: bool = True) -> Dict:
+    """
+    Location properties from the daemon
+
+    With fallback=True, a missing daemon is not an error: the lookup runs
+    in-process through core.py (paying its cold start once).
+    """
+    global _client
+    if _client is None:
+        _client = LocationClient()
+    try:
+        return _client.lookup(lat, lon)
+    except OSError:
+        if not fallback:
+            raise
+    from core import get_location_properties as local_lookup
+    return local_lookup(lat, lon)
+
+def main():
+    args = sys.argv[1:]
+    if not args or len(args) % 2:
+        print("Usage: python client.py LAT LON [LAT LON ...]", file=sys.stderr)
+        sys.exit(2)
+    values = [float(a) for a in args]
+    with LocationClient() as client:
+        print(json.dumps(client.lookup_many(values[0::2], values[1::2]), indent=2))
+
+if __name__ == "__main__":
+    main()
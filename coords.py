@@ -0,0 +1,401 @@
+"""
+Coordinate text parsing for Location Wizard
+Reads decimal degrees, DMS, UTM, Plus Codes and SoI toposheet numbers
+locally, so pasted coordinates never wait on the geocoding service
+
+UTM needs pyproj (see crs.py); every other format is standard library only.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from crs import to_wgs84, utm_crs
+
+# Numbers, hemisphere letters, unit marks and component separators
+_TOKEN = re.compile(r"""[-+]?\d+(?:\.\d+)?|[NSEW]|[°º˚]|['′’]|["″”]|[,;/]|\s+""")
+_DEGREE, _MINUTE, _SECOND = '°', "'", '"'
+_UNIT_MARKS = {'°': _DEGREE, 'º': _DEGREE, '˚': _DEGREE, "'": _MINUTE, '′': _MINUTE, '’': _MINUTE,
+               '"': _SECOND, '″': _SECOND, '”': _SECOND}
+
+# Zone, optional latitude band, easting and northing, e.g. "43Q 274710 2109380"
+_UTM = re.compile(r'^(?:UTM\s*)?(?:ZONE\s*)?(\d{1,2})\s*([C-HJ-NP-X])?[\s,;]+(\d+(?:\.\d+)?)\s*M?\s*E?'
+                  r'[\s,;]+(\d+(?:\.\d+)?)\s*M?\s*N?$')
+_UTM_BANDS = 'CDEFGHJKLMNPQRSTUVWX'
+
+_PLUS_ALPHABET = '23456789CFGHJMPQRVWX'
+_PLUS_CODE = re.compile(r'^([%s]{2,8})\+([%s]*)(?:[\s,]+(.+))?$' % (_PLUS_ALPHABET, _PLUS_ALPHABET))
+
+# "53H", "53 H/13", "53-H-13-NE"
+_TOPOSHEET = re.compile(r'^(?:SOI\s*)?(?:TOPO\s*)?(?:SHEET\s*)?(?:NO\.?\s*)?(\d{2})\s*[-/ ]?\s*([A-P])'
+                        r'(?:\s*[-/ ]\s*(\d{1,2})(?:\s*[-/ ]\s*(NE|NW|SE|SW))?)?$')
+
+# India and Adjacent Countries 1:1M (4° x 4°) sheets: per column, its west
+# longitude, first sheet number, north latitude of that sheet and sheet
+# count; numbers run north to south down a column, columns west to east
+_MILLION_COLUMNS = ((68, 37, 40, 5), (72, 42, 40, 8), (76, 51, 40, 8), (80, 60, 40, 8),
+                    (84, 69, 40, 6), (88, 75, 40, 6), (92, 81, 36, 4))
+
+_QUADRANTS = {'NW': (0, 0), 'SW': (0, 1), 'NE': (1, 0), 'SE': (1, 1)}
+
+
+def _result(lat: float, lon: float, fmt: str, label: Optional[str] = None, **extra) -> Dict:
+    name = f"Coordinates: {lat:.6f}, {lon:.6f}"
+    return dict(lat=lat, lon=lon, format=fmt, display_name=f"{name} ({label})" if label else name, **extra)
+
+
+# Degrees, minutes, seconds
+
+def _tokens(text: str) -> Optional[List[str]]:
+    """Tokens of a coordinate pair, or None if anything else is in the text"""
+    text = text.replace("''", '"')
+    tokens, end = [], 0
+    for match in _TOKEN.finditer(text):
+        if match.start() != end:
+            return None
+        end = match.end()
+        token = match.group()
+        if not token.isspace():
+            tokens.append(_UNIT_MARKS.get(token, token))
+    return tokens if end == len(text) else None
+
+def _split(tokens: List[str]) -> Optional[Tuple[List[str], List[str]]]:
+    """The two angles of a pair, split at a separator, hemisphere letter or degree mark"""
+    separators = [i for i, t in enumerate(tokens) if t in ',;/']
+    if separators:
+        if len(separators) != 1:
+            return None
+        i = separators[0]
+        return tokens[:i], tokens[i + 1:]
+    letters = [i for i, t in enumerate(tokens) if t in 'NSEW']
+    if letters:
+        if len(letters) != 2:
+            return None
+        # N28.6 E77.2 splits before the second letter, 28.6N 77.2E after the first
+        i = letters[1] if letters[0] == 0 else letters[0] + 1
+        return tokens[:i], tokens[i:]
+    degrees = [i for i, t in enumerate(tokens) if t == _DEGREE]
+    if len(degrees) == 2:
+        # The second angle starts at the number before its degree mark
+        return tokens[:degrees[1] - 1], tokens[degrees[1] - 1:]
+    numbers = [t for t in tokens if t not in _UNIT_MARKS.values()]
+    if len(numbers) != len(tokens) or len(numbers) not in (2, 4, 6):
+        return None
+    half = len(numbers) // 2
+    return numbers[:half], numbers[half:]
+
+def _angle(tokens: List[str]) -> Optional[Tuple[float, Optional[str], bool]]:
+    """(signed degrees, hemisphere letter, has minutes) of one angle"""
+    hemisphere = None
+    if tokens and tokens[0] in 'NSEW':
+        hemisphere, tokens = tokens[0], tokens[1:]
+    elif tokens and tokens[-1] in 'NSEW':
+        hemisphere, tokens = tokens[-1], tokens[:-1]
+    parts = {}
+    units = (_DEGREE, _MINUTE, _SECOND)
+    position = 0
+    i = 0
+    while i < len(tokens):
+        number = tokens[i]
+        if number in 'NSEW' or number in units:
+            return None
+        unit = tokens[i + 1] if i + 1 < len(tokens) and tokens[i + 1] in units else None
+        i += 2 if unit else 1
+        if unit is None:
+            if position >= len(units):
+                return None
+            unit = units[position]
+        if unit in parts or units.index(unit) < position:
+            return None
+        parts[unit] = number
+        position = units.index(unit) + 1
+    if _DEGREE not in parts:
+        return None
+    try:
+        degrees = float(parts[_DEGREE])
+        minutes = float(parts.get(_MINUTE, 0))
+        seconds = float(parts.get(_SECOND, 0))
+    except ValueError:
+        return None
+    negative = degrees < 0 or parts[_DEGREE].startswith('-')
+    if minutes < 0 or seconds < 0 or minutes >= 60 or seconds >= 60:
+        return None
+    if (minutes or seconds) and not parts[_DEGREE].lstrip('+-').isdigit():
+        return None
+    value = abs(degrees) + minutes / 60 + seconds / 3600
+    if hemisphere in ('S', 'W'):
+        if negative:
+            return None
+        negative = True
+    return (-value if negative else value), hemisphere, len(parts) > 1
+
+def parse_degrees(text: str) -> Optional[Dict]:
+    """
+    Decimal degrees or degrees/minutes/seconds, e.g. "28.6139, 77.2090",
+    28°36'50"N 77°12'32"E or "N 28 36.8 E 77 12.5"
+
+    Without hemisphere letters the first angle is the latitude.
+    """
+    tokens = _tokens(text.strip().upper())
+    if not tokens:
+        return None
+    split = _split(tokens)
+    if split is None:
+        return None
+    first, second = _angle(split[0]), _angle(split[1])
+    if first is None or second is None:
+        return None
+    if first[1] in ('E', 'W') or second[1] in ('N', 'S'):
+        first, second = second, first
+    if first[1] in ('E', 'W') or second[1] in ('N', 'S'):
+        return None
+    lat, lon = first[0], second[0]
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    if first[2] or second[2]:
+        return _result(lat, lon, 'dms', 'DMS')
+    return _result(lat, lon, 'decimal')
+
+
+# UTM
+
+def _utm_fields(text: str) -> Optional[Dict]:
+    """Zone, hemisphere, easting and northing of a UTM string, not yet projected"""
+    match = _UTM.match(text.strip().upper())
+    if not match:
+        return None
+    zone, band, easting, northing = int(match.group(1)), match.group(2), float(match.group(3)), float(match.group(4))
+    # Northings in India have seven digits, eastings six; accept either order
+    if easting >= 1e6 > northing:
+        easting, northing = northing, easting
+    if not (1 <= zone <= 60 and 100000 <= easting <= 900000 and 0 <= northing <= 10000000):
+        return None
+    return {'zone': zone, 'band': band, 'south': band is not None and band < 'N',
+            'easting': easting, 'northing': northing}
+
+def _band_matches(band: Optional[str], lat: float) -> bool:
+    if band is None:
+        return True
+    if band == 'N':
+        # "43N" is as often the northern hemisphere as band N
+        return lat >= 0
+    south = -80 + 8 * _UTM_BANDS.index(band)
+    return south <= lat < (84 if band == 'X' else south + 8)
+
+def _utm_results(fields: Sequence[Dict]) -> List[Optional[Dict]]:
+    """Project parsed UTM strings, one vectorized transform per zone"""
+    results = [None] * len(fields)
+    zones = {}
+    for i, f in enumerate(fields):
+        zones.setdefault((f['zone'], f['south']), []).append(i)
+    for (zone, south), rows in zones.items():
+        lats, lons = to_wgs84([fields[i]['northing'] for i in rows], [fields[i]['easting'] for i in rows],
+                              utm_crs(zone, south))
+        for i, lat, lon in zip(rows, lats, lons):
+            f = fields[i]
+            lat, lon = float(lat), float(lon)
+            # A band that disagrees with the projected latitude means a misread string
+            if _band_matches(f['band'], lat) and -90 <= lat <= 90:
+                label = f"UTM {zone}{f['band'] or ('S' if south else 'N')}"
+                results[i] = _result(lat, lon, 'utm', label, crs=utm_crs(zone, south))
+    return results
+
+def parse_utm(text: str) -> Optional[Dict]:
+    """
+    UTM coordinates, e.g. "43Q 276689 2110589" or "UTM 43 276689mE 2110589mN"
+
+    The letter after the zone is read as a latitude band (C-M south, N-X
+    north), so "43S" is band S at 32-40°N; "43N" may also mean the northern
+    hemisphere. Without a letter the zone is taken as northern.
+    """
+    fields = _utm_fields(text)
+    return _utm_results([fields])[0] if fields else None
+
+
+# Plus Codes (Open Location Code)
+
+def _plus_decode(code: str) -> Optional[Tuple[float, float, float, float]]:
+    """(south, west, height, width) of the cell of a full Plus Code"""
+    digits = code.replace('+', '')
+    if len(digits) < 2 or len(digits) % 2 and len(digits) < 10:
+        return None
+    values = [_PLUS_ALPHABET.index(c) for c in digits]
+    if values[0] >= 9 or values[1] >= 18:
+        return None
+    lat, lon, resolution = -90.0, -180.0, 20.0
+    pairs = min(len(values), 10)
+    for k in range(0, pairs, 2):
+        lat += values[k] * resolution
+        lon += values[k + 1] * resolution
+        height = width = resolution
+        resolution /= 20
+    for value in values[10:]:
+        height /= 5
+        width /= 4
+        lat += (value // 4) * height
+        lon += (value % 4) * width
+    return lat, lon, height, width
+
+def _plus_prefix(lat: float, lon: float, length: int) -> str:
+    """First length digits of the Plus Code of a point"""
+    lat = min(max(lat, -90.0), 90.0 - 1e-10) + 90
+    lon = (lon + 180) % 360
+    digits, resolution = [], 20.0
+    while len(digits) < length:
+        lat_digit, lon_digit = int(lat // resolution), int(lon // resolution)
+        digits += [_PLUS_ALPHABET[lat_digit], _PLUS_ALPHABET[lon_digit]]
+        lat -= lat_digit * resolution
+        lon -= lon_digit * resolution
+        resolution /= 20
+    return ''.join(digits[:length])
+
+def parse_plus_code(text: str, places: Optional[Dict[str, Tuple[float, float]]] = None,
+                    reference: Optional[Tuple[float, float]] = None) -> Optional[Dict]:
+    """
+    A Plus Code, e.g. "7JWVHRH9+7G", or a short one with a locality,
+    e.g. "HRH9+7G New Delhi"
+
+    Args:
+        text: The code, with an optional locality after it
+        places: Name -> (lat, lon) used to resolve the locality
+        reference: (lat, lon) that a short code without a known locality
+            is taken to be near
+    """
+    match = _PLUS_CODE.match(text.strip().upper())
+    if not match:
+        return None
+    head, tail, locality = match.groups()
+    if len(head) % 2 or len(tail) == 1 or (len(head) < 8 and not tail):
+        return None
+    code = f"{head}+{tail}"
+    if len(head) < 8:
+        if locality and places:
+            reference = find_place(locality, places) or reference
+        if reference is None:
+            return None
+        padding = 8 - len(head)
+        cell = _plus_decode(_plus_prefix(reference[0], reference[1], padding) + code)
+        if cell is None:
+            return None
+        # Recover the nearest match: shift by one prefix cell towards the reference
+        resolution = 20.0 ** (2 - padding / 2)
+        south, west, height, width = cell
+        lat, lon = south + height / 2, west + width / 2
+        if reference[0] + resolution / 2 < lat and lat - resolution >= -90:
+            lat -= resolution
+        elif reference[0] - resolution / 2 > lat and lat + resolution <= 90:
+            lat += resolution
+        if reference[1] + resolution / 2 < lon:
+            lon -= resolution
+        elif reference[1] - resolution / 2 > lon:
+            lon += resolution
+        return _result(lat, lon, 'plus_code', f"Plus Code {code}")
+    elif locality:
+        return None
+    cell = _plus_decode(code)
+    if cell is None:
+        return None
+    south, west, height, width = cell
+    return _result(south + height / 2, west + width / 2, 'plus_code', f"Plus Code {code}")
+
+def find_place(name: str, places: Dict[str, Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """Location of a place by name, ignoring case; a unique prefix match will do"""
+    name = ' '.join(name.lower().replace(',', ' ').split())
+    lowered = {key.lower(): value for key, value in places.items()}
+    if name in lowered:
+        return lowered[name]
+    matches = [value for key, value in lowered.items() if key.startswith(name) or name.startswith(key + ' ')]
+    return matches[0] if len(matches) == 1 else None
+
+
+# Survey of India toposheets
+
+def _million_sheet(number: int) -> Optional[Tuple[float, float]]:
+    """(north, west) corner of a 1:1M sheet"""
+    for west, first, north, count in _MILLION_COLUMNS:
+        if first <= number < first + count:
+            return north - 4 * (number - first), west
+    return None
+
+def toposheet_bbox(sheet: str) -> Optional[Tuple[float, float, float, float]]:
+    """(min_lon, min_lat, max_lon, max_lat) of an SoI toposheet, e.g. '53H/13'"""
+    match = _TOPOSHEET.match(sheet.strip().upper())
+    if not match:
+        return None
+    number, letter, part, quadrant = match.groups()
+    corner = _million_sheet(int(number))
+    if corner is None:
+        return None
+    north, west = float(corner[0]), float(corner[1])
+    # 1:250k sheets A-P and 1:50k sheets 1-16 both run north to south, then west to east
+    index = ord(letter) - ord('A')
+    north, west, size = north - index % 4, west + index // 4, 1.0
+    if part:
+        index = int(part) - 1
+        if not 0 <= index < 16:
+            return None
+        size /= 4
+        north, west = north - size * (index % 4), west + size * (index // 4)
+    if quadrant:
+        size /= 2
+        column, row = _QUADRANTS[quadrant]
+        north, west = north - size * row, west + size * column
+    return west, north - size, west + size, north
+
+def parse_toposheet(text: str) -> Optional[Dict]:
+    """
+    Centre of an SoI toposheet (India and Adjacent Countries numbering),
+    e.g. "53H" (1:250k), "53H/13" (1:50k) or "53H/13/NE" (1:25k)
+
+    The result carries the sheet's bbox as well.
+    """
+    match = _TOPOSHEET.match(text.strip().upper())
+    bbox = toposheet_bbox(text) if match else None
+    if bbox is None:
+        return None
+    number, letter, part, quadrant = match.groups()
+    sheet = f"{number}{letter}" + (f"/{int(part)}" if part else '') + (f"/{quadrant}" if quadrant else '')
+    return _result((bbox[1] + bbox[3]) / 2, (bbox[0] + bbox[2]) / 2, 'toposheet', f"SoI toposheet {sheet}",
+                   sheet=sheet, bbox=bbox)
+
+
+def parse_coordinates(text: str, places: Optional[Dict[str, Tuple[float, float]]] = None,
+                      reference: Optional[Tuple[float, float]] = None) -> Optional[Dict]:
+    """
+    Location written in any supported format, without network access
+
+    Args:
+        text: Decimal degrees, DMS, UTM, a Plus Code or an SoI toposheet number
+        places: Name -> (lat, lon) for the locality of short Plus Codes
+        reference: (lat, lon) for short Plus Codes without a locality
+
+    Returns:
+        Dict with lat, lon, format ('decimal', 'dms', 'utm', 'plus_code' or
+        'toposheet') and display_name, or None if the text is not a location
+    """
+    return parse_coordinates_batch([text], places, reference)[0]
+
+def parse_coordinates_batch(texts: Sequence[str], places: Optional[Dict[str, Tuple[float, float]]] = None,
+                            reference: Optional[Tuple[float, float]] = None) -> List[Optional[Dict]]:
+    """
+    parse_coordinates() for many strings, e.g. an imported site list
+
+    UTM entries are projected together, one transform per zone.
+    """
+    results = [None] * len(texts)
+    utm_rows, utm_fields = [], []
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            continue
+        result = parse_degrees(text)
+        if result is None:
+            fields = _utm_fields(text)
+            if fields is not None:
+                utm_rows.append(i)
+                utm_fields.append(fields)
+                continue
+            result = parse_plus_code(text, places, reference) or parse_toposheet(text)
+        results[i] = result
+    if utm_fields:
+        for i, result in zip(utm_rows, _utm_results(utm_fields)):
+            results[i] = result
+    return results
@@ -5,175 +5,494 @@ Implements get_location_properties function using SoI shapefiles
 
 import geopandas as gpd
 import pandas as pd
-from shapely.geometry import Point
 import os
 import json
-from typing import Dict, Optional
+import math
+import time
+from typing import Dict, List, Optional, Sequence
+
+import metrics
+import nominatim
+from batch import DEFAULT_PRECISION, lookup_batch
+from boundaries import BoundaryIndex, nearest_boundaries
+from corridor import CorridorProfiler
+from coords import find_place, parse_coordinates_batch
+from crs import point_to_wgs84, to_wgs84
+from engine import LAYER_FILES, ZONE_FACTORS, Layer, LookupEngine
+from geocoder import ReverseGeocoder, load_settlements
+from layer_diff import affected, append_changelog, changelog_entry, update_engine
+from results import LocationResult
+from shared_cache import GEOHASH_PRECISION, SharedCache, geohash_bbox, layers_version
 
 # Global variables for cached data
 _seismic_gdf = None
 _wind_gdf = None
 _admin_gdf = None
 _zone_factors = None
+_engine = None
+_corridor = None
+_boundaries = {}
+_geocoder = None
+_shared_cache = None
+_data_dir = None
+_layer_stats = {}
+_places = None
+
+# Gazetteer used by get_nearby_cities and get_search_suggestions
+MAJOR_CITIES = {
+    "Delhi": {"lat": 28.6139, "lon": 77.2090}, "Mumbai": {"lat": 19.0760, "lon": 72.8777},
+    "Chennai": {"lat": 13.0827, "lon": 80.2707}, "Kolkata": {"lat": 22.5726, "lon": 88.3639},
+    "Bangalore": {"lat": 12.9716, "lon": 77.5946}, "Hyderabad": {"lat": 17.3850, "lon": 78.4867},
+    "Pune": {"lat": 18.5204, "lon": 73.8567}, "Ahmedabad": {"lat": 23.0225, "lon": 72.5714}
+}
+SEARCH_SUGGESTIONS = ["Delhi", "Mumbai", "Chennai", "Kolkata", "Bangalore", "Hyderabad", "Pune", "Ahmedabad", "Jaipur", "Lucknow"]
 
 def load_zone_factors():
     """Load seismic zone factors from IS 1893"""
     global _zone_factors
     if _zone_factors is None:
-        _zone_factors = {
-            "II": 0.10,
-            "III": 0.16,
-            "IV": 0.24,
-            "V": 0.36
-        }
+        _zone_factors = dict(ZONE_FACTORS)
     return _zone_factors
 
-def load_shapefiles():
-    """Load SoI shapefiles with caching"""
-    global _seismic_gdf, _wind_gdf, _admin_gdf
+def load_shapefiles(data_dir: Optional[str] = None):
+    """
+    Load SoI shapefiles with caching
+
+    Layers come from the first directory loaded (the bundled data by
+    default) until clear_cache(); a layer missing there stays missing
+    rather than being filled in from another directory.
+    """
+    global _data_dir
+    data_dir = data_dir or os.path.join(os.path.dirname(__file__), 'data')
+    loaded = _data_dir is not None
+    metrics.cache('layers', loaded)
+    if loaded:
+        return
     
-    data_dir = os.path.join(os.path.dirname(__file__), 'data')
+    with metrics.timer('load'):
+        _read_layers(data_dir)
+    _data_dir = data_dir
+    _layer_stats.update({name: _file_stat(os.path.join(data_dir, f)) for name, f in LAYER_FILES.items()})
+
+def _file_stat(path: str):
+    """(size, mtime) of a layer file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def _read_gdf(path: str) -> gpd.GeoDataFrame:
+    with metrics.timer('read_file'):
+        gdf = gpd.read_file(path)
+    if gdf.crs != 'EPSG:4326':
+        with metrics.timer('to_crs'):
+            gdf = gdf.to_crs('EPSG:4326')
+    return gdf
+
+def _read_layers(data_dir: str):
+    """Read whichever layers are not loaded yet"""
+    global _seismic_gdf, _wind_gdf, _admin_gdf
     
     # Load seismic zones (digitized from IS 1893)
     seismic_file = os.path.join(data_dir, 'seismic_zones.geojson')
     if _seismic_gdf is None and os.path.exists(seismic_file):
-        _seismic_gdf = gpd.read_file(seismic_file)
-        if _seismic_gdf.crs != 'EPSG:4326':
-            _seismic_gdf = _seismic_gdf.to_crs('EPSG:4326')
+        _seismic_gdf = _read_gdf(seismic_file)
     
     # Load wind zones (digitized from IS 875)
     wind_file = os.path.join(data_dir, 'wind_zones.geojson')
     if _wind_gdf is None and os.path.exists(wind_file):
-        _wind_gdf = gpd.read_file(wind_file)
-        if _wind_gdf.crs != 'EPSG:4326':
-            _wind_gdf = _wind_gdf.to_crs('EPSG:4326')
+        _wind_gdf = _read_gdf(wind_file)
     
     # Load administrative boundaries (SoI data)
     admin_file = os.path.join(data_dir, 'admin_boundaries.geojson')
     if _admin_gdf is None and os.path.exists(admin_file):
-        _admin_gdf = gpd.read_file(admin_file)
-        if _admin_gdf.crs != 'EPSG:4326':
-            _admin_gdf = _admin_gdf.to_crs('EPSG:4326')
+        _admin_gdf = _read_gdf(admin_file)
+
+def clear_cache():
+    """Drop loaded layers and the lookup engine so the next call reloads them"""
+    global _seismic_gdf, _wind_gdf, _admin_gdf, _engine, _corridor, _geocoder, _shared_cache, _places, _data_dir
+    _seismic_gdf = _wind_gdf = _admin_gdf = _engine = _corridor = _geocoder = _shared_cache = _places = None
+    _data_dir = None
+    _boundaries.clear()
+    _layer_stats.clear()
+    nominatim.reset()
+
+def update_layers(data_dir: Optional[str] = None, changelog: Optional[str] = None) -> Dict:
+    """
+    Switch to revised layer files, rebuilding only what they change
+
+    Layer files that differ from the loaded ones are compared feature by
+    feature (see layer_diff.py). The engine reuses the index parts of
+    unchanged features, and the shared cache keeps every result outside
+    the changed areas. Boundary indexes of changed layers rebuild on next use.
+
+    Args:
+        data_dir: Directory with the revised files; the loaded one by default
+            (for files replaced in place)
+        changelog: JSON-lines file to append the change record to
+
+    Returns:
+        The change record: per-layer summaries, cache entries kept and
+        dropped, and the time taken
+
+    Raises:
+        FileNotFoundError: A loaded layer has no file in data_dir
+    """
+    global _seismic_gdf, _wind_gdf, _admin_gdf, _engine, _data_dir
+    start = time.perf_counter()
+    engine = get_lookup_engine()
+    # Opened before the files are compared, so it still has the old version
+    cache = get_shared_cache()
+    data_dir = data_dir or _data_dir
+
+    gdfs = {'seismic': _seismic_gdf, 'wind': _wind_gdf, 'admin': _admin_gdf}
+    stats = {name: _file_stat(os.path.join(data_dir, filename)) for name, filename in LAYER_FILES.items()}
+    # A loaded layer without a file would stay in memory under the new
+    # directory's version, so refuse before changing anything
+    missing = [LAYER_FILES[name] for name in LAYER_FILES if stats[name] is None and gdfs[name] is not None]
+    if missing:
+        raise FileNotFoundError(f"{data_dir} lacks loaded layer files: {', '.join(missing)}")
+    collections = {}
+    for name, filename in LAYER_FILES.items():
+        path = os.path.join(data_dir, filename)
+        if stats[name] is not None and (data_dir != _data_dir or stats[name] != _layer_stats.get(name)):
+            gdfs[name] = _read_gdf(path)
+            collections[name] = gdfs[name].__geo_interface__
+    _engine, diffs = update_engine(engine, collections)
+    _seismic_gdf, _wind_gdf, _admin_gdf = gdfs['seismic'], gdfs['wind'], gdfs['admin']
+    _data_dir = data_dir
+    _layer_stats.update(stats)
 
-def get_location_properties(lat: float, lon: float) -> Dict:
+    for name in diffs:
+        _boundaries.pop(name, None)
+    if _geocoder is not None and 'admin' not in diffs:
+        _geocoder.engine = _engine
+
+    kept = dropped = 0
+    if cache is not None:
+        version = layers_version(data_dir)
+        if version != cache.version:
+            kept, dropped = cache.migrate(version, lambda kind, key: kind == 'properties' and
+                                          affected(diffs, geohash_bbox(key)))
+    entry = changelog_entry(diffs, data_dir=data_dir, cache_kept=kept, cache_dropped=dropped,
+                            seconds=round(time.perf_counter() - start, 3))
+    if changelog:
+        append_changelog(changelog, entry)
+    return entry
+
+def get_lookup_engine() -> LookupEngine:
+    """Shared lookup engine built from the loaded GeoDataFrames"""
+    global _engine
+    load_shapefiles()
+    metrics.cache('engine', _engine is not None)
+    if _engine is None:
+        layers = {}
+        for name, gdf in (('seismic', _seismic_gdf), ('wind', _wind_gdf), ('admin', _admin_gdf)):
+            if gdf is not None:
+                layers[name] = Layer.from_geojson(name, gdf.__geo_interface__)
+        _engine = LookupEngine(layers, overlay=os.environ.get('LOCATION_WIZARD_OVERLAY') == '1')
+    return _engine
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Node-wide result cache at $LOCATION_WIZARD_CACHE, or None when not configured"""
+    global _shared_cache
+    path = os.environ.get('LOCATION_WIZARD_CACHE')
+    if not path:
+        return None
+    if _shared_cache is None or _shared_cache.path != path:
+        data_dir = _data_dir or os.path.join(os.path.dirname(__file__), 'data')
+        precision = int(os.environ.get('LOCATION_WIZARD_CACHE_PRECISION', GEOHASH_PRECISION))
+        _shared_cache = SharedCache(path, layers_version(data_dir), precision)
+    return _shared_cache
+
+def _shared_get(kind: str, key: str):
+    """Shared cache lookup that never fails the caller"""
+    try:
+        cache = get_shared_cache()
+        if cache is None:
+            return None
+        value = cache.get(kind, key)
+    except Exception:
+        value = None
+    metrics.cache('shared', value is not None)
+    return value
+
+def _shared_put(kind: str, key: str, value):
+    try:
+        cache = get_shared_cache()
+        if cache is not None:
+            cache.put(kind, key, value)
+    except Exception:
+        pass
+
+def _cell(lat: float, lon: float) -> Optional[str]:
+    """Shared cache key of a point, or None when the cache is off or unusable"""
+    try:
+        cache = get_shared_cache()
+    except Exception:
+        return None
+    return cache.cell(lat, lon) if cache is not None else None
+
+def get_location_properties(lat: float, lon: float, compact: bool = False, crs=None) -> Dict:
     """
     Get seismic and wind zone properties for a given location
     
     Args:
-        lat: Latitude in decimal degrees
-        lon: Longitude in decimal degrees
+        lat: Latitude in decimal degrees (northing when crs is given)
+        lon: Longitude in decimal degrees (easting when crs is given)
+        compact: Return a results.LocationResult record instead of a dict
+        crs: Source CRS of the coordinates, e.g. 'EPSG:32643'; WGS84 by default
     
     Returns:
         Dictionary with location properties including seismic zone and wind speed
     """
-    load_shapefiles()
     load_zone_factors()
+    lat, lon = point_to_wgs84(lat, lon, crs)
+    cell = _cell(lat, lon)
+    if cell is None:
+        result = get_lookup_engine().lookup(lat, lon)
+    else:
+        cached = _shared_get('properties', cell)
+        if cached is not None:
+            result = dict(cached, lat=lat, lon=lon)
+        else:
+            result = get_lookup_engine().lookup(lat, lon)
+            _shared_put('properties', cell, result)
+    return LocationResult.from_dict(result) if compact else result
+
+def get_location_properties_batch(lats: Sequence[float], lons: Sequence[float],
+                                  precision: Optional[float] = DEFAULT_PRECISION, compact: bool = False,
+                                  crs=None):
+    """
+    Get location properties for many points in one pass per layer
     
-    # Create point geometry
-    point = Point(lon, lat)
-    
-    # Initialize result
-    result = {
-        "lat": lat,
-        "lon": lon,
-        "seismic_zone": "Unknown",
-        "zone_factor": None,
-        "basic_wind_speed": None,
-        "place_name": "Unknown",
-        "state": "Unknown"
-    }
-    
-    # Check seismic zone
-    if _seismic_gdf is not None:
-        seismic_match = _seismic_gdf[_seismic_gdf.geometry.contains(point)]
-        if not seismic_match.empty:
-            zone = seismic_match.iloc[0]['zone']
-            result["seismic_zone"] = zone
-            result["zone_factor"] = _zone_factors.get(zone)
-    
-    # Check wind zone
-    if _wind_gdf is not None:
-        wind_match = _wind_gdf[_wind_gdf.geometry.contains(point)]
-        if not wind_match.empty:
-            result["basic_wind_speed"] = float(wind_match.iloc[0]['Vb'])
-    
-    # Check administrative boundaries
-    if _admin_gdf is not None:
-        admin_match = _admin_gdf[_admin_gdf.geometry.contains(point)]
-        if not admin_match.empty:
-            result["place_name"] = admin_match.iloc[0].get('NAME', 'Unknown')
-            result["state"] = admin_match.iloc[0].get('STATE', 'Unknown')
-    
-    return result
-
-def search_location(query: str) -> Optional[Dict]:
-    """Search for location by address or coordinates"""
+    Args:
+        lats: Latitudes in decimal degrees (northings when crs is given)
+        lons: Longitudes in decimal degrees (eastings when crs is given)
+        precision: Points closer than this (degrees) share one lookup;
+            None dedupes exact duplicates only
+        compact: Return one results.ResultBatch (struct of arrays) instead
+            of a dict per point
+        crs: Source CRS of the coordinates, reprojected in one vectorized
+            call; WGS84 by default
+    
+    Returns:
+        One result dict per point with WGS84 lat/lon, in input order (or
+        the ResultBatch)
+    """
+    load_zone_factors()
+    return lookup_batch(get_lookup_engine(), lats, lons, precision, compact=compact, crs=crs)
+
+def get_alignment_profile(line, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+    """
+    Get chainage intervals where zone attributes change along an alignment
+    
+    Args:
+        line: shapely LineString (lon, lat) or list of (lat, lon) vertices
+        fields: Result keys to split on, e.g. ['seismic_zone']; all by default
+    
+    Returns:
+        Intervals with start_m, end_m, length_m and the zone attributes
+    """
+    global _corridor
+    engine = get_lookup_engine()
+    if _corridor is None or _corridor.engine is not engine:
+        _corridor = CorridorProfiler(engine)
+    return _corridor.profile(line, fields)
+
+def get_zone_boundaries_batch(lats: Sequence[float], lons: Sequence[float],
+                              layers: Sequence[str] = ('seismic', 'wind'), higher: bool = False,
+                              max_km: Optional[float] = None, crs=None) -> List[Dict]:
+    """
+    Get the nearest zone boundary for many points
+    
+    Args:
+        lats: Latitudes
+        lons: Longitudes
+        layers: Layers to check ('seismic', 'wind', 'admin')
+        higher: Only boundaries towards a higher zone factor / wind speed
+        max_km: Ignore boundaries farther than this
+        crs: Source CRS of the coordinates; WGS84 by default
+    
+    Returns:
+        Per point, layer -> dict with distance_km, boundary_lat, boundary_lon
+        and the adjacent zone's attributes, or None if there is no boundary
+    """
+    lats, lons = to_wgs84(lats, lons, crs)
+    engine = get_lookup_engine()
+    for name in layers:
+        if name not in _boundaries or _boundaries[name].source is not engine.layers[name]:
+            _boundaries[name] = BoundaryIndex(name, engine.layers[name], engine.backend)
+    return nearest_boundaries({name: _boundaries[name] for name in layers}, lats, lons, higher, max_km)
+
+def get_zone_boundaries(lat: float, lon: float, layers: Sequence[str] = ('seismic', 'wind'),
+                        higher: bool = False, max_km: Optional[float] = None, crs=None) -> Dict:
+    """Get the nearest zone boundary for one point, see get_zone_boundaries_batch"""
+    return get_zone_boundaries_batch([lat], [lon], layers, higher, max_km, crs)[0]
+
+def get_places() -> Dict[str, tuple]:
+    """Name -> (lat, lon) of the gazetteer cities and bundled settlements"""
+    global _places
+    if _places is None:
+        places = {name: (city['lat'], city['lon']) for name, city in MAJOR_CITIES.items()}
+        try:
+            for settlement in load_settlements():
+                places.setdefault(settlement['name'], (settlement['lat'], settlement['lon']))
+        except Exception as e:
+            print(f"Error loading settlements: {e}")
+        _places = places
+    return _places
+
+def _parse_local(queries: Sequence[str]) -> List[Optional[Dict]]:
+    """Locations written as coordinates, parsed in-process (see coords.py)"""
+    parsed = parse_coordinates_batch(queries, get_places())
+    for found in parsed:
+        if found is not None:
+            metrics.incr('search_local', format=found['format'])
+    return parsed
+
+def _in_india(found: Dict) -> bool:
+    return 6.0 <= found['lat'] <= 37.0 and 68.0 <= found['lon'] <= 97.0
+
+def search_location(query: str, budget: Optional[float] = None) -> Optional[Dict]:
+    """
+    Search for location by address or coordinates
+    
+    Decimal degrees, DMS, UTM, Plus Codes and SoI toposheet numbers are
+    resolved locally; only addresses go to Nominatim. Coordinates outside
+    India give None. While Nominatim is unavailable (see nominatim.py), a
+    query naming a gazetteer place or settlement is answered offline.
+    
+    Args:
+        query: Address, place name or coordinates
+        budget: Seconds to wait for Nominatim at most
+    """
     try:
-        import requests
-        
-        # Check if coordinates
-        if ',' in query:
-            try:
-                lat, lon = map(float, query.split(','))
-                if 6.0 <= lat <= 37.0 and 68.0 <= lon <= 97.0:
-                    return {'lat': lat, 'lon': lon, 'display_name': f"Coordinates: {lat:.6f}, {lon:.6f}"}
-            except ValueError:
-                pass
+        found = _parse_local([query])[0]
+        if found is not None:
+            return found if _in_india(found) else None
         
-        # Search by address
-        response = requests.get("https://nominatim.openstreetmap.org/search", {
-            'q': query + ', India', 'format': 'json', 'limit': 1, 'countrycodes': 'in'
-        }, headers={'User-Agent': 'LocationWizard/1.0'}, timeout=10)
+        # Search by address, unless another process already did
+        key = ' '.join(query.lower().split())
+        cached = _shared_get('search', key)
+        if cached is not None:
+            return cached
+        try:
+            data = nominatim.get_json('/search', {
+                'q': query + ', India', 'format': 'json', 'limit': 1, 'countrycodes': 'in'
+            }, 'search', budget)
+        except nominatim.Unavailable:
+            return _search_offline(query)
         
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                result = data[0]
-                return {'lat': float(result['lat']), 'lon': float(result['lon']), 'display_name': result.get('display_name', query)}
-    except Exception:
-        pass
+        if data:
+            result = data[0]
+            found = {'lat': float(result['lat']), 'lon': float(result['lon']), 'display_name': result.get('display_name', query)}
+            _shared_put('search', key, found)
+            return found
+    except Exception as e:
+        metrics.geocode_error('search', e)
     return None
 
-def get_reverse_geocoding(lat: float, lon: float) -> Optional[str]:
+def _search_offline(query: str) -> Optional[Dict]:
+    """Gazetteer answer to a search, marked offline"""
+    place = find_place(query, get_places())
+    if place is None:
+        return None
+    metrics.incr('geocode_offline', operation='search')
+    return {'lat': place[0], 'lon': place[1], 'display_name': query.strip(), 'offline': True}
+
+def search_locations(queries: Sequence[str], online: bool = True) -> List[Optional[Dict]]:
+    """
+    search_location() for a site list, e.g. imported from a spreadsheet
+    
+    Coordinates are parsed in one local pass; with online=False the
+    remaining queries give None instead of going to Nominatim.
+    """
+    results = []
+    for query, found in zip(queries, _parse_local(queries)):
+        if found is not None:
+            results.append(found if _in_india(found) else None)
+        elif online and query and query.strip():
+            results.append(search_location(query))
+        else:
+            results.append(None)
+    return results
+
+def get_reverse_geocoding(lat: float, lon: float, budget: Optional[float] = None) -> Optional[str]:
     """
     Optional reverse geocoding using Nominatim (FOSS service)
     
     Args:
         lat: Latitude
         lon: Longitude
+        budget: Seconds to wait for Nominatim at most
     
     Returns:
-        Place name or None if service unavailable
+        Place name or None if service unavailable; get_address() has the
+        offline address
     """
+    cell = _cell(lat, lon)
+    cached = _shared_get('reverse', cell) if cell else None
+    if cached is not None:
+        return cached
     try:
-        import requests
-        url = f"https://nominatim.openstreetmap.org/reverse"
         params = {
             'lat': lat,
             'lon': lon,
             'format': 'json',
             'addressdetails': 1
         }
-        headers = {'User-Agent': 'LocationWizard/1.0'}
-        
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('display_name', 'Unknown')
-    except Exception:
+        data = nominatim.get_json('/reverse', params, 'reverse', budget)
+        place_name = data.get('display_name', 'Unknown')
+        if cell:
+            _shared_put('reverse', cell, place_name)
+        return place_name
+    except nominatim.Unavailable:
         pass
+    except Exception as e:
+        metrics.geocode_error('reverse', e)
     
     return None
 
-def get_nearby_cities(lat: float, lon: float, radius_km: float = 50) -> list:
+def get_addresses_batch(lats: Sequence[float], lons: Sequence[float], k: int = 1, crs=None) -> List[Dict]:
+    """
+    Offline structured addresses for many points
+    
+    Args:
+        lats: Latitudes
+        lons: Longitudes
+        k: Number of nearest settlements to list under 'nearby'
+        crs: Source CRS of the coordinates; WGS84 by default
+    
+    Returns:
+        Dicts with locality, locality_type, locality_distance_km, district,
+        state, display_name and nearby
+    """
+    global _geocoder
+    lats, lons = to_wgs84(lats, lons, crs)
+    engine = get_lookup_engine()
+    if _geocoder is None or _geocoder.engine is not engine:
+        _geocoder = ReverseGeocoder(engine)
+    return _geocoder.reverse_many(lats, lons, k)
+
+def get_address(lat: float, lon: float, k: int = 1, enrich: bool = False, crs=None) -> Dict:
+    """
+    Offline structured address for one point, see get_addresses_batch
+    
+    With enrich=True, Nominatim's display name is added as 'osm_display_name'
+    when the service answers; the offline fields are never replaced.
+    """
+    lat, lon = point_to_wgs84(lat, lon, crs)
+    address = get_addresses_batch([lat], [lon], k)[0]
+    if enrich:
+        finite = math.isfinite(lat) and math.isfinite(lon)
+        address['osm_display_name'] = get_reverse_geocoding(lat, lon) if finite else None
+    return address
+
+def get_nearby_cities(lat: float, lon: float, radius_km: float = 50, cities: Optional[Dict] = None) -> list:
     """Get nearby major cities within specified radius"""
-    import math
-    cities = {
-        "Delhi": {"lat": 28.6139, "lon": 77.2090}, "Mumbai": {"lat": 19.0760, "lon": 72.8777},
-        "Chennai": {"lat": 13.0827, "lon": 80.2707}, "Kolkata": {"lat": 22.5726, "lon": 88.3639},
-        "Bangalore": {"lat": 12.9716, "lon": 77.5946}, "Hyderabad": {"lat": 17.3850, "lon": 78.4867},
-        "Pune": {"lat": 18.5204, "lon": 73.8567}, "Ahmedabad": {"lat": 23.0225, "lon": 72.5714}
-    }
+    cities = MAJOR_CITIES if cities is None else cities
     
     nearby = []
     for city, coords in cities.items():
@@ -188,9 +507,9 @@ def get_nearby_cities(lat: float, lon: float, radius_km: float = 50) -> list:
     
     return sorted(nearby, key=lambda x: x['distance'])
 
-def get_search_suggestions(query: str) -> list:
+def get_search_suggestions(query: str, suggestions: Optional[List[str]] = None) -> list:
     """Get search suggestions for autocomplete"""
-    suggestions = ["Delhi", "Mumbai", "Chennai", "Kolkata", "Bangalore", "Hyderabad", "Pune", "Ahmedabad", "Jaipur", "Lucknow"]
+    suggestions = SEARCH_SUGGESTIONS if suggestions is None else suggestions
     if not query:
         return suggestions[:5]
     return [city for city in suggestions if query.lower() in city.lower()][:5]
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Corridor profiling for Location Wizard
+Chainage intervals along a bridge alignment where the seismic zone, wind
+speed or admin unit changes, computed from exact boundary crossings
+"""
+
+import importlib.util
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from engine import LookupEngine
+from geometry import haversine_km, segment_intersections
+
+# Result keys that describe the location itself rather than its zones
+_POSITION_KEYS = ('lat', 'lon')
+
+# Intervals shorter than this fraction of a segment are rounding noise
+_MIN_STEP = 1e-12
+
+
+def alignment_vertices(line) -> List[Tuple[float, float]]:
+    """
+    (lat, lon) vertices of an alignment
+
+    Accepts a shapely LineString or GeoJSON LineString dict (lon, lat order,
+    like the data layers) or a sequence of (lat, lon) pairs (argument order of
+    get_location_properties).
+    """
+    if hasattr(line, 'coords'):
+        return [(float(y), float(x)) for x, y, *_ in line.coords]
+    if isinstance(line, dict):
+        return [(float(y), float(x)) for x, y, *_ in line['coordinates']]
+    return [(float(lat), float(lon)) for lat, lon in line]
+
+
+class CorridorProfiler:
+    """
+    Profiles alignments against the layers of a LookupEngine
+
+    Boundary crossings come from a shapely STRtree over feature boundaries
+    when shapely is installed, otherwise from bounding-box filtered edge
+    tests. Attributes between crossings come from engine.lookup_many(), so
+    overlap precedence matches point lookups.
+    """
+
+    def __init__(self, engine: LookupEngine):
+        self.engine = engine
+        self._tree = None
+        self._boundaries = None
+        if importlib.util.find_spec('shapely') is not None:
+            import shapely
+            from shapely.geometry import shape
+            self._boundaries = shapely.boundary([shape(g) for layer in engine.layers.values()
+                                                 for g in layer.geometries])
+            self._tree = shapely.STRtree(self._boundaries)
+
+    def crossings(self, vertices: Sequence[Tuple[float, float]]) -> List[List[float]]:
+        """Sorted crossing parameters t in (0, 1) for every segment"""
+        if self._tree is not None:
+            return self._crossings_shapely(vertices)
+        return self._crossings_python(vertices)
+
+    def _crossings_shapely(self, vertices) -> List[List[float]]:
+        import numpy as np
+        import shapely
+        xy = np.asarray([(lon, lat) for lat, lon in vertices], dtype=float)
+        a, b = xy[:-1], xy[1:]
+        segments = shapely.linestrings(np.stack([a, b], axis=1))
+        seg_idx, boundary_idx = self._tree.query(segments, predicate='intersects')
+        hits = shapely.intersection(segments[seg_idx], self._boundaries[boundary_idx])
+        points, which = shapely.get_coordinates(hits, return_index=True)
+        seg_of_point = seg_idx[which]
+
+        d = b - a
+        length2 = np.einsum('ij,ij->i', d, d)
+        t = np.einsum('ij,ij->i', points - a[seg_of_point], d[seg_of_point]) / np.where(length2 > 0, length2, 1)[seg_of_point]
+        result = [[] for _ in range(len(segments))]
+        for k, value in zip(seg_of_point.tolist(), t.tolist()):
+            if 0.0 < value < 1.0:
+                result[k].append(value)
+        return [sorted(set(ts)) for ts in result]
+
+    def _crossings_python(self, vertices) -> List[List[float]]:
+        result = []
+        for (lat_a, lon_a), (lat_b, lon_b) in zip(vertices, vertices[1:]):
+            min_x, max_x = min(lon_a, lon_b), max(lon_a, lon_b)
+            min_y, max_y = min(lat_a, lat_b), max(lat_a, lat_b)
+            ts = set()
+            for layer in self.engine.layers.values():
+                for (bx0, by0, bx1, by1), rings in zip(layer.bboxes, layer.rings):
+                    if bx0 <= max_x and min_x <= bx1 and by0 <= max_y and min_y <= by1:
+                        for ring in rings:
+                            ts.update(t for t in segment_intersections(lon_a, lat_a, lon_b, lat_b, ring)
+                                      if 0.0 < t < 1.0)
+            result.append(sorted(ts))
+        return result
+
+    def profile(self, line, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Chainage intervals with constant zone attributes along an alignment
+
+        Args:
+            line: Alignment, see alignment_vertices()
+            fields: Result keys that define an interval, e.g. ('seismic_zone',);
+                defaults to every attribute of a lookup result
+
+        Returns:
+            List of dicts with start_m, end_m, length_m, start/end lat/lon and
+            the interval's attributes, in chainage order
+        """
+        vertices = alignment_vertices(line)
+        if len(vertices) < 2:
+            raise ValueError("An alignment needs at least two vertices")
+
+        # Sub-intervals between crossings, with their midpoints
+        pieces = []
+        chainage = 0.0
+        for k, ts in enumerate(self.crossings(vertices)):
+            (lat_a, lon_a), (lat_b, lon_b) = vertices[k], vertices[k + 1]
+            length = haversine_km(lat_a, lon_a, lat_b, lon_b) * 1000
+            bounds = [0.0] + ts + [1.0]
+            for t0, t1 in zip(bounds, bounds[1:]):
+                if t1 - t0 > _MIN_STEP:
+                    tm = (t0 + t1) / 2
+                    pieces.append((chainage + t0 * length, chainage + t1 * length,
+                                   (lat_a + (lat_b - lat_a) * t0, lon_a + (lon_b - lon_a) * t0),
+                                   (lat_a + (lat_b - lat_a) * t1, lon_a + (lon_b - lon_a) * t1),
+                                   (lat_a + (lat_b - lat_a) * tm, lon_a + (lon_b - lon_a) * tm)))
+            chainage += length
+
+        results = self.engine.lookup_many([p[4][0] for p in pieces], [p[4][1] for p in pieces])
+        intervals = []
+        for (start_m, end_m, start, end, _), result in zip(pieces, results):
+            keys = fields or [k for k in result if k not in _POSITION_KEYS]
+            attributes = {k: result.get(k) for k in keys}
+            if intervals and intervals[-1]['_key'] == attributes:
+                last = intervals[-1]
+                last['end_m'], last['end_lat'], last['end_lon'] = end_m, end[0], end[1]
+                continue
+            intervals.append({'_key': attributes, 'start_m': start_m, 'end_m': end_m,
+                              'start_lat': start[0], 'start_lon': start[1],
+                              'end_lat': end[0], 'end_lon': end[1]})
+
+        profile = []
+        for interval in intervals:
+            attributes = interval.pop('_key')
+            interval['length_m'] = interval['end_m'] - interval['start_m']
+            interval.update(attributes)
+            profile.append(interval)
+        return profile
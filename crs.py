@@ -0,0 +1,76 @@
+"""
+Input coordinate reference systems for Location Wizard
+Reprojects query coordinates to WGS84 in bulk with pyproj, keeping one
+Transformer per source CRS (and thread) so repeated calls pay no setup
+
+Projected inputs are given as y (northing) in the lat position and x
+(easting) in the lon position, whatever the CRS's own axis order.
+"""
+
+import threading
+from typing import Sequence, Tuple
+
+import metrics
+
+WGS84 = 'EPSG:4326'
+
+# Spellings of WGS84 lat/lon that need no transformation
+_WGS84_NAMES = {'EPSG:4326', '4326', 'WGS84', 'WGS 84', 'OGC:CRS84'}
+
+# Per-thread {(source, target): Transformer}; Transformers are not thread-safe
+_local = threading.local()
+
+
+def is_wgs84(crs) -> bool:
+    """True for None and the usual spellings of WGS84 geographic coordinates"""
+    return crs is None or str(crs).strip().upper() in _WGS84_NAMES
+
+def utm_crs(zone: int, south: bool = False) -> str:
+    """EPSG code of a WGS84 UTM zone, e.g. utm_crs(43) -> 'EPSG:32643'"""
+    if not 1 <= zone <= 60:
+        raise ValueError(f"UTM zone must be 1-60, got {zone}")
+    return f"EPSG:{(32700 if south else 32600) + zone}"
+
+def get_transformer(crs, target: str = WGS84):
+    """Cached pyproj Transformer from crs to target, in x/y (lon/lat) order"""
+    cache = getattr(_local, 'transformers', None)
+    if cache is None:
+        cache = _local.transformers = {}
+    key = (crs if isinstance(crs, (str, int)) else str(crs), target)
+    transformer = cache.get(key)
+    metrics.cache('transformer', transformer is not None)
+    if transformer is None:
+        from pyproj import Transformer
+        if isinstance(crs, int):
+            crs = f"EPSG:{crs}"
+        transformer = cache[key] = Transformer.from_crs(crs, target, always_xy=True)
+    return transformer
+
+def to_wgs84(ys: Sequence[float], xs: Sequence[float], crs) -> Tuple[Sequence[float], Sequence[float]]:
+    """
+    Latitudes and longitudes of points given in crs
+
+    Args:
+        ys: Northings (or latitudes) in crs
+        xs: Eastings (or longitudes) in crs
+        crs: Anything pyproj accepts: 'EPSG:32643', 32643, a PROJ string, a
+            pyproj.CRS; None or WGS84 returns the input unchanged
+
+    Returns:
+        (lats, lons) as NumPy arrays; points outside the CRS's domain
+        come back as inf, and lookups, addresses and boundary searches
+        give them empty results
+    """
+    if is_wgs84(crs):
+        return ys, xs
+    import numpy as np
+    with metrics.timer('reproject'):
+        lons, lats = get_transformer(crs).transform(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+    return lats, lons
+
+def point_to_wgs84(y: float, x: float, crs) -> Tuple[float, float]:
+    """(lat, lon) of one point given in crs, see to_wgs84()"""
+    if is_wgs84(crs):
+        return y, x
+    lon, lat = get_transformer(crs).transform(x, y)
+    return float(lat), float(lon)
@@ -0,0 +1,134 @@
+"""
+Warm lookup daemon for Location Wizard
+Keeps layers, indexes and caches loaded and answers client.py over a Unix
+domain socket, so short-lived callers skip the geopandas import and layer load
+
+Usage: python daemon.py [--socket PATH] [--data-dir DIR]
+"""
+
+import argparse
+import json
+import logging
+import os
+import socketserver
+from typing import Optional
+
+import core
+import metrics
+from client import (CALLS, OP_CALL, OP_LOOKUP, OP_PING, POINT, STATUS_ERROR, STATUS_JSON,
+                    STATUS_RECORDS, LocationClient, default_socket_path, encode_records, recv_frame, send_frame)
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Load everything a first request would otherwise pay for"""
+    core.load_zone_factors()
+    core.get_lookup_engine()
+    core.get_addresses_batch([20.0], [78.0])
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    """One client connection; frames are answered in order until it closes"""
+
+    def handle(self):
+        while True:
+            try:
+                frame = recv_frame(self.request)
+            except OSError:
+                return
+            if frame is None:
+                return
+            op, body = frame
+            metrics.incr('daemon_requests', op=op)
+            try:
+                status, reply = self.dispatch(op, body)
+            except Exception as e:
+                logger.exception("Daemon request failed")
+                status, reply = STATUS_ERROR, f"{type(e).__name__}: {e}".encode()
+            try:
+                send_frame(self.request, status, reply)
+            except OSError:
+                return
+
+    def dispatch(self, op: int, body: bytes):
+        if op == OP_PING:
+            return STATUS_JSON, b'null'
+        if op == OP_LOOKUP:
+            if len(body) % POINT.size:
+                raise ValueError("Truncated lookup request")
+            points = list(POINT.iter_unpack(body))
+            if len(points) == 1:
+                results = [core.get_location_properties(*points[0])]
+            else:
+                results = core.get_location_properties_batch([p[0] for p in points], [p[1] for p in points])
+            packed = encode_records(results)
+            if packed is not None:
+                return STATUS_RECORDS, packed
+            return STATUS_JSON, json.dumps(results).encode()
+        if op == OP_CALL:
+            request = json.loads(body)
+            method = request.get('method')
+            if method not in CALLS:
+                raise ValueError(f"Unknown method: {method}")
+            result = getattr(core, method)(*request.get('args', ()), **request.get('kwargs', {}))
+            return STATUS_JSON, json.dumps(result).encode()
+        raise ValueError(f"Unknown opcode: {op}")
+
+
+class LocationDaemon(socketserver.ThreadingUnixStreamServer):
+    """
+    Threaded Unix-socket server; one thread per client connection
+
+    Args:
+        path: Socket path; default_socket_path() by default. A stale socket
+            left by a crashed daemon is replaced; a live one raises OSError.
+        warm: Load layers and indexes before accepting connections
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: Optional[str] = None, warm: bool = True):
+        self.path = path or default_socket_path()
+        if os.path.exists(self.path):
+            with LocationClient(self.path, timeout=1.0) as client:
+                live = client.ping()
+            if live:
+                raise OSError(f"A daemon is already serving {self.path}")
+            os.unlink(self.path)
+        if warm:
+            warm_up()
+        # Only the owning user may connect, from the moment the socket exists
+        umask = os.umask(0o177)
+        try:
+            super().__init__(self.path, RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Location Wizard lookups over a Unix socket")
+    parser.add_argument('--socket', default=None, help="Socket path (default: $LOCATION_WIZARD_SOCKET "
+                                                        "or a per-user path in /tmp)")
+    parser.add_argument('--data-dir', default=None, help="Directory with the layer GeoJSON files")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.data_dir:
+        core.load_shapefiles(args.data_dir)
+    with LocationDaemon(args.socket) as server:
+        logger.info("Serving on %s", server.path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Tests core functionality with sample coordinates
 
 from core import get_location_properties
 import json
+import profiling
 
 def demo_locations():
     """Test the location wizard with known coordinates"""
@@ -73,5 +74,7 @@ def test_api_format():
         print(" All required fields present")
 
 if __name__ == "__main__":
-    demo_locations()
-    test_api_format()
\ No newline at end of file
+    # Set LOCATION_WIZARD_PROFILE=DIR to profile the run (see profiling.py)
+    with profiling.from_env():
+        demo_locations()
+        test_api_format()
\ No newline at end of file
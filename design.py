@@ -0,0 +1,169 @@
+"""
+Design parameters for Location Wizard
+Vectorized IS 1893 (Part 1): 2016 seismic coefficients and IS 875 (Part 3):
+2015 design wind speeds over batch lookup results
+"""
+
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# IS 1893 Table 8: importance factor I
+IMPORTANCE_FACTORS = {'important': 1.5, 'residential': 1.2, 'other': 1.0}
+
+# IS 1893 clause 6.4.2: spectrum plateau end (s), 1/T coefficient and the
+# constant beyond 4 s, per soil type (I rock/hard, II medium, III soft)
+SPECTRUM = {
+    1: (0.40, 1.00, 0.25),
+    2: (0.55, 1.36, 0.34),
+    3: (0.67, 1.67, 0.42)
+}
+
+# IS 875 Table 1: risk coefficient k1 by mean design life (years) and Vb
+K1_SPEEDS = np.array([33.0, 39.0, 44.0, 47.0, 50.0, 55.0])
+K1_TABLE = {
+    50: (1.00, 1.00, 1.00, 1.00, 1.00, 1.00),
+    5: (0.82, 0.76, 0.73, 0.71, 0.70, 0.67),
+    25: (0.94, 0.92, 0.91, 0.90, 0.90, 0.89),
+    100: (1.05, 1.06, 1.07, 1.07, 1.08, 1.08)
+}
+
+# IS 875 Table 2: k2 by height (m), one row per terrain category 1-4
+K2_HEIGHTS = np.array([10.0, 15, 20, 30, 50, 100, 150, 200, 250, 300, 350, 400, 450, 500])
+K2_TABLE = np.array([
+    [1.05, 1.09, 1.12, 1.15, 1.20, 1.26, 1.30, 1.32, 1.34, 1.35, 1.37, 1.38, 1.39, 1.40],
+    [1.00, 1.05, 1.07, 1.12, 1.17, 1.24, 1.28, 1.30, 1.32, 1.34, 1.35, 1.36, 1.37, 1.38],
+    [0.91, 0.97, 1.01, 1.06, 1.12, 1.20, 1.24, 1.27, 1.29, 1.31, 1.32, 1.34, 1.35, 1.36],
+    [0.80, 0.80, 0.80, 0.97, 1.10, 1.20, 1.24, 1.27, 1.28, 1.30, 1.31, 1.32, 1.33, 1.34]
+])
+
+# Basic wind speed classes shown in the app: lower bound (m/s), label, marker
+WIND_CLASSES = [
+    (50, "🌪️ Very High - Cyclonic Areas", "🔴"),
+    (47, "🌊 High - Coastal Regions", "🟠"),
+    (44, "🌾 Moderate - Plains & Valleys", "🟡"),
+    (39, "🏔️ Low - Hilly Regions", "🟢"),
+    (0, "🛡️ Very Low - Protected Areas", "🔵")
+]
+
+
+def spectral_acceleration(period: ArrayLike, soil_type: ArrayLike = 2, static: bool = True) -> np.ndarray:
+    """
+    Design acceleration coefficient Sa/g (IS 1893 clause 6.4.2)
+
+    Args:
+        period: Natural period T in seconds
+        soil_type: 1 (rock/hard), 2 (medium) or 3 (soft)
+        static: True for the equivalent static method (plateau down to
+            T = 0), False for the response spectrum method (1 + 15T below 0.1 s)
+    """
+    t = np.asarray(period, dtype=float)
+    soil = np.asarray(soil_type, dtype=np.int64)
+    if np.any((soil < 1) | (soil > 3)):
+        raise ValueError("soil_type must be 1, 2 or 3")
+    plateau_end, coefficient, tail = np.asarray([SPECTRUM[s] for s in (1, 2, 3)])[soil - 1].T
+    sa = np.where(t <= plateau_end, 2.5, np.where(t <= 4.0, coefficient / np.maximum(t, 1e-12), tail))
+    if not static:
+        sa = np.where(t < 0.1, 1 + 15 * t, sa)
+    return sa
+
+def horizontal_coefficient(zone_factor: ArrayLike, importance: ArrayLike = 1.0, response_reduction: ArrayLike = 3.0,
+                           sa_g: ArrayLike = 2.5, period: ArrayLike = None) -> np.ndarray:
+    """
+    Design horizontal seismic coefficient Ah = (Z/2)(I/R)(Sa/g) (IS 1893 clause 6.4.2)
+
+    NaN zone factors (sites outside the seismic layer) give NaN. With a
+    period, structures with T <= 0.1 s get at least Z/2.
+    """
+    z = np.asarray(zone_factor, dtype=float)
+    ah = z / 2 * np.asarray(importance, dtype=float) / np.asarray(response_reduction, dtype=float) * np.asarray(sa_g, dtype=float)
+    if period is not None:
+        ah = np.where(np.asarray(period, dtype=float) <= 0.1, np.maximum(ah, z / 2), ah)
+    return ah
+
+def risk_coefficient(basic_wind_speed: ArrayLike, design_life: int = 50) -> np.ndarray:
+    """k1 (IS 875 Table 1), interpolated between the tabulated wind speeds"""
+    if design_life not in K1_TABLE:
+        raise ValueError(f"No k1 row for a {design_life} year design life, expected one of {sorted(K1_TABLE)}")
+    return np.interp(np.asarray(basic_wind_speed, dtype=float), K1_SPEEDS, K1_TABLE[design_life])
+
+def terrain_factor(height: ArrayLike = 10.0, terrain_category: ArrayLike = 2) -> np.ndarray:
+    """
+    k2 (IS 875 Table 2), linear in height between tabulated values
+
+    Heights below 10 m use the 10 m value; heights above 500 m use the
+    500 m value.
+    """
+    h, category = np.broadcast_arrays(np.clip(np.asarray(height, dtype=float), K2_HEIGHTS[0], K2_HEIGHTS[-1]),
+                                      np.asarray(terrain_category, dtype=np.int64))
+    if np.any((category < 1) | (category > 4)):
+        raise ValueError("terrain_category must be 1, 2, 3 or 4")
+    upper = np.clip(np.searchsorted(K2_HEIGHTS, h), 1, len(K2_HEIGHTS) - 1)
+    lower = upper - 1
+    w = (h - K2_HEIGHTS[lower]) / (K2_HEIGHTS[upper] - K2_HEIGHTS[lower])
+    row = (category - 1) * len(K2_HEIGHTS)
+    values = K2_TABLE.ravel()
+    return values[row + lower] * (1 - w) + values[row + upper] * w
+
+def design_wind_speed(basic_wind_speed: ArrayLike, k1: ArrayLike = 1.0, k2: ArrayLike = 1.0,
+                      k3: ArrayLike = 1.0, k4: ArrayLike = 1.0) -> np.ndarray:
+    """Vz = Vb k1 k2 k3 k4 (IS 875 clause 6.3); NaN Vb gives NaN"""
+    return np.asarray(basic_wind_speed, dtype=float) * k1 * k2 * k3 * k4
+
+def wind_class_index(basic_wind_speed: ArrayLike) -> np.ndarray:
+    """Index into WIND_CLASSES for each wind speed, -1 where it is missing (NaN)"""
+    vb = np.asarray(basic_wind_speed, dtype=float)
+    if np.any(vb < 0):
+        raise ValueError("basic_wind_speed must not be negative")
+    bounds = np.array([bound for bound, _, _ in WIND_CLASSES[::-1]], dtype=float)
+    return np.where(np.isnan(vb), -1, len(WIND_CLASSES) - np.digitize(vb, bounds))
+
+def wind_class(basic_wind_speed: float):
+    """(label, marker) of the wind class for one speed, or None when it is missing (NaN)"""
+    index = int(wind_class_index(basic_wind_speed))
+    if index < 0:
+        return None
+    _, label, marker = WIND_CLASSES[index]
+    return label, marker
+
+def result_columns(results: List[Dict], fields: Sequence[str] = ('zone_factor', 'basic_wind_speed')) -> Dict[str, np.ndarray]:
+    """Float columns of lookup results, with NaN where a value is missing"""
+    return {f: np.fromiter((np.nan if r.get(f) is None else r[f] for r in results), dtype=float, count=len(results))
+            for f in fields}
+
+def design_parameters(results, importance: ArrayLike = 1.0, response_reduction: ArrayLike = 3.0,
+                      sa_g: ArrayLike = 2.5, period: ArrayLike = None, height: ArrayLike = 10.0,
+                      terrain_category: ArrayLike = 2, k3: ArrayLike = 1.0, k4: ArrayLike = 1.0,
+                      design_life: int = 50) -> Dict[str, np.ndarray]:
+    """
+    Seismic and wind design columns for a batch of sites
+
+    Args:
+        results: Output of get_location_properties_batch(), or a dict of
+            'zone_factor' and 'basic_wind_speed' arrays
+        importance, response_reduction, sa_g, period: IS 1893 inputs, scalars
+            or per-site arrays
+        height, terrain_category, k3, k4: IS 875 inputs, scalars or per-site
+            arrays
+        design_life: Mean design life in years selecting the k1 row
+
+    Returns:
+        Dict of arrays: zone_factor, Ah, basic_wind_speed, k1, k2, k3, k4, Vz
+    """
+    columns = results if isinstance(results, dict) else result_columns(results)
+    z = np.asarray(columns['zone_factor'], dtype=float)
+    vb = np.asarray(columns['basic_wind_speed'], dtype=float)
+    k1 = risk_coefficient(vb, design_life)
+    k2 = terrain_factor(height, terrain_category)
+    return {
+        'zone_factor': z,
+        'Ah': horizontal_coefficient(z, importance, response_reduction, sa_g, period),
+        'basic_wind_speed': vb,
+        'k1': k1,
+        'k2': np.broadcast_to(k2, vb.shape),
+        'k3': np.broadcast_to(np.asarray(k3, dtype=float), vb.shape),
+        'k4': np.broadcast_to(np.asarray(k4, dtype=float), vb.shape),
+        'Vz': design_wind_speed(vb, k1, k2, k3, k4)
+    }
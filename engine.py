@@ -0,0 +1,475 @@
+"""
+Shared lookup engine for Location Wizard
+One result schema and zone factor table for core.py and standalone_demo.py,
+with point-in-polygon backends selected by what is installed
+"""
+
+import importlib.util
+import json
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import metrics
+from geometry import feature_rings, point_in_rings, points_in_polygon_vectorized, polygon_edges, rings_bbox
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Seismic zone factors from IS 1893
+ZONE_FACTORS = {
+    "II": 0.10,
+    "III": 0.16,
+    "IV": 0.24,
+    "V": 0.36
+}
+
+# Bundled layers, in the order they are applied to a result
+LAYER_FILES = {
+    'seismic': 'seismic_zones.geojson',
+    'wind': 'wind_zones.geojson',
+    'admin': 'admin_boundaries.geojson'
+}
+
+# Result fields set by each layer in apply_layer()
+LAYER_FIELDS = {
+    'seismic': ('seismic_zone', 'zone_factor'),
+    'wind': ('basic_wind_speed',),
+    'admin': ('place_name', 'state')
+}
+
+# Layer name of a prebuilt multi-layer overlay (see overlay.py)
+OVERLAY = 'overlay'
+
+def empty_result(lat: float, lon: float) -> Dict:
+    """Result dict for a location outside every layer"""
+    return {
+        "lat": lat,
+        "lon": lon,
+        "seismic_zone": "Unknown",
+        "zone_factor": None,
+        "basic_wind_speed": None,
+        "place_name": "Unknown",
+        "state": "Unknown"
+    }
+
+def apply_layer(result: Dict, layer_name: str, properties: Dict) -> Dict:
+    """Copy the attributes of a matched feature into a result dict"""
+    if layer_name == 'seismic':
+        zone = properties.get('zone', 'Unknown')
+        result["seismic_zone"] = zone
+        result["zone_factor"] = ZONE_FACTORS.get(zone)
+    elif layer_name == 'wind':
+        wind_speed = properties.get('Vb')
+        if wind_speed is not None:
+            result["basic_wind_speed"] = float(wind_speed)
+    elif layer_name == 'admin':
+        result["place_name"] = properties.get('NAME') or 'Unknown'
+        result["state"] = properties.get('STATE') or 'Unknown'
+    elif layer_name == OVERLAY:
+        # Overlay cells carry layer name -> properties for every layer
+        for name, layer_properties in properties.items():
+            apply_layer(result, name, layer_properties)
+    else:
+        # Additional hazard layers (flood, cyclone, ...) are kept whole
+        result[layer_name] = dict(properties)
+    return result
+
+
+class Layer:
+    """Polygon features of one zone layer, kept in file order"""
+
+    def __init__(self, name: str, features: Sequence[Dict]):
+        self.name = name
+        self.properties = []
+        self.geometries = []
+        self.rings = []
+        self.bboxes = []
+        for feature in features:
+            geometry = feature.get('geometry') or {}
+            rings = feature_rings(geometry)
+            if not rings:
+                continue
+            self.properties.append(dict(feature.get('properties') or {}))
+            self.geometries.append(geometry)
+            self.rings.append(rings)
+            self.bboxes.append(rings_bbox(rings))
+
+    def __len__(self):
+        return len(self.properties)
+
+    @classmethod
+    def from_geojson(cls, name: str, collection: Dict) -> 'Layer':
+        """Build a layer from a GeoJSON FeatureCollection (or __geo_interface__)"""
+        return cls(name, collection.get('features', []))
+
+    @classmethod
+    def from_file(cls, name: str, path: str) -> 'Layer':
+        """Build a layer from a GeoJSON file in WGS84"""
+        with open(path, 'r') as f:
+            return cls.from_geojson(name, json.load(f))
+
+def load_layers(data_dir: Optional[str] = None) -> Dict[str, Layer]:
+    """Load the bundled GeoJSON layers that exist in data_dir"""
+    data_dir = data_dir or DATA_DIR
+    layers = {}
+    for name, filename in LAYER_FILES.items():
+        path = os.path.join(data_dir, filename)
+        if os.path.exists(path):
+            layers[name] = Layer.from_file(name, path)
+    return layers
+
+
+class PythonBackend:
+    """Ray casting with a bounding-box prefilter, standard library only"""
+
+    name = 'python'
+    requires = None
+
+    def __init__(self, layer: Layer):
+        self.layer = layer
+
+    def candidates(self, lon: float, lat: float) -> List[int]:
+        """Features whose bounding box holds the point, in feature order"""
+        return [i for i, (min_x, min_y, max_x, max_y) in enumerate(self.layer.bboxes)
+                if min_x <= lon <= max_x and min_y <= lat <= max_y]
+
+    def contains(self, i: int, lon: float, lat: float) -> bool:
+        """Exact containment test against feature i"""
+        return point_in_rings(lat, lon, self.layer.rings[i])
+
+    def locate(self, lon: float, lat: float) -> Optional[int]:
+        """Index of the first feature containing the point, or None"""
+        rings = self.layer.rings
+        for i, (min_x, min_y, max_x, max_y) in enumerate(self.layer.bboxes):
+            if min_x <= lon <= max_x and min_y <= lat <= max_y and point_in_rings(lat, lon, rings[i]):
+                return i
+        return None
+
+    def locate_many(self, lons: Sequence[float], lats: Sequence[float]) -> List[Optional[int]]:
+        """locate() over a batch of points"""
+        return [self.locate(float(lon), float(lat)) for lon, lat in zip(lons, lats)]
+
+    def update(self, layer: Layer, sources: Sequence[Optional[int]]) -> 'PythonBackend':
+        """
+        Backend over a changed layer, reusing per-feature work of this one
+
+        Args:
+            layer: The layer after the change
+            sources: Per feature of layer, the index of the identical feature
+                in the old layer, or None for added and edited features
+        """
+        return type(self)(layer)
+
+
+class GridBackend(PythonBackend):
+    """Precomputed uniform grid of candidate features over the layer extent"""
+
+    name = 'grid'
+    requires = None
+
+    def __init__(self, layer: Layer, cells_per_side: Optional[int] = None):
+        super().__init__(layer)
+        self._cells = []
+        if not len(layer):
+            return
+        if cells_per_side is None:
+            cells_per_side = min(512, max(8, 2 * int(math.sqrt(len(layer)))))
+        self._n = cells_per_side
+        self._min_x = min(b[0] for b in layer.bboxes)
+        self._min_y = min(b[1] for b in layer.bboxes)
+        self._dx = (max(b[2] for b in layer.bboxes) - self._min_x) / self._n or 1.0
+        self._dy = (max(b[3] for b in layer.bboxes) - self._min_y) / self._n or 1.0
+
+        # Candidates are appended in feature order so the first hit is the first match
+        self._cells = [[] for _ in range(self._n * self._n)]
+        for i, (min_x, min_y, max_x, max_y) in enumerate(layer.bboxes):
+            ix0, iy0 = self._cell_xy(min_x, min_y)
+            ix1, iy1 = self._cell_xy(max_x, max_y)
+            for iy in range(iy0, iy1 + 1):
+                for ix in range(ix0, ix1 + 1):
+                    self._cells[iy * self._n + ix].append(i)
+
+    def _cell_xy(self, lon: float, lat: float):
+        ix = min(self._n - 1, max(0, int((lon - self._min_x) / self._dx)))
+        iy = min(self._n - 1, max(0, int((lat - self._min_y) / self._dy)))
+        return ix, iy
+
+    def _cell(self, lon: float, lat: float) -> List[int]:
+        """Features whose bounding box overlaps the grid cell of the point"""
+        if not self._cells:
+            return []
+        if not (self._min_x <= lon <= self._min_x + self._n * self._dx
+                and self._min_y <= lat <= self._min_y + self._n * self._dy):
+            return []
+        ix, iy = self._cell_xy(lon, lat)
+        return self._cells[iy * self._n + ix]
+
+    def candidates(self, lon: float, lat: float) -> List[int]:
+        bboxes = self.layer.bboxes
+        return [i for i in self._cell(lon, lat)
+                if bboxes[i][0] <= lon <= bboxes[i][2] and bboxes[i][1] <= lat <= bboxes[i][3]]
+
+    def locate(self, lon: float, lat: float) -> Optional[int]:
+        rings = self.layer.rings
+        bboxes = self.layer.bboxes
+        for i in self._cell(lon, lat):
+            min_x, min_y, max_x, max_y = bboxes[i]
+            if min_x <= lon <= max_x and min_y <= lat <= max_y and point_in_rings(lat, lon, rings[i]):
+                return i
+        return None
+
+    def update(self, layer: Layer, sources: Sequence[Optional[int]]) -> 'GridBackend':
+        """Only cells under changed features are rebuilt while the grid extent still fits"""
+        if not self._cells or not len(layer):
+            return GridBackend(layer)
+        max_x, max_y = self._min_x + self._n * self._dx, self._min_y + self._n * self._dy
+        if any(b[0] < self._min_x or b[1] < self._min_y or b[2] > max_x or b[3] > max_y for b in layer.bboxes):
+            return GridBackend(layer, self._n)
+
+        grid = object.__new__(GridBackend)
+        grid.__dict__.update(self.__dict__)
+        grid.layer = layer
+        moved = {i: j for j, i in enumerate(sources) if i is not None}
+        if all(i == j for i, j in moved.items()):
+            # Indexes did not shift: only cells under removed features need filtering
+            grid._cells = list(self._cells)
+            for i, bbox in enumerate(self.layer.bboxes):
+                if i not in moved:
+                    for cell in self._bbox_cells(bbox):
+                        grid._cells[cell] = [k for k in grid._cells[cell] if k in moved]
+        else:
+            grid._cells = [[moved[i] for i in cell if i in moved] for cell in self._cells]
+        added = {}
+        for j, i in enumerate(sources):
+            if i is None:
+                for cell in self._bbox_cells(layer.bboxes[j]):
+                    added.setdefault(cell, []).append(j)
+        for cell, features in added.items():
+            grid._cells[cell] = sorted(grid._cells[cell] + features)
+        return grid
+
+    def _bbox_cells(self, bbox) -> List[int]:
+        ix0, iy0 = self._cell_xy(bbox[0], bbox[1])
+        ix1, iy1 = self._cell_xy(bbox[2], bbox[3])
+        return [iy * self._n + ix for iy in range(iy0, iy1 + 1) for ix in range(ix0, ix1 + 1)]
+
+
+class NumpyBackend:
+    """Vectorized ray casting over whole batches of points, JIT-compiled when numba is installed"""
+
+    name = 'numpy'
+    requires = 'numpy'
+
+    def __init__(self, layer: Layer):
+        import numpy as np
+        self._np = np
+        self.layer = layer
+        self._bboxes = np.asarray(layer.bboxes, dtype=float).reshape(-1, 4)
+        self._edges = [polygon_edges(rings) for rings in layer.rings]
+
+    def locate_many(self, lons: Sequence[float], lats: Sequence[float]) -> List[Optional[int]]:
+        np = self._np
+        x = np.asarray(lons, dtype=float)
+        y = np.asarray(lats, dtype=float)
+        found = np.full(len(x), -1, dtype=np.int64)
+        for i, (min_x, min_y, max_x, max_y) in enumerate(self._bboxes):
+            pending = np.nonzero((found < 0) & (x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y))[0]
+            if len(pending):
+                hit = points_in_polygon_vectorized(y[pending], x[pending], self._edges[i])
+                found[pending[hit]] = i
+        return [None if i < 0 else int(i) for i in found]
+
+    def candidates(self, lon: float, lat: float) -> List[int]:
+        b = self._bboxes
+        mask = (b[:, 0] <= lon) & (lon <= b[:, 2]) & (b[:, 1] <= lat) & (lat <= b[:, 3])
+        return self._np.nonzero(mask)[0].tolist()
+
+    def contains(self, i: int, lon: float, lat: float) -> bool:
+        return bool(points_in_polygon_vectorized([lat], [lon], self._edges[i])[0])
+
+    def locate(self, lon: float, lat: float) -> Optional[int]:
+        return self.locate_many([lon], [lat])[0]
+
+    def update(self, layer: Layer, sources: Sequence[Optional[int]]) -> 'NumpyBackend':
+        """Edge arrays of unchanged features are reused"""
+        backend = object.__new__(NumpyBackend)
+        backend._np = self._np
+        backend.layer = layer
+        backend._bboxes = self._np.asarray(layer.bboxes, dtype=float).reshape(-1, 4)
+        backend._edges = [polygon_edges(rings) if i is None else self._edges[i]
+                          for rings, i in zip(layer.rings, sources)]
+        return backend
+
+
+class ShapelyBackend:
+    """GEOS containment through a shapely STRtree"""
+
+    name = 'shapely'
+    requires = 'shapely'
+
+    def __init__(self, layer: Layer):
+        import numpy as np
+        import shapely
+        from shapely.geometry import shape
+        self._np = np
+        self._shapely = shapely
+        self.layer = layer
+        self.geometries = [shape(geometry) for geometry in layer.geometries]
+        self._tree = shapely.STRtree(self.geometries)
+
+    def candidates(self, lon: float, lat: float) -> List[int]:
+        return sorted(self._tree.query(self._shapely.Point(lon, lat)).tolist())
+
+    def contains(self, i: int, lon: float, lat: float) -> bool:
+        return self.geometries[i].contains(self._shapely.Point(lon, lat))
+
+    def locate(self, lon: float, lat: float) -> Optional[int]:
+        hits = self._tree.query(self._shapely.Point(lon, lat), predicate='within')
+        return int(hits.min()) if len(hits) else None
+
+    def locate_many(self, lons: Sequence[float], lats: Sequence[float]) -> List[Optional[int]]:
+        np = self._np
+        points = self._shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        point_idx, feature_idx = self._tree.query(points, predicate='within')
+        found = np.full(len(points), len(self.layer), dtype=np.int64)
+        np.minimum.at(found, point_idx, feature_idx)
+        return [None if i == len(self.layer) else int(i) for i in found]
+
+    def update(self, layer: Layer, sources: Sequence[Optional[int]]) -> 'ShapelyBackend':
+        """
+        Geometries of unchanged features are reused; STRtrees are immutable,
+        so the tree is bulk-loaded again over them
+        """
+        from shapely.geometry import shape
+        backend = object.__new__(ShapelyBackend)
+        backend._np = self._np
+        backend._shapely = self._shapely
+        backend.layer = layer
+        backend.geometries = [shape(geometry) if i is None else self.geometries[i]
+                              for geometry, i in zip(layer.geometries, sources)]
+        backend._tree = self._shapely.STRtree(backend.geometries)
+        return backend
+
+
+BACKENDS = {
+    'shapely': ShapelyBackend,
+    'numpy': NumpyBackend,
+    'grid': GridBackend,
+    'python': PythonBackend
+}
+
+def available_backends() -> List[str]:
+    """Backend names usable in this environment, most preferred first"""
+    return [name for name, backend in BACKENDS.items()
+            if backend.requires is None or importlib.util.find_spec(backend.requires) is not None]
+
+
+def _locate_timed(index, lon: float, lat: float, layer: str) -> Optional[int]:
+    """locate() split into timed index query and exact test stages"""
+    with metrics.timer('index_query', layer=layer):
+        candidates = index.candidates(lon, lat)
+    with metrics.timer('exact_test', layer=layer):
+        for i in candidates:
+            if index.contains(i, lon, lat):
+                return i
+    return None
+
+
+class LookupEngine:
+    """
+    Zone lookup over a set of layers with one backend
+
+    Args:
+        layers: Layer name -> Layer, as returned by load_layers()
+        backend: Backend name; defaults to $LOCATION_WIZARD_BACKEND or the
+            first entry of available_backends()
+        overlay: True to intersect all layers into one overlay Layer
+            (needs shapely), or a prebuilt overlay Layer; lookups then probe
+            a single index however many layers there are
+    """
+
+    def __init__(self, layers: Dict[str, Layer], backend: Optional[str] = None, overlay=False):
+        backend = backend or os.environ.get('LOCATION_WIZARD_BACKEND') or available_backends()[0]
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {sorted(BACKENDS)}")
+        self.backend = backend
+        self.layers = layers
+        with metrics.timer('engine_build', backend=backend):
+            if overlay is True:
+                from overlay import build_overlay
+                overlay = build_overlay(layers)
+            sources = {OVERLAY: overlay} if overlay is not False and overlay is not None else layers
+            self._indexes = {name: BACKENDS[backend](layer) for name, layer in sources.items()}
+
+    def update(self, layers: Dict[str, Layer], sources: Dict[str, Sequence[Optional[int]]]) -> 'LookupEngine':
+        """
+        Engine over changed layers that reuses this one's indexes
+
+        Args:
+            layers: Layer name -> Layer after the change
+            sources: For each changed layer, the index of the identical old
+                feature per new feature (None for added and edited ones), as
+                in LayerDiff.sources; layers not listed must be unchanged
+
+        Returns:
+            A new engine; this one keeps answering from the old layers
+        """
+        engine = object.__new__(LookupEngine)
+        engine.backend = self.backend
+        engine.layers = layers
+        with metrics.timer('engine_build', backend=self.backend):
+            if OVERLAY in self._indexes:
+                # Overlay cells span every layer, so the overlay is rebuilt whole
+                from overlay import build_overlay
+                engine._indexes = {OVERLAY: BACKENDS[self.backend](build_overlay(layers))}
+            else:
+                engine._indexes = {}
+                for name, layer in layers.items():
+                    index = self._indexes.get(name)
+                    if index is None:
+                        engine._indexes[name] = BACKENDS[self.backend](layer)
+                    elif name in sources:
+                        engine._indexes[name] = index.update(layer, sources[name])
+                    else:
+                        engine._indexes[name] = index
+        return engine
+
+    def lookup(self, lat: float, lon: float) -> Dict:
+        """Seismic, wind and admin properties for one location"""
+        result = empty_result(lat, lon)
+        timed = metrics.enabled()
+        for name, index in self._indexes.items():
+            i = _locate_timed(index, lon, lat, name) if timed else index.locate(lon, lat)
+            if i is not None:
+                apply_layer(result, name, index.layer.properties[i])
+        return result
+
+    def locate_many(self, lats: Sequence[float], lons: Sequence[float]) -> Dict[str, Tuple[Layer, List[Optional[int]]]]:
+        """Per index (layer, or the overlay), its Layer and the matching feature of each point"""
+        located = {}
+        for name, index in self._indexes.items():
+            with metrics.timer('batch_query', layer=name):
+                located[name] = (index.layer, index.locate_many(lons, lats))
+        return located
+
+    def lookup_many(self, lats: Sequence[float], lons: Sequence[float]) -> List[Dict]:
+        """lookup() over a batch, one backend pass per layer"""
+        located = self.locate_many(lats, lons)
+        with metrics.timer('materialize'):
+            results = [empty_result(float(lat), float(lon)) for lat, lon in zip(lats, lons)]
+            for name, (layer, found) in located.items():
+                properties = layer.properties
+                for result, i in zip(results, found):
+                    if i is not None:
+                        apply_layer(result, name, properties[i])
+        return results
+
+# Engine over the bundled data, built on first use
+_engine = None
+
+def get_engine() -> LookupEngine:
+    """Shared engine over the bundled GeoJSON layers"""
+    global _engine
+    if _engine is None:
+        _engine = LookupEngine(load_layers())
+    return _engine
@@ -0,0 +1,152 @@
+"""
+Offline reverse geocoding for Location Wizard
+Structured addresses from the admin layer plus the nearest settlements in a
+prebuilt grid index, with no network access
+
+Nominatim (core.get_reverse_geocoding) is optional enrichment on top.
+"""
+
+import csv
+import math
+import os
+from typing import Dict, List, Optional, Sequence
+
+from engine import DATA_DIR, LookupEngine
+from geometry import EARTH_RADIUS_KM, haversine_km
+
+SETTLEMENTS_FILE = 'settlements.csv'
+
+# Grid cell size (degrees) of the settlement index
+CELL_SIZE = 0.25
+
+# Beyond this distance (km) the locality is reported as "near <name>"
+LOCALITY_RADIUS_KM = 5.0
+
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+
+def load_settlements(path: Optional[str] = None) -> List[Dict]:
+    """
+    Settlements from a CSV with name, lat, lon and optional type and state
+    columns (e.g. SoI or Census village/town points); the bundled sample by
+    default
+    """
+    path = path or os.path.join(DATA_DIR, SETTLEMENTS_FILE)
+    with open(path, newline='', encoding='utf-8') as f:
+        return [{'name': row['name'], 'type': row.get('type') or 'settlement',
+                 'lat': float(row['lat']), 'lon': float(row['lon']), 'state': row.get('state') or 'Unknown'}
+                for row in csv.DictReader(f)]
+
+
+class SettlementIndex:
+    """
+    k-nearest settlement search over a uniform lat/lon grid
+
+    Rings of cells around the query are searched outward until no unvisited
+    cell can hold anything closer than the k-th hit.
+
+    Args:
+        settlements: Dicts with name, lat, lon (and optionally type, state)
+        cell_size: Grid cell size in degrees
+    """
+
+    def __init__(self, settlements: Sequence[Dict], cell_size: float = CELL_SIZE):
+        self.settlements = list(settlements)
+        self.cell_size = cell_size
+        self.cells = {}
+        for i, s in enumerate(self.settlements):
+            self.cells.setdefault(self._cell(s['lat'], s['lon']), []).append(i)
+        if self.cells:
+            rows = [r for r, _ in self.cells]
+            cols = [c for _, c in self.cells]
+            self._extent = (min(rows), min(cols), max(rows), max(cols))
+
+    def _cell(self, lat: float, lon: float):
+        return int(math.floor(lat / self.cell_size)), int(math.floor(lon / self.cell_size))
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Dict]:
+        """The k nearest settlements with distance_km, closest first; none for NaN or inf"""
+        if not self.cells or k < 1 or not (math.isfinite(lat) and math.isfinite(lon)):
+            return []
+        row, col = self._cell(lat, lon)
+        min_row, min_col, max_row, max_col = self._extent
+        # Rings needed to reach the far side of the occupied cells
+        last_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        found = []
+        for ring in range(last_ring + 1):
+            for r in range(row - ring, row + ring + 1):
+                # Whole top and bottom rows, only the two side cells between
+                step = 1 if r in (row - ring, row + ring) else 2 * ring
+                for c in range(col - ring, col + ring + 1, step):
+                    for i in self.cells.get((r, c), ()):
+                        s = self.settlements[i]
+                        found.append((haversine_km(lat, lon, s['lat'], s['lon']), i))
+            if len(found) >= k:
+                found.sort()
+                # Anything beyond this ring is at least ring cells away; a
+                # degree of longitude is shortest at the highest latitude
+                reach = ring * self.cell_size
+                cos_lat = math.cos(math.radians(min(90.0, abs(lat) + reach + self.cell_size)))
+                if found[k - 1][0] <= reach * KM_PER_DEGREE * max(cos_lat, 0.0):
+                    break
+        found.sort()
+        return [dict(self.settlements[i], distance_km=d) for d, i in found[:k]]
+
+
+class ReverseGeocoder:
+    """
+    Offline reverse geocoder
+
+    Args:
+        engine: LookupEngine whose 'admin' layer gives district and state
+        settlements: Settlement dicts; load_settlements() by default
+        cell_size: Grid cell size of the settlement index
+    """
+
+    def __init__(self, engine: LookupEngine, settlements: Optional[Sequence[Dict]] = None,
+                 cell_size: float = CELL_SIZE):
+        self.engine = engine
+        self._admin = LookupEngine({'admin': engine.layers['admin']} if 'admin' in engine.layers else {},
+                                   backend=engine.backend)
+        self.index = SettlementIndex(load_settlements() if settlements is None else settlements, cell_size)
+
+    def reverse(self, lat: float, lon: float, k: int = 1) -> Dict:
+        """Structured address of one point, see reverse_many()"""
+        return self.reverse_many([lat], [lon], k)[0]
+
+    def reverse_many(self, lats: Sequence[float], lons: Sequence[float], k: int = 1) -> List[Dict]:
+        """
+        Structured addresses for many points
+
+        Returns:
+            Per point a dict with locality, locality_type, locality_distance_km
+            (nearest settlement), district and state (admin polygon),
+            display_name and nearby (the k nearest settlements)
+        """
+        addresses = []
+        for lat, lon, result in zip(lats, lons, self._admin.lookup_many(lats, lons)):
+            nearby = self.index.nearest(float(lat), float(lon), k)
+            locality = nearby[0] if nearby else None
+            address = {
+                'locality': locality['name'] if locality else None,
+                'locality_type': locality['type'] if locality else None,
+                'locality_distance_km': round(locality['distance_km'], 3) if locality else None,
+                'district': result['place_name'],
+                'state': result['state'],
+                'nearby': nearby
+            }
+            address['display_name'] = display_name(address)
+            addresses.append(address)
+        return addresses
+
+
+def display_name(address: Dict) -> str:
+    """'Locality, District, State' without unknown or repeated parts"""
+    parts = []
+    if address.get('locality'):
+        near = address.get('locality_distance_km') or 0.0
+        parts.append(address['locality'] if near <= LOCALITY_RADIUS_KM else f"near {address['locality']}")
+    for part in (address.get('district'), address.get('state')):
+        if part and part != 'Unknown' and part not in parts:
+            parts.append(part)
+    return ', '.join(parts) or 'Unknown'
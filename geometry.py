@@ -0,0 +1,178 @@
+"""
+Geometry helpers for Location Wizard
+Ray casting point-in-polygon tests shared by the lookup backends
+"""
+
+import math
+import os
+from typing import List, Optional, Tuple
+
+# Mean Earth radius used for great-circle distances
+EARTH_RADIUS_KM = 6371
+
+# Compiled numba kernel, built on first use
+_jit_kernel = None
+
+def point_in_polygon_simple(lat, lon, polygon_coords):
+    """
+    Simple point-in-polygon test using ray casting algorithm
+    polygon_coords: list of [lon, lat] coordinate pairs
+    """
+    x, y = lon, lat
+    n = len(polygon_coords)
+    inside = False
+
+    p1x, p1y = polygon_coords[0]
+    for i in range(1, n + 1):
+        p2x, p2y = polygon_coords[i % n]
+        if y > min(p1y, p2y):
+            if y <= max(p1y, p2y):
+                if x <= max(p1x, p2x):
+                    if p1y != p2y:
+                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                    if p1x == p2x or x <= xinters:
+                        inside = not inside
+        p1x, p1y = p2x, p2y
+
+    return inside
+
+def feature_rings(geometry: dict) -> List[list]:
+    """
+    Flatten a GeoJSON Polygon or MultiPolygon into a list of rings
+
+    Exterior rings and holes are returned together; the even-odd rule in
+    point_in_rings() makes holes and separate parts work without tracking
+    which ring is which.
+    """
+    geom_type = geometry.get('type')
+    coords = geometry.get('coordinates') or []
+    if geom_type == 'Polygon':
+        polygons = [coords]
+    elif geom_type == 'MultiPolygon':
+        polygons = coords
+    else:
+        return []
+    return [[(float(x), float(y)) for x, y, *_ in ring] for polygon in polygons for ring in polygon if ring]
+
+def rings_bbox(rings: List[list]) -> Tuple[float, float, float, float]:
+    """Bounding box (min_lon, min_lat, max_lon, max_lat) of a list of rings"""
+    xs = [x for ring in rings for x, _ in ring]
+    ys = [y for ring in rings for _, y in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def point_in_rings(lat: float, lon: float, rings: List[list]) -> bool:
+    """Even-odd containment test over all rings of a feature"""
+    inside = False
+    for ring in rings:
+        if point_in_polygon_simple(lat, lon, ring):
+            inside = not inside
+    return inside
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km between two lat/lon points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+def segment_intersections(ax: float, ay: float, bx: float, by: float, ring: list) -> List[float]:
+    """
+    Parameters t in [0, 1] where segment a -> b crosses the edges of a ring
+
+    Collinear overlaps are skipped; the crossings at their ends come from the
+    neighbouring edges.
+    """
+    dx, dy = bx - ax, by - ay
+    hits = []
+    for (px, py), (qx, qy) in zip(ring, ring[1:] + ring[:1]):
+        ex, ey = qx - px, qy - py
+        denom = dx * ey - dy * ex
+        if denom == 0:
+            continue
+        t = ((px - ax) * ey - (py - ay) * ex) / denom
+        u = ((px - ax) * dy - (py - ay) * dx) / denom
+        if 0.0 <= t <= 1.0 and 0.0 <= u <= 1.0:
+            hits.append(t)
+    return hits
+
+def polygon_edges(rings: List[list]):
+    """
+    Edge arrays of a feature for points_in_polygon_vectorized()
+
+    Returns (x1, y1, dx, dy, y_min, y_max) float arrays with one entry per
+    non-horizontal edge; horizontal edges never change the crossing count.
+    """
+    import numpy as np
+    x1, y1, x2, y2 = [], [], [], []
+    for ring in rings:
+        for (ax, ay), (bx, by) in zip(ring, ring[1:] + ring[:1]):
+            if ay != by:
+                x1.append(ax)
+                y1.append(ay)
+                x2.append(bx)
+                y2.append(by)
+    x1, y1, x2, y2 = (np.asarray(a, dtype=float) for a in (x1, y1, x2, y2))
+    return x1, y1, x2 - x1, y2 - y1, np.minimum(y1, y2), np.maximum(y1, y2)
+
+def jit_available() -> bool:
+    """True if numba is installed and not disabled with LOCATION_WIZARD_JIT=0"""
+    if os.environ.get('LOCATION_WIZARD_JIT', '1') == '0':
+        return False
+    import importlib.util
+    return importlib.util.find_spec('numba') is not None
+
+def _get_jit_kernel():
+    """Compile the numba band loop once per process"""
+    global _jit_kernel
+    if _jit_kernel is None:
+        import numba
+
+        @numba.njit(nogil=True)
+        def kernel(xs, ys, x1, y1, dx, dy, starts, stops, parity):
+            for j in range(x1.shape[0]):
+                for i in range(starts[j], stops[j]):
+                    if xs[i] <= (ys[i] - y1[j]) * dx[j] / dy[j] + x1[j]:
+                        parity[i] = not parity[i]
+
+        _jit_kernel = kernel
+    return _jit_kernel
+
+def points_in_polygon_vectorized(lats, lons, edges, use_jit: Optional[bool] = None):
+    """
+    Batch version of point_in_polygon_simple() over arrays of points
+
+    Args:
+        lats: Array of latitudes
+        lons: Array of longitudes
+        edges: Edge arrays from polygon_edges()
+        use_jit: Use the numba kernel; defaults to jit_available()
+
+    Returns:
+        Boolean NumPy array, True where the point is inside
+    """
+    import numpy as np
+    x = np.ascontiguousarray(lons, dtype=float)
+    y = np.ascontiguousarray(lats, dtype=float)
+    inside = np.zeros(len(x), dtype=bool)
+    x1, y1, dx, dy, y_min, y_max = edges
+    if not len(x) or not len(x1):
+        return inside
+
+    # Sort points by latitude so each edge only visits the points in its
+    # (y_min, y_max] band; same crossing rule as point_in_polygon_simple()
+    order = np.argsort(y, kind='stable')
+    xs = x[order]
+    ys = y[order]
+    starts = np.searchsorted(ys, y_min, side='right')
+    stops = np.searchsorted(ys, y_max, side='right')
+    parity = np.zeros(len(x), dtype=bool)
+
+    if use_jit is None:
+        use_jit = jit_available()
+    if use_jit:
+        _get_jit_kernel()(xs, ys, x1, y1, dx, dy, starts, stops, parity)
+    else:
+        for j in np.nonzero(stops > starts)[0]:
+            a, b = starts[j], stops[j]
+            parity[a:b] ^= xs[a:b] <= (ys[a:b] - y1[j]) * dx[j] / dy[j] + x1[j]
+    inside[order] = parity
+    return inside
@@ -0,0 +1,297 @@
+"""
+Incremental layer updates for Location Wizard
+Compares two versions of a layer feature by feature, so a revised zone map
+only rebuilds the index parts, cached results and grid tiles it touches
+
+Usage: python layer_diff.py OLD_DIR NEW_DIR [--changelog FILE] [--grid PATH ...]
+"""
+
+import argparse
+import difflib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from engine import LAYER_FILES, Layer, LookupEngine, load_layers
+from geometry import feature_rings, point_in_rings, rings_bbox
+
+
+def feature_key(geometry: Dict, properties: Dict) -> Tuple:
+    """
+    Cheap matching key of a feature: attributes, geometry type and first vertex
+
+    Features with equal keys are compared in full before they count as unchanged.
+    """
+    coordinates = geometry.get('coordinates')
+    while coordinates and isinstance(coordinates[0], (list, tuple)):
+        coordinates = coordinates[0]
+    return (json.dumps(properties, sort_keys=True, default=str), geometry.get('type'),
+            tuple(coordinates or ()))
+
+
+def _bbox_union(a, b):
+    if a is None:
+        return b
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def _bboxes_overlap(a, b) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class LayerDiff:
+    """
+    Feature-level changes between two versions of a layer
+
+    Features are matched in order by geometry and attributes, so a result
+    can only differ where an added, removed or edited feature lies:
+    a point outside all of them hits the same first-matching feature in
+    both versions.
+
+    Attributes:
+        sources: Per new feature, the index of the identical old feature,
+            or None for added and edited ones (see LookupEngine.update())
+        changes: Dicts with change ('added', 'removed' or 'modified'),
+            old_index, new_index, bbox and attributes_changed
+    """
+
+    def __init__(self, old: Layer, new: Layer, old_keys: Optional[List[Tuple]] = None,
+                 new_keys: Optional[List[Tuple]] = None):
+        self.name = new.name
+        self.old = old
+        self.new = new
+        old_keys = old_keys or [feature_key(g, p) for g, p in zip(old.geometries, old.properties)]
+        new_keys = new_keys or [feature_key(g, p) for g, p in zip(new.geometries, new.properties)]
+        self.sources = [None] * len(new)
+        self.changes = []
+        self._regions = None
+        matcher = difflib.SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+        for tag, i0, i1, j0, j1 in matcher.get_opcodes():
+            # Features pair up in order; the rest of a replaced run was added or removed.
+            # Equal keys are only a hint, e.g. 47 and 47.0 differ as text
+            paired = min(i1 - i0, j1 - j0)
+            for i, j in zip(range(i0, i0 + paired), range(j0, j0 + paired)):
+                if old.geometries[i] == new.geometries[j] and old.properties[i] == new.properties[j]:
+                    self.sources[j] = i
+                else:
+                    self._change('modified', i, j)
+            for i in range(i0 + paired, i1):
+                self._change('removed', i, None)
+            for j in range(j0 + paired, j1):
+                self._change('added', None, j)
+
+    def _change(self, change: str, i: Optional[int], j: Optional[int]):
+        bbox = None
+        if i is not None:
+            bbox = _bbox_union(bbox, self.old.bboxes[i])
+        if j is not None:
+            bbox = _bbox_union(bbox, self.new.bboxes[j])
+        attributes_changed = change != 'modified' or self.old.properties[i] != self.new.properties[j]
+        self.changes.append({'change': change, 'old_index': i, 'new_index': j, 'bbox': bbox,
+                             'attributes_changed': attributes_changed})
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    @property
+    def bboxes(self) -> List[Tuple[float, float, float, float]]:
+        """Bounding box of each change"""
+        return [c['bbox'] for c in self.changes]
+
+    def affects(self, lat: float, lon: float) -> bool:
+        """True if the lookup result of this layer may differ at a point"""
+        for c in self.changes:
+            min_x, min_y, max_x, max_y = c['bbox']
+            if not (min_x <= lon <= max_x and min_y <= lat <= max_y):
+                continue
+            inside_old = c['old_index'] is not None and point_in_rings(lat, lon, self.old.rings[c['old_index']])
+            inside_new = c['new_index'] is not None and point_in_rings(lat, lon, self.new.rings[c['new_index']])
+            # A reshaped feature with the same attributes only matters where it moved
+            if (inside_old != inside_new) if not c['attributes_changed'] else (inside_old or inside_new):
+                return True
+        return False
+
+    def intersects(self, bbox: Sequence[float]) -> bool:
+        """
+        True if a box may hold a point whose result changed
+
+        Exact with shapely installed; otherwise compares bounding boxes,
+        which can only over-report.
+        """
+        hits = [k for k, c in enumerate(self.changes) if _bboxes_overlap(c['bbox'], bbox)]
+        if not hits:
+            return False
+        regions = self._changed_regions()
+        if regions is None:
+            return True
+        from shapely.geometry import box
+        cell = box(*bbox)
+        return any(regions[k] is not None and regions[k].intersects(cell) for k in hits)
+
+    def _changed_regions(self):
+        """Per change, the area where results can differ; None without shapely"""
+        if self._regions is None:
+            try:
+                import shapely
+                from shapely.geometry import shape
+            except ImportError:
+                return None
+            regions = []
+            for c in self.changes:
+                old = shapely.make_valid(shape(self.old.geometries[c['old_index']])) if c['old_index'] is not None else None
+                new = shapely.make_valid(shape(self.new.geometries[c['new_index']])) if c['new_index'] is not None else None
+                if old is None or new is None:
+                    region = old if new is None else new
+                elif c['attributes_changed']:
+                    region = old.union(new)
+                else:
+                    region = old.symmetric_difference(new)
+                regions.append(None if region.is_empty else region)
+            self._regions = regions
+        return self._regions
+
+    def summary(self) -> Dict:
+        """JSON-ready record of what changed"""
+        counts = {kind: sum(c['change'] == kind for c in self.changes) for kind in ('added', 'removed', 'modified')}
+        bbox = None
+        for c in self.changes:
+            bbox = _bbox_union(bbox, c['bbox'])
+        changes = []
+        for c in self.changes:
+            entry = dict(c)
+            if c['old_index'] is not None and c['attributes_changed']:
+                entry['old_properties'] = self.old.properties[c['old_index']]
+            if c['new_index'] is not None:
+                entry['properties'] = self.new.properties[c['new_index']]
+            changes.append(entry)
+        return dict(layer=self.name, unchanged=len(self.new) - counts['added'] - counts['modified'],
+                    bbox=bbox, changes=changes, **counts)
+
+
+def update_layer(old: Layer, features: Sequence[Dict]) -> Tuple[Layer, LayerDiff]:
+    """
+    New version of a layer, reusing the parsed rings of unchanged features
+
+    Args:
+        old: Current layer
+        features: GeoJSON features of the new version
+
+    Returns:
+        (new Layer, LayerDiff from old to new)
+    """
+    old_keys = [feature_key(g, p) for g, p in zip(old.geometries, old.properties)]
+    parsed = {}
+    for i, key in enumerate(old_keys):
+        parsed.setdefault(key, []).append(i)
+    new = Layer(old.name, [])
+    new_keys = []
+    for feature in features:
+        geometry = feature.get('geometry') or {}
+        properties = dict(feature.get('properties') or {})
+        key = feature_key(geometry, properties)
+        same = next((i for i in parsed.get(key, ()) if old.geometries[i] == geometry), None)
+        if same is not None:
+            rings = old.rings[same]
+            bbox = old.bboxes[same]
+        else:
+            rings = feature_rings(geometry)
+            if not rings:
+                continue
+            bbox = rings_bbox(rings)
+        new.properties.append(properties)
+        new.geometries.append(geometry)
+        new.rings.append(rings)
+        new.bboxes.append(bbox)
+        new_keys.append(key)
+    return new, LayerDiff(old, new, old_keys, new_keys)
+
+def update_engine(engine: LookupEngine, collections: Dict[str, Dict]) -> Tuple[LookupEngine, Dict[str, LayerDiff]]:
+    """
+    Apply new layer versions to an engine
+
+    Args:
+        engine: Current engine
+        collections: Layer name -> GeoJSON FeatureCollection of its new
+            version; layers not given are kept as they are
+
+    Returns:
+        (engine over the new layers, layer name -> LayerDiff of changed layers)
+    """
+    layers = dict(engine.layers)
+    diffs = {}
+    for name, collection in collections.items():
+        if name in layers:
+            layer, diff = update_layer(layers[name], collection.get('features', []))
+            if not diff:
+                continue
+        else:
+            layer = Layer.from_geojson(name, collection)
+            diff = LayerDiff(Layer(name, []), layer)
+        layers[name] = layer
+        diffs[name] = diff
+    if not diffs:
+        return engine, diffs
+    return engine.update(layers, {name: diff.sources for name, diff in diffs.items()}), diffs
+
+def read_collections(data_dir: str) -> Dict[str, Dict]:
+    """Layer name -> FeatureCollection of the layer files in data_dir"""
+    collections = {}
+    for name, filename in LAYER_FILES.items():
+        path = os.path.join(data_dir, filename)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                collections[name] = json.load(f)
+    return collections
+
+def affected(diffs: Dict[str, LayerDiff], bbox: Sequence[float]) -> bool:
+    """True if any layer's result may differ inside a box"""
+    return any(diff.intersects(bbox) for diff in diffs.values())
+
+def changelog_entry(diffs: Dict[str, LayerDiff], **extra) -> Dict:
+    """One changelog record: a timestamp, per-layer summaries and any extra fields"""
+    return dict(time=time.strftime('%Y-%m-%dT%H:%M:%S%z'), layers={name: diff.summary() for name, diff in diffs.items()},
+                **extra)
+
+def append_changelog(path: str, entry: Dict):
+    """Append a record to a JSON-lines changelog"""
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry, default=str) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two layer versions and update derived grids")
+    parser.add_argument('old', help="Directory with the current layer files")
+    parser.add_argument('new', help="Directory with the revised layer files")
+    parser.add_argument('--changelog', help="Append the change record to this JSON-lines file")
+    parser.add_argument('--grid', action='append', default=[],
+                        help="sweep.py output (.npy or .tif) to update in place; repeatable")
+    args = parser.parse_args()
+
+    old_layers = load_layers(args.old)
+    diffs = {}
+    for name, collection in read_collections(args.new).items():
+        old = old_layers.get(name, Layer(name, []))
+        layer, diff = update_layer(old, collection.get('features', []))
+        if diff:
+            diffs[name] = diff
+
+    grids = {}
+    if diffs:
+        from sweep import update_sweep
+        for path in args.grid:
+            grids[path] = update_sweep(path, lambda bbox: affected(diffs, bbox), data_dir=args.new)
+
+    entry = changelog_entry(diffs, old=args.old, new=args.new, grid_tiles=grids)
+    if args.changelog:
+        append_changelog(args.changelog, entry)
+    for name, diff in diffs.items():
+        summary = diff.summary()
+        print(f"{name}: {summary['added']} added, {summary['removed']} removed, "
+              f"{summary['modified']} modified, {summary['unchanged']} unchanged")
+    for path, tiles in grids.items():
+        print(f"{path}: {tiles} tiles updated")
+    if not diffs:
+        print("No changes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+"""
+Concurrency load tests for Location Wizard
+Drives the lookup API or the daemon from many threads with realistic
+coordinate mixes and a stub Nominatim, and reports latency percentiles,
+histograms and throughput per concurrency level
+
+Usage: python loadtest.py [--target click] [--concurrency 1,4,16] [--duration 10] [--json FILE]
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
+
+from synthetic_data import INDIA_EXTENT
+
+DISTRIBUTIONS = ('uniform', 'cities', 'hotspot', 'mixed')
+TARGETS = ('properties', 'batch', 'address', 'search', 'click', 'daemon')
+
+# Settlement weight by type in the 'cities' distribution
+TYPE_WEIGHTS = {'city': 6, 'town': 2}
+
+# Spread (degrees) of clicks around a settlement
+CITY_SIGMA = 0.15
+
+# Distinct points in the 'hotspot' distribution
+HOTSPOTS = 50
+
+# Throughput gain below which more concurrency counts as saturated
+SATURATION_GAIN = 1.1
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram
+
+    Buckets are 1 µs to 100 s with `per_decade` buckets per power of ten,
+    so percentiles are exact to about 12%; count, mean and max are exact.
+    """
+
+    def __init__(self, per_decade: int = 20, low: float = 1e-6, high: float = 100.0):
+        decades = round(math.log10(high / low))
+        self.edges = [low * 10 ** (k / per_decade) for k in range(decades * per_decade + 1)]
+        self.counts = [0] * (len(self.edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(self.edges, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        for k, n in enumerate(other.counts):
+            self.counts[k] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the q-th percentile (0-100), at most max"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for k, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.edges[k] if k < len(self.edges) else self.max, self.max)
+        return self.max
+
+    def render(self, width: int = 40) -> str:
+        """Text histogram of the non-empty range"""
+        used = [k for k, n in enumerate(self.counts) if n]
+        if not used:
+            return "(no samples)"
+        peak = max(self.counts)
+        lines = []
+        for k in range(used[0], used[-1] + 1):
+            upper = self.edges[k] if k < len(self.edges) else float('inf')
+            bar = '#' * math.ceil(width * self.counts[k] / peak) if self.counts[k] else ''
+            lines.append(f"{'<= ' + format_seconds(upper):>12} {self.counts[k]:>8} {bar}")
+        return "\n".join(lines)
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds == float('inf'):
+        return 'inf'
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+# Coordinates
+
+def _settlements() -> List[Dict]:
+    from geocoder import load_settlements
+    return load_settlements()
+
+class PointSampler:
+    """
+    Query points from one of DISTRIBUTIONS
+
+    uniform: anywhere in the India extent; cities: around settlements,
+    weighted by size, as map clicks are; hotspot: a few repeated points, as
+    cached or popular sites are; mixed: 70% cities, 20% uniform, 10% hotspot
+    """
+
+    def __init__(self, distribution: str = 'mixed', seed: int = 0, settlements: Optional[Sequence[Dict]] = None):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution '{distribution}', expected one of {DISTRIBUTIONS}")
+        self.distribution = distribution
+        self.rng = random.Random(seed)
+        self.settlements = list(settlements) if settlements is not None else _settlements()
+        self._weights = list(itertools.accumulate(TYPE_WEIGHTS.get(s['type'], 1) for s in self.settlements))
+        hotspots = random.Random(1893)
+        self._hotspots = [self._city(hotspots) for _ in range(HOTSPOTS)]
+
+    def _uniform(self, rng):
+        min_x, min_y, max_x, max_y = INDIA_EXTENT
+        return rng.uniform(min_y, max_y), rng.uniform(min_x, max_x)
+
+    def _city(self, rng):
+        place = rng.choices(self.settlements, cum_weights=self._weights)[0]
+        return rng.gauss(place['lat'], CITY_SIGMA), rng.gauss(place['lon'], CITY_SIGMA)
+
+    def point(self):
+        """(lat, lon) of the next query"""
+        kind = self.distribution
+        if kind == 'mixed':
+            roll = self.rng.random()
+            kind = 'cities' if roll < 0.7 else 'uniform' if roll < 0.9 else 'hotspot'
+        if kind == 'uniform':
+            return self._uniform(self.rng)
+        if kind == 'hotspot':
+            return self.rng.choice(self._hotspots)
+        return self._city(self.rng)
+
+    def points(self, n: int):
+        """(lats, lons) of the next n queries"""
+        pairs = [self.point() for _ in range(n)]
+        return [p[0] for p in pairs], [p[1] for p in pairs]
+
+    def place_name(self) -> str:
+        """Name of a settlement to search for"""
+        return self.rng.choices(self.settlements, cum_weights=self._weights)[0]['name']
+
+
+# Stub geocoder
+
+class _StubHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with stub.lock:
+            stub.requests += 1
+        time.sleep(stub.delay())
+        if stub.rng.random() < stub.error_rate:
+            self.send_error(503)
+            return
+        if url.path == '/search':
+            body = [{'lat': '20.59', 'lon': '78.96', 'display_name': f"{query.get('q', '')} (stub)"}]
+        elif url.path == '/reverse':
+            body = {'display_name': f"Stub place near {query.get('lat')}, {query.get('lon')}"}
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubGeocoder:
+    """
+    Local stand-in for Nominatim's /search and /reverse
+
+    Used as a context manager, it serves from a background thread and
+    points LOCATION_WIZARD_NOMINATIM_URL at itself.
+
+    Args:
+        latency: Median response time in seconds
+        jitter: Log-normal spread of the response time (sigma)
+        error_rate: Share of requests answered with HTTP 503
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.5, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self._server = None
+        self._saved = None
+
+    def delay(self) -> float:
+        return self.latency * math.exp(self.rng.gauss(0, self.jitter)) if self.latency else 0.0
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        import nominatim
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._saved = os.environ.get('LOCATION_WIZARD_NOMINATIM_URL')
+        os.environ['LOCATION_WIZARD_NOMINATIM_URL'] = self.url
+        nominatim.reset()
+        return self
+
+    def __exit__(self, *exc):
+        import nominatim
+        if self._saved is None:
+            os.environ.pop('LOCATION_WIZARD_NOMINATIM_URL', None)
+        else:
+            os.environ['LOCATION_WIZARD_NOMINATIM_URL'] = self._saved
+        nominatim.reset()
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# Targets
+
+def make_target(name: str, batch_size: int = 1000, socket_path: Optional[str] = None) -> Callable:
+    """
+    One request against a target, as a function of a PointSampler
+
+    properties: core.get_location_properties; batch: one
+    get_location_properties_batch of batch_size points; address:
+    get_address with Nominatim enrichment; search: search_location for a
+    settlement name; click: what the Streamlit app does per map click
+    (properties plus enriched address); daemon: a lookup through the
+    daemon at socket_path, one connection per thread
+    """
+    if name == 'daemon':
+        from client import LocationClient
+        local = threading.local()
+
+        def request(sampler):
+            if not hasattr(local, 'client'):
+                local.client = LocationClient(socket_path)
+            return local.client.lookup(*sampler.point())
+        return request
+
+    import core
+    if name == 'properties':
+        return lambda sampler: core.get_location_properties(*sampler.point())
+    if name == 'batch':
+        return lambda sampler: core.get_location_properties_batch(*sampler.points(batch_size))
+    if name == 'address':
+        return lambda sampler: core.get_address(*sampler.point(), enrich=True)
+    if name == 'search':
+        return lambda sampler: core.search_location(sampler.place_name())
+    if name == 'click':
+        def request(sampler):
+            lat, lon = sampler.point()
+            return core.get_location_properties(lat, lon), core.get_address(lat, lon, enrich=True)
+        return request
+    raise ValueError(f"Unknown target '{name}', expected one of {TARGETS}")
+
+
+# Runner
+
+class LoadResult:
+    """Latencies, errors and throughput of one run at one concurrency"""
+
+    def __init__(self, concurrency: int, histogram: LatencyHistogram, errors: int, elapsed: float,
+                 points_per_request: int = 1):
+        self.concurrency = concurrency
+        self.histogram = histogram
+        self.errors = errors
+        self.elapsed = elapsed
+        self.points_per_request = points_per_request
+
+    @property
+    def requests(self) -> int:
+        return self.histogram.count
+
+    @property
+    def throughput(self) -> float:
+        """Successful requests per second"""
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> Dict:
+        h = self.histogram
+        return {'concurrency': self.concurrency, 'requests': self.requests, 'errors': self.errors,
+                'elapsed_s': round(self.elapsed, 3), 'throughput': round(self.throughput, 2),
+                'points_per_s': round(self.throughput * self.points_per_request, 2),
+                'mean_s': h.mean, 'p50_s': h.percentile(50), 'p95_s': h.percentile(95),
+                'p99_s': h.percentile(99), 'max_s': h.max}
+
+
+def run_load(request: Callable, concurrency: int, duration: Optional[float] = None, requests: Optional[int] = None,
+             distribution: str = 'mixed', seed: int = 0, points_per_request: int = 1) -> LoadResult:
+    """
+    Closed-loop load: concurrency threads issuing requests back to back
+
+    Args:
+        request: Function of a PointSampler doing one request, see make_target()
+        concurrency: Number of threads
+        duration: Seconds to run for
+        requests: Total requests to issue instead of a duration
+        distribution: Point distribution, see PointSampler
+        seed: Seed of the first thread's sampler; thread k uses seed + k
+        points_per_request: Points per request, for points_per_s
+
+    Returns:
+        LoadResult; failed requests count as errors and are not in the histogram
+    """
+    if (duration is None) == (requests is None):
+        raise ValueError("Give either duration or requests")
+    settlements = _settlements()
+    samplers = [PointSampler(distribution, seed + k, settlements) for k in range(concurrency)]
+    histograms = [LatencyHistogram() for _ in range(concurrency)]
+    errors = [0] * concurrency
+    tickets = itertools.count() if requests is not None else None
+    start_barrier = threading.Barrier(concurrency + 1)
+    stop_at = [0.0]
+
+    def worker(k):
+        sampler, histogram = samplers[k], histograms[k]
+        start_barrier.wait()
+        while True:
+            if tickets is not None:
+                if next(tickets) >= requests:
+                    break
+            elif time.perf_counter() >= stop_at[0]:
+                break
+            begin = time.perf_counter()
+            try:
+                request(sampler)
+            except Exception:
+                errors[k] += 1
+                continue
+            histogram.record(time.perf_counter() - begin)
+
+    threads = [threading.Thread(target=worker, args=(k,), daemon=True) for k in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    begin = time.perf_counter()
+    stop_at[0] = begin + (duration or 0.0)
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - begin
+    histogram = LatencyHistogram()
+    for h in histograms:
+        histogram.merge(h)
+    return LoadResult(concurrency, histogram, sum(errors), elapsed, points_per_request)
+
+
+def saturation_point(results: Sequence[LoadResult]) -> Optional[int]:
+    """Lowest concurrency beyond which throughput stops scaling, or None"""
+    ordered = sorted(results, key=lambda r: r.concurrency)
+    for previous, current in zip(ordered, ordered[1:]):
+        if current.throughput < previous.throughput * SATURATION_GAIN:
+            return previous.concurrency
+    return None
+
+def compare(results: Sequence[Dict], baseline: Sequence[Dict], tolerance: float = 0.2) -> List[str]:
+    """
+    Regressions against a saved run: p95/p99 up or throughput down by more
+    than tolerance at the same concurrency
+    """
+    saved = {b['concurrency']: b for b in baseline}
+    problems = []
+    for r in results:
+        b = saved.get(r['concurrency'])
+        if b is None:
+            continue
+        for key in ('p95_s', 'p99_s'):
+            if b[key] and r[key] > b[key] * (1 + tolerance):
+                problems.append(f"c={r['concurrency']}: {key} {format_seconds(b[key])} -> {format_seconds(r[key])}")
+        if b['throughput'] and r['throughput'] < b['throughput'] * (1 - tolerance):
+            problems.append(f"c={r['concurrency']}: throughput {b['throughput']:.1f} -> {r['throughput']:.1f}/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the lookup API at increasing concurrency")
+    parser.add_argument('--target', choices=TARGETS, default='click')
+    parser.add_argument('--concurrency', default='1,2,4,8,16', help="Comma-separated thread counts")
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument('--duration', type=float, help="Seconds per concurrency level (default 5)")
+    limit.add_argument('--requests', type=int, help="Requests per concurrency level")
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='mixed')
+    parser.add_argument('--batch-size', type=int, default=1000, help="Points per request of the batch target")
+    parser.add_argument('--data-dir', help="Directory with the layer GeoJSON files")
+    parser.add_argument('--socket', help="Daemon socket of the daemon target (default: start one in-process)")
+    parser.add_argument('--geocoder-latency', type=float, default=0.05, help="Median stub Nominatim latency (s)")
+    parser.add_argument('--geocoder-errors', type=float, default=0.0, help="Share of stub requests failing")
+    parser.add_argument('--histogram', action='store_true', help="Print the latency histogram of each level")
+    parser.add_argument('--json', help="Write the per-level summaries to this file")
+    parser.add_argument('--baseline', help="Summaries of an earlier run; exit 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(',')]
+    daemon = None
+    with StubGeocoder(args.geocoder_latency, error_rate=args.geocoder_errors) as stub:
+        if args.data_dir:
+            import core
+            core.load_shapefiles(args.data_dir)
+        socket_path = args.socket
+        if args.target == 'daemon' and not socket_path:
+            import tempfile
+            from daemon import LocationDaemon
+            socket_path = os.path.join(tempfile.mkdtemp(), 'loadtest.sock')
+            daemon = LocationDaemon(socket_path)
+            threading.Thread(target=daemon.serve_forever, daemon=True).start()
+        request = make_target(args.target, args.batch_size, socket_path)
+        points = args.batch_size if args.target == 'batch' else 1
+        # Warm up layers, engine and connections outside the measurement
+        run_load(request, 1, requests=3, distribution=args.distribution)
+
+        print(f"Target {args.target}, {args.distribution} points, stub geocoder {format_seconds(args.geocoder_latency)}")
+        print(f"{'threads':>8} {'req/s':>10} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'errors':>7}")
+        results = []
+        for concurrency in levels:
+            result = run_load(request, concurrency, duration=None if args.requests else (args.duration or 5.0),
+                              requests=args.requests, distribution=args.distribution, points_per_request=points)
+            results.append(result)
+            s = result.summary()
+            print(f"{concurrency:>8} {s['throughput']:>10.1f} {format_seconds(s['p50_s']):>9} "
+                  f"{format_seconds(s['p95_s']):>9} {format_seconds(s['p99_s']):>9} "
+                  f"{format_seconds(s['max_s']):>9} {s['errors']:>7}")
+            if args.histogram:
+                print(result.histogram.render())
+        print(f"Stub geocoder served {stub.requests} requests")
+    if daemon is not None:
+        daemon.shutdown()
+        daemon.server_close()
+
+    saturated = saturation_point(results)
+    if saturated is not None:
+        print(f"Throughput stops scaling beyond {saturated} threads")
+    summaries = [r.summary() for r in results]
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'target': args.target, 'distribution': args.distribution, 'levels': summaries}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(summaries, json.load(f)['levels'], args.tolerance)
+        for problem in problems:
+            print(f"Regression: {problem}")
+        if problems:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Lightweight instrumentation for Location Wizard
+Stage timers, cache hit counters and geocoding failure counts sent to a
+pluggable sink; disabled by default and close to free while disabled
+
+Enable with metrics.enable(sink) or LOCATION_WIZARD_METRICS=memory|prometheus|log
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# Active sink; None means instrumentation is disabled
+_sink = None
+
+_NULL_TIMER = contextlib.nullcontext()
+
+# Stage names used by the instrumented code paths
+STAGES = ('load', 'read_file', 'to_crs', 'engine_build', 'index_query', 'exact_test', 'batch_plan', 'batch_query',
+          'materialize', 'geocode', 'reproject')
+
+
+class InMemorySink:
+    """In-process counters and stage timings, safe to share between threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.timings = {}
+
+    def incr(self, name: str, value: float = 1, labels: Optional[Dict] = None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, labels: Optional[Dict] = None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            count, total, peak = self.timings.get(key, (0, 0.0, 0.0))
+            self.timings[key] = (count + 1, total + seconds, max(peak, seconds))
+
+    def counter(self, name: str, **labels) -> float:
+        """Value of one counter, summed over any labels not given"""
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(v for (n, key_labels), v in self.counters.items() if n == name and wanted <= set(key_labels))
+
+    def cache_hit_ratio(self, cache: str) -> Optional[float]:
+        """Hits / (hits + misses) for a named cache, or None before first use"""
+        hits = self.counter('cache_hits', cache=cache)
+        misses = self.counter('cache_misses', cache=cache)
+        return hits / (hits + misses) if hits + misses else None
+
+    def snapshot(self) -> Dict:
+        """Plain dict of counters and timings, e.g. for st.json or logging"""
+        with self._lock:
+            return {
+                'counters': {_flat_key(k): v for k, v in self.counters.items()},
+                'timings': {_flat_key(k): {'count': c, 'total_s': t, 'max_s': m}
+                            for k, (c, t, m) in self.timings.items()}
+            }
+
+
+class PrometheusSink(InMemorySink):
+    """InMemorySink that renders the Prometheus text exposition format"""
+
+    prefix = 'location_wizard'
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self.counters.items())
+            timings = sorted(self.timings.items())
+        lines = []
+        for name in sorted({n for (n, _), _ in counters}):
+            lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+            for (n, labels), value in counters:
+                if n == name:
+                    lines.append(f"{self.prefix}_{name}_total{_labels(labels)} {value:g}")
+        for name in sorted({n for (n, _), _ in timings}):
+            lines.append(f"# TYPE {self.prefix}_{name}_seconds summary")
+            for (n, labels), (count, total, _) in timings:
+                if n == name:
+                    lines.append(f"{self.prefix}_{name}_seconds_count{_labels(labels)} {count}")
+                    lines.append(f"{self.prefix}_{name}_seconds_sum{_labels(labels)} {total:.9f}")
+        return "\n".join(lines) + "\n"
+
+
+class LogSink:
+    """Structured log sink: one JSON record per event on the given logger"""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        self.logger = logger or logging.getLogger('location_wizard.metrics')
+        self.level = level
+
+    def incr(self, name: str, value: float = 1, labels: Optional[Dict] = None):
+        self.logger.log(self.level, json.dumps({'metric': name, 'value': value, **(labels or {})}))
+
+    def observe(self, name: str, seconds: float, labels: Optional[Dict] = None):
+        self.logger.log(self.level, json.dumps({'metric': name, 'seconds': round(seconds, 9), **(labels or {})}))
+
+
+def _flat_key(key) -> str:
+    name, labels = key
+    return name + _labels(labels)
+
+def _labels(labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+def _escape(value) -> str:
+    """Label value escaped as the Prometheus text format requires"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Timer:
+    """Context manager reporting elapsed wall time for one stage"""
+
+    __slots__ = ('sink', 'labels', 'start')
+
+    def __init__(self, sink, labels):
+        self.sink = sink
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.sink.observe('stage', time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class _ScopedTimer(_Timer):
+    """_Timer that also reports stage entry and exit, for sinks that scope work to stages"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        self.sink.stage_enter(self.labels)
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        super().__exit__(*exc)
+        self.sink.stage_exit(self.labels)
+        return False
+
+
+def enable(sink=None):
+    """Start sending metrics to sink (an InMemorySink by default); returns the sink"""
+    global _sink
+    _sink = sink if sink is not None else InMemorySink()
+    return _sink
+
+def disable():
+    """Stop collecting metrics"""
+    global _sink
+    _sink = None
+
+def enabled() -> bool:
+    return _sink is not None
+
+def get_sink():
+    """Active sink, or None while disabled"""
+    return _sink
+
+def timer(stage: str, **labels):
+    """Context manager timing one stage; a shared no-op while disabled"""
+    if _sink is None:
+        return _NULL_TIMER
+    timer_class = _ScopedTimer if hasattr(_sink, 'stage_enter') else _Timer
+    return timer_class(_sink, dict(labels, stage=stage))
+
+def incr(name: str, value: float = 1, **labels):
+    """Add to a counter"""
+    if _sink is not None:
+        _sink.incr(name, value, labels)
+
+def cache(name: str, hit: bool):
+    """Record a hit or miss for a named cache"""
+    if _sink is not None:
+        _sink.incr('cache_hits' if hit else 'cache_misses', 1, {'cache': name})
+
+def is_timeout(exc: BaseException) -> bool:
+    """True for socket, asyncio and requests timeouts"""
+    return isinstance(exc, TimeoutError) or 'Timeout' in type(exc).__name__
+
+def geocode_error(operation: str, exc: Optional[BaseException] = None):
+    """Count a failed geocoding call, separating timeouts from other failures"""
+    if _sink is not None:
+        name = 'geocode_timeouts' if exc is not None and is_timeout(exc) else 'geocode_failures'
+        _sink.incr(name, 1, {'operation': operation})
+
+_SINKS = {'memory': InMemorySink, 'prometheus': PrometheusSink, 'log': LogSink}
+
+if os.environ.get('LOCATION_WIZARD_METRICS') in _SINKS:
+    enable(_SINKS[os.environ['LOCATION_WIZARD_METRICS']]())
@@ -0,0 +1,247 @@
+"""
+Nominatim access for Location Wizard
+Every geocoding request runs under a latency budget, behind a circuit
+breaker per endpoint, with an optional hedged request to a secondary
+(e.g. self-hosted) Nominatim
+
+While the upstream is failing, callers get recent answers or an
+Unavailable error at once instead of waiting out a timeout.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import metrics
+
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org'
+HEADERS = {'User-Agent': 'LocationWizard/1.0'}
+
+# Seconds a caller waits for an answer, whatever the upstream does
+DEFAULT_BUDGET = 2.0
+
+# Seconds before the secondary endpoint is asked as well
+DEFAULT_HEDGE_DELAY = 0.3
+
+# Answers kept to serve while the upstream is unavailable
+STALE_ENTRIES = 512
+
+
+class Unavailable(Exception):
+    """No endpoint answered within the budget, or every breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed, open or half-open state of one endpoint
+
+    Opens after failure_threshold consecutive failures; after reset_after
+    seconds one probe request is let through, and its outcome closes or
+    reopens the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_after: float = 30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if self._clock() - self._opened_at >= self.reset_after:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """True if a request may go out now; in half-open state only one does"""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                metrics.incr('circuit_transitions', endpoint=self.name, state='closed')
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                metrics.incr('circuit_transitions', endpoint=self.name, state='open')
+            self._probing = False
+
+
+_breakers = {}
+_stale = OrderedDict()
+_lock = threading.Lock()
+_executor = None
+
+
+def endpoints() -> List[str]:
+    """Primary and optional secondary base URLs, in order of preference"""
+    primary = os.environ.get('LOCATION_WIZARD_NOMINATIM_URL') or NOMINATIM_URL
+    secondary = os.environ.get('LOCATION_WIZARD_NOMINATIM_SECONDARY')
+    return [primary, secondary] if secondary else [primary]
+
+def default_budget() -> float:
+    return float(os.environ.get('LOCATION_WIZARD_GEOCODE_BUDGET', DEFAULT_BUDGET))
+
+def hedge_delay() -> float:
+    return float(os.environ.get('LOCATION_WIZARD_HEDGE_DELAY', DEFAULT_HEDGE_DELAY))
+
+def get_breaker(url: str) -> CircuitBreaker:
+    with _lock:
+        if url not in _breakers:
+            _breakers[url] = CircuitBreaker(url)
+        return _breakers[url]
+
+def available() -> bool:
+    """False while every endpoint's breaker is open"""
+    return any(get_breaker(url).state != 'open' for url in endpoints())
+
+def reset():
+    """Close all breakers and forget recent answers"""
+    with _lock:
+        _breakers.clear()
+        _stale.clear()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='geocode')
+        return _executor
+
+def _fetch(url: str, path: str, params: Dict, timeout: float):
+    import requests
+    response = requests.get(url + path, params, headers=HEADERS, timeout=timeout)
+    if response.status_code != 200:
+        raise Unavailable(f"{url} answered HTTP {response.status_code}")
+    return response.json()
+
+def _settle(breaker: CircuitBreaker):
+    """Done-callback reporting an outrun request's outcome to its breaker"""
+    def done(future):
+        if future.cancelled() or future.exception() is not None:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    return done
+
+def _remember(key, data):
+    with _lock:
+        _stale[key] = data
+        _stale.move_to_end(key)
+        while len(_stale) > STALE_ENTRIES:
+            _stale.popitem(last=False)
+
+def _recall(key, operation: str, reason: str):
+    with _lock:
+        data = _stale.get(key)
+    if data is None:
+        raise Unavailable(reason)
+    metrics.incr('geocode_stale', operation=operation)
+    return data
+
+def get_json(path: str, params: Dict, operation: str, budget: Optional[float] = None):
+    """
+    JSON answer of a Nominatim request within a latency budget
+
+    The first allowed endpoint is asked first; the next one is asked when it
+    fails, or as a hedge when it has not answered after hedge_delay(). The
+    first successful answer wins; the requests it outran report to their
+    breakers when they finish. Requests still running at the deadline are
+    abandoned and count as timeouts.
+
+    Args:
+        path: API path, e.g. '/search'
+        params: Query parameters
+        operation: Metrics label ('search', 'reverse')
+        budget: Seconds to wait at most; default_budget() by default
+
+    Raises:
+        Unavailable: No answer in time and no recent answer to the same request
+    """
+    deadline = time.monotonic() + (default_budget() if budget is None else budget)
+    key = (path, tuple(sorted(params.items())))
+    queue = endpoints()
+    executor = _get_executor()
+    pending = {}
+    delay = hedge_delay()
+    last_error = None
+
+    def launch() -> bool:
+        # Breakers are asked only for the endpoint actually sent to, so a
+        # half-open one is not left waiting on a probe that never went out
+        while queue:
+            url = queue.pop(0)
+            if get_breaker(url).allow():
+                timeout = max(deadline - time.monotonic(), 0.001)
+                pending[executor.submit(_fetch, url, path, params, timeout)] = url
+                return True
+        return False
+
+    if not launch():
+        metrics.incr('geocode_short_circuits', operation=operation)
+        return _recall(key, operation, "circuit open")
+
+    with metrics.timer('geocode', operation=operation):
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=min(remaining, delay) if queue else remaining,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                if launch():
+                    metrics.incr('geocode_hedges', operation=operation)
+                continue
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    get_breaker(url).record_failure()
+                    metrics.geocode_error(operation, e)
+                    last_error = e
+                    continue
+                get_breaker(url).record_success()
+                _remember(key, data)
+                # The requests this one outran still settle their breakers,
+                # releasing a half-open probe among them
+                for other, other_url in pending.items():
+                    other.add_done_callback(_settle(get_breaker(other_url)))
+                return data
+            if not pending:
+                launch()
+
+    if pending:
+        for url in pending.values():
+            get_breaker(url).record_failure()
+            metrics.geocode_error(operation, TimeoutError())
+        reason = "no answer within budget"
+    else:
+        reason = f"{type(last_error).__name__}: {last_error}"
+    return _recall(key, operation, reason)
@@ -0,0 +1,107 @@
+"""
+Multi-hazard overlay for Location Wizard
+Intersects all loaded layers into one set of non-overlapping cells, each
+carrying the attributes of every layer, so a lookup is a single probe
+
+Building needs shapely; the resulting Layer works with any engine backend.
+"""
+
+import json
+from typing import Dict, List, Tuple
+
+from engine import OVERLAY, Layer
+
+# Slivers smaller than this (square degrees, ~1 m^2) are dropped
+MIN_CELL_AREA = 1e-10
+
+
+def _polygonal(geometry):
+    """Polygonal part of a GEOS result, or None if nothing is left"""
+    import shapely
+    from shapely.geometry import MultiPolygon, Polygon
+
+    if geometry is None or geometry.is_empty:
+        return None
+    parts = [p for p in shapely.get_parts(geometry) if isinstance(p, Polygon) and p.area > MIN_CELL_AREA]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else MultiPolygon(parts)
+
+def effective_geometries(layer: Layer) -> List[Tuple[object, Dict]]:
+    """
+    Shapely geometries of a layer with first-match precedence applied
+
+    Each feature loses whatever earlier features already cover, which is
+    how the engine resolves overlaps (e.g. the nested bundled seismic zones).
+    """
+    import shapely
+    from shapely.geometry import shape
+
+    geometries = [shapely.make_valid(shape(g)) for g in layer.geometries]
+    tree = shapely.STRtree(geometries)
+    result = []
+    for i, geometry in enumerate(geometries):
+        earlier = [j for j in tree.query(geometry, predicate='intersects') if j < i]
+        if earlier:
+            geometry = geometry.difference(shapely.union_all([geometries[j] for j in earlier]))
+        geometry = _polygonal(geometry)
+        if geometry is not None:
+            result.append((geometry, layer.properties[i]))
+    return result
+
+def build_overlay(layers: Dict[str, Layer]) -> Layer:
+    """
+    Planar overlay of all layers as a single Layer
+
+    Cell properties map layer name -> matched feature properties; a layer
+    that does not cover a cell is absent from its properties.
+    """
+    import shapely
+
+    cells = []
+    for name, layer in layers.items():
+        pieces = effective_geometries(layer)
+        if not cells:
+            cells = [(geometry, {name: props}) for geometry, props in pieces]
+            continue
+
+        piece_tree = shapely.STRtree([geometry for geometry, _ in pieces])
+        cell_tree = shapely.STRtree([geometry for geometry, _ in cells])
+        next_cells = []
+
+        # Split existing cells by the new layer's features
+        for geometry, props in cells:
+            hits = piece_tree.query(geometry, predicate='intersects')
+            for j in sorted(hits):
+                part = _polygonal(geometry.intersection(pieces[j][0]))
+                if part is not None:
+                    next_cells.append((part, dict(props, **{name: pieces[j][1]})))
+            rest = geometry
+            if len(hits):
+                rest = geometry.difference(shapely.union_all([pieces[j][0] for j in hits]))
+            rest = _polygonal(rest)
+            if rest is not None:
+                next_cells.append((rest, props))
+
+        # Parts of the new layer outside every existing cell
+        for geometry, props in pieces:
+            hits = cell_tree.query(geometry, predicate='intersects')
+            if len(hits):
+                geometry = _polygonal(geometry.difference(shapely.union_all([cells[k][0] for k in hits])))
+            if geometry is not None:
+                next_cells.append((geometry, {name: props}))
+        cells = next_cells
+
+    return Layer(OVERLAY, [{"properties": props, "geometry": shapely.geometry.mapping(geometry)}
+                           for geometry, props in cells])
+
+def write_overlay(layer: Layer, path: str):
+    """Save an overlay Layer as GeoJSON so it can be reused without shapely"""
+    features = [{"type": "Feature", "properties": props, "geometry": geometry}
+                for props, geometry in zip(layer.properties, layer.geometries)]
+    with open(path, 'w') as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+def load_overlay(path: str) -> Layer:
+    """Load an overlay written by write_overlay()"""
+    return Layer.from_file(OVERLAY, path)
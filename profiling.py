@@ -0,0 +1,319 @@
+"""
+Opt-in profiling for Location Wizard
+CPU profiles (cProfile or a stack sampler) and tracemalloc allocation
+snapshots scoped to the lookup stages timed in metrics.py, written as
+flamegraph-ready files
+
+Usage: python profiling.py [-o OUT_DIR] [--mode sample|cprofile|both] (--batch N | SCRIPT [ARGS ...])
+   or: LOCATION_WIZARD_PROFILE=OUT_DIR python demo.py
+"""
+
+import argparse
+import collections
+import contextlib
+import cProfile
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, Optional
+
+import metrics
+
+MODES = ('sample', 'cprofile', 'both')
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+
+# Allocation sites kept per stage in allocations.txt
+TOP_ALLOCATIONS = 15
+
+# Frames tracemalloc keeps per allocation
+TRACEMALLOC_FRAMES = 1
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+
+class StackSampler:
+    """
+    Sampling profiler over all threads, in folded-stack form
+
+    Every interval seconds the stacks of all other threads are recorded;
+    stage(thread_id) may name the metrics stages a thread is in, which are
+    added as root frames so a flamegraph splits by stage.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, stage=None):
+        self.interval = interval
+        self.stage = stage
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                names = []
+                while frame is not None:
+                    names.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                names.reverse()
+                stages = self.stage(thread_id) if self.stage else ()
+                self.stacks[';'.join([f"[{s}]" for s in stages] + names)] += 1
+            self.samples += 1
+
+    def write_folded(self, path: str):
+        """One 'frame;frame;frame count' line per stack, for flamegraph.pl, inferno or speedscope"""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilingSink(metrics.InMemorySink):
+    """
+    InMemorySink that tracks which stages each thread is in and, with
+    memory=True, the memory each stage allocates
+
+    Per stage it records the net change and the peak of traced memory, and
+    for the first run of each stage a tracemalloc snapshot diff. Peaks are
+    reset when a thread enters its outermost stage, so they are exact for
+    one thread and an upper bound when stages overlap across threads.
+    """
+
+    def __init__(self, memory: bool = True, snapshots: bool = True):
+        super().__init__()
+        self.memory = memory
+        self.snapshots = snapshots
+        self.active = {}
+        self.allocations = {}
+        self.top_allocations = {}
+        self._snapshot_stages = set()
+        self._local = threading.local()
+
+    def stages(self, thread_id: int):
+        return tuple(name for name, _ in self.active.get(thread_id, ()))
+
+    def stage_enter(self, labels: Dict):
+        name = labels['stage']
+        stack = self.active.setdefault(threading.get_ident(), [])
+        before = None
+        if self.memory and tracemalloc.is_tracing():
+            if not stack:
+                tracemalloc.reset_peak()
+            snapshot = None
+            if self.snapshots and name not in self._snapshot_stages:
+                self._snapshot_stages.add(name)
+                snapshot = tracemalloc.take_snapshot()
+            before = (tracemalloc.get_traced_memory()[0], snapshot)
+        stack.append((name, before))
+
+    def stage_exit(self, labels: Dict):
+        stack = self.active.get(threading.get_ident())
+        if not stack:
+            return
+        name, before = stack.pop()
+        if before is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        start, snapshot = before
+        with self._lock:
+            count, net, top = self.allocations.get(name, (0, 0, 0))
+            self.allocations[name] = (count + 1, net + current - start, max(top, peak - start))
+        if snapshot is not None:
+            diff = tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')
+            self.top_allocations[name] = [str(d) for d in diff[:TOP_ALLOCATIONS] if d.size_diff > 0]
+
+    def stage_report(self) -> Dict:
+        """Per stage: calls, total and max seconds, and with memory tracing net and peak bytes"""
+        report = {}
+        with self._lock:
+            for (name, labels), (count, total, peak) in self.timings.items():
+                stage = dict(labels)['stage']
+                entry = report.setdefault(stage, {'calls': 0, 'total_s': 0.0, 'max_s': 0.0})
+                entry['calls'] += count
+                entry['total_s'] += total
+                entry['max_s'] = max(entry['max_s'], peak)
+            for stage, (count, net, top) in self.allocations.items():
+                entry = report.setdefault(stage, {'calls': count, 'total_s': 0.0, 'max_s': 0.0})
+                entry['net_bytes'] = net
+                entry['peak_bytes'] = top
+        return report
+
+
+class ProfileSession:
+    """
+    One profiling run, writing its files to output_dir on stop()
+
+    Files: profile.folded (sample mode; flamegraph.pl, inferno, speedscope),
+    profile.pstats (cprofile mode; snakeviz, flameprof, python -m pstats),
+    stages.json (per-stage timings and memory) and allocations.txt (top
+    allocation sites per stage, with memory=True).
+
+    cProfile only sees the thread that starts the session; the sampler sees
+    every thread.
+
+    Args:
+        output_dir: Directory for the profile files, created if needed
+        mode: 'sample', 'cprofile' or 'both'
+        memory: Trace allocations with tracemalloc
+        interval: Seconds between stack samples
+    """
+
+    def __init__(self, output_dir: str, mode: str = 'sample', memory: bool = True, interval: float = SAMPLE_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}', expected one of {MODES}")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.memory = memory
+        self.sink = ProfilingSink(memory=memory)
+        self.sampler = StackSampler(interval, self.sink.stages) if mode in ('sample', 'both') else None
+        self.profiler = cProfile.Profile() if mode in ('cprofile', 'both') else None
+        self.paths = {}
+        self._previous_sink = None
+        self._started_tracing = False
+        self._start = None
+
+    def start(self) -> 'ProfileSession':
+        self._previous_sink = metrics.get_sink()
+        metrics.enable(self.sink)
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracing = True
+        if self.sampler:
+            self.sampler.start()
+        self._start = time.perf_counter()
+        if self.profiler:
+            self.profiler.enable()
+        return self
+
+    def stop(self) -> Dict[str, str]:
+        """Stop profiling and write the files; returns kind -> path"""
+        if self.profiler:
+            self.profiler.disable()
+        elapsed = time.perf_counter() - self._start
+        if self.sampler:
+            self.sampler.stop()
+        traced = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+        if self._started_tracing:
+            tracemalloc.stop()
+        if self._previous_sink is not None:
+            metrics.enable(self._previous_sink)
+        else:
+            metrics.disable()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.sampler:
+            self.paths['folded'] = os.path.join(self.output_dir, 'profile.folded')
+            self.sampler.write_folded(self.paths['folded'])
+        if self.profiler:
+            self.paths['pstats'] = os.path.join(self.output_dir, 'profile.pstats')
+            self.profiler.dump_stats(self.paths['pstats'])
+        self.paths['stages'] = os.path.join(self.output_dir, 'stages.json')
+        with open(self.paths['stages'], 'w') as f:
+            json.dump({'elapsed_s': elapsed, 'mode': self.mode,
+                       'samples': self.sampler.samples if self.sampler else None,
+                       'traced_peak_bytes': traced[1] if traced else None,
+                       'stages': self.sink.stage_report(), 'counters': self.sink.snapshot()['counters']}, f, indent=2)
+        if self.sink.top_allocations:
+            self.paths['allocations'] = os.path.join(self.output_dir, 'allocations.txt')
+            with open(self.paths['allocations'], 'w') as f:
+                for stage, lines in self.sink.top_allocations.items():
+                    f.write(f"== {stage} (first run) ==\n")
+                    f.writelines(f"{line}\n" for line in lines)
+                    f.write("\n")
+        return self.paths
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        print(self.summary(), file=sys.stderr)
+        return False
+
+    def summary(self) -> str:
+        """Per-stage table and the files written"""
+        lines = [f"{'stage':<14} {'calls':>7} {'total':>10} {'max':>10} {'net MB':>8} {'peak MB':>8}"]
+        for stage, s in sorted(self.sink.stage_report().items(), key=lambda item: -item[1]['total_s']):
+            net = f"{s['net_bytes'] / 1e6:.2f}" if 'net_bytes' in s else '-'
+            peak = f"{s['peak_bytes'] / 1e6:.2f}" if 'peak_bytes' in s else '-'
+            lines.append(f"{stage:<14} {s['calls']:>7} {s['total_s']:>9.3f}s {s['max_s']:>9.4f}s {net:>8} {peak:>8}")
+        lines += [f"{kind}: {path}" for kind, path in self.paths.items()]
+        return "\n".join(lines)
+
+
+def profile(output_dir: str, mode: str = 'sample', memory: bool = True, interval: float = SAMPLE_INTERVAL) -> ProfileSession:
+    """Context manager profiling its body, see ProfileSession"""
+    return ProfileSession(output_dir, mode, memory, interval)
+
+def from_env():
+    """
+    profile() configured by LOCATION_WIZARD_PROFILE (output directory),
+    LOCATION_WIZARD_PROFILE_MODE and LOCATION_WIZARD_PROFILE_MEMORY=0; a
+    no-op context when LOCATION_WIZARD_PROFILE is not set
+    """
+    output_dir = os.environ.get('LOCATION_WIZARD_PROFILE')
+    if not output_dir:
+        return contextlib.nullcontext()
+    return profile(output_dir, os.environ.get('LOCATION_WIZARD_PROFILE_MODE', 'sample'),
+                   os.environ.get('LOCATION_WIZARD_PROFILE_MEMORY', '1') != '0')
+
+
+def profile_batch(n: int, data_dir: Optional[str] = None, compact: bool = False, seed: int = 0):
+    """Workload of the batch path: load the layers, then look up n random points in India"""
+    import random
+    import core
+    from synthetic_data import INDIA_EXTENT
+    core.clear_cache()
+    if data_dir:
+        core.load_shapefiles(data_dir)
+    rng = random.Random(seed)
+    min_x, min_y, max_x, max_y = INDIA_EXTENT
+    lats = [rng.uniform(min_y, max_y) for _ in range(n)]
+    lons = [rng.uniform(min_x, max_x) for _ in range(n)]
+    return core.get_location_properties_batch(lats, lons, compact=compact)
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a lookup workload or script by stage")
+    parser.add_argument('-o', '--output', default='profile',
+                        help="Directory for profile.folded / profile.pstats, stages.json, allocations.txt")
+    parser.add_argument('--mode', choices=MODES, default='sample')
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc")
+    parser.add_argument('--interval', type=float, default=SAMPLE_INTERVAL, help="Seconds between stack samples")
+    parser.add_argument('--batch', type=int, help="Profile get_location_properties_batch over this many points")
+    parser.add_argument('--compact', action='store_true', help="With --batch, return compact results")
+    parser.add_argument('--data-dir', help="With --batch, directory with the layer GeoJSON files")
+    parser.add_argument('script', nargs=argparse.REMAINDER, help="Python script to run under the profiler, and its arguments")
+    args = parser.parse_args()
+    if (args.batch is None) == (not args.script):
+        parser.error("give either --batch N or a script")
+
+    if args.batch is not None:
+        import core  # noqa: F401  (imported before tracing starts, so module loading stays out of the snapshots)
+    with profile(args.output, args.mode, not args.no_memory, args.interval):
+        if args.batch is not None:
+            profile_batch(args.batch, args.data_dir, args.compact)
+        else:
+            sys.argv = args.script
+            sys.path.insert(0, os.path.dirname(os.path.abspath(args.script[0])))
+            runpy.run_path(args.script[0], run_name='__main__')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Compact lookup results for Location Wizard
+A __slots__ record for single lookups and a struct-of-arrays batch with
+categorical strings; both read like the result dicts they replace
+
+Standard library only; ResultBatch columns are array.array buffers that
+numpy.frombuffer() can wrap without copying.
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping, Sequence as SequenceABC
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from engine import LAYER_FIELDS, OVERLAY, apply_layer, empty_result
+
+# Keys of a result dict, in order
+RESULT_FIELDS = ('lat', 'lon', 'seismic_zone', 'zone_factor', 'basic_wind_speed', 'place_name', 'state')
+
+# Stored as float64
+COORDINATE_FIELDS = ('lat', 'lon')
+
+# Stored as codes into a per-batch table of distinct values; zone factors
+# and wind speeds take a handful of values, so they are categories too
+CATEGORY_FIELDS = ('seismic_zone', 'zone_factor', 'basic_wind_speed', 'place_name', 'state')
+
+_DEFAULTS = empty_result(0.0, 0.0)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class LocationResult(Mapping):
+    """
+    One lookup result in a __slots__ record
+
+    Reads like the result dict (result['state'], .get(), .items(), == dict)
+    and exposes the fields as attributes; strings are interned, so equal
+    names share one object. to_dict() gives a plain, mutable dict.
+    """
+
+    __slots__ = RESULT_FIELDS
+
+    def __init__(self, lat: float, lon: float, seismic_zone: str = 'Unknown', zone_factor: Optional[float] = None,
+                 basic_wind_speed: Optional[float] = None, place_name: str = 'Unknown', state: str = 'Unknown'):
+        self.lat = lat
+        self.lon = lon
+        self.seismic_zone = _intern(seismic_zone)
+        self.zone_factor = zone_factor
+        self.basic_wind_speed = basic_wind_speed
+        self.place_name = _intern(place_name)
+        self.state = _intern(state)
+
+    @classmethod
+    def from_dict(cls, result: Dict) -> 'LocationResult':
+        """Record of a result dict; keys outside RESULT_FIELDS are not kept"""
+        return cls(*(result.get(field, _DEFAULTS[field]) for field in RESULT_FIELDS))
+
+    def __getitem__(self, key: str):
+        if key not in _DEFAULTS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(RESULT_FIELDS)
+
+    def __len__(self):
+        return len(RESULT_FIELDS)
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in RESULT_FIELDS}
+
+    def __repr__(self):
+        return f"LocationResult({', '.join(f'{f}={getattr(self, f)!r}' for f in RESULT_FIELDS)})"
+
+
+def _code_type(count: int) -> str:
+    """Smallest unsigned array typecode for count categories"""
+    return 'B' if count <= 0xFF else 'H' if count <= 0xFFFF else 'I'
+
+
+class ResultBatch(SequenceABC):
+    """
+    Struct-of-arrays lookup results
+
+    lat and lon are float64 arrays; every other field is an array of small
+    codes into a table of its distinct values, so a million results take
+    tens of MB instead of hundreds. Indexing gives LocationResult records;
+    to_dicts() gives the usual list of dicts.
+
+    Args:
+        columns: Field -> array for every field in RESULT_FIELDS, codes for
+            CATEGORY_FIELDS
+        categories: Category field -> distinct values, indexed by code
+    """
+
+    def __init__(self, columns: Dict[str, array], categories: Dict[str, List[str]]):
+        self.columns = columns
+        self.categories = categories
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict]) -> 'ResultBatch':
+        """Batch from result dicts or records"""
+        values = {field: [] for field in RESULT_FIELDS}
+        for result in results:
+            for field in RESULT_FIELDS:
+                values[field].append(result.get(field, _DEFAULTS[field]))
+        columns, categories = {}, {}
+        for field in COORDINATE_FIELDS:
+            columns[field] = array('d', values[field])
+        for field in CATEGORY_FIELDS:
+            codes = {}
+            for value in values[field]:
+                codes.setdefault(value, len(codes))
+            categories[field] = [_intern(value) for value in codes]
+            columns[field] = array(_code_type(len(codes)), map(codes.__getitem__, values[field]))
+        return cls(columns, categories)
+
+    @classmethod
+    def from_located(cls, located: Dict, inverse: Sequence[int], lats: Sequence[float],
+                     lons: Sequence[float]) -> 'ResultBatch':
+        """
+        Batch straight from LookupEngine.locate_many(), without result dicts
+
+        Args:
+            located: locate_many() over the unique points of a batch
+            inverse: Unique point of each input point (BatchPlan.inverse, or
+                range(n) when every point was looked up)
+            lats: Input latitudes
+            lons: Input longitudes
+        """
+        inverse = inverse.tolist() if hasattr(inverse, 'tolist') else inverse
+        # Field -> per unique point value index; value tables hold each
+        # distinct value once, with the 'no feature' default first
+        tables = {field: [_DEFAULTS[field]] for field in RESULT_FIELDS[2:]}
+        picks = {}
+        for name, (layer, found) in located.items():
+            if name == OVERLAY:
+                fields = RESULT_FIELDS[2:]
+            elif name in LAYER_FIELDS:
+                fields = LAYER_FIELDS[name]
+            else:
+                raise ValueError(f"Layer '{name}' has no compact result fields")
+            feature_values = {}
+            for i in set(found):
+                if i is not None:
+                    result = apply_layer(dict(_DEFAULTS), name, layer.properties[i])
+                    feature_values[i] = [result[field] for field in fields]
+            for k, field in enumerate(fields):
+                table = tables[field]
+                positions = {}
+                per_feature = {None: 0}
+                for i, values in feature_values.items():
+                    value = values[k]
+                    if value not in positions:
+                        positions[value] = len(table)
+                        table.append(value)
+                    per_feature[i] = positions[value]
+                picks[field] = [per_feature[i] for i in found]
+
+        columns = {'lat': array('d', map(float, lats)), 'lon': array('d', map(float, lons))}
+        categories = {}
+        for field in CATEGORY_FIELDS:
+            # Same value may come from several features; codes index distinct values
+            distinct = {}
+            table = [distinct.setdefault(value, len(distinct)) for value in tables[field]]
+            categories[field] = [_intern(value) for value in distinct]
+            column = array(_code_type(len(distinct)))
+            if field in picks:
+                per_point = [table[k] for k in picks[field]]
+                column.extend(per_point[u] for u in inverse)
+            else:
+                # No layer sets this field: every point keeps the default
+                column.extend([table[0]] * len(inverse))
+            columns[field] = column
+        return cls(columns, categories)
+
+    def __len__(self):
+        return len(self.columns['lat'])
+
+    def _value(self, field: str, i: int):
+        value = self.columns[field][i]
+        return self.categories[field][value] if field in self.categories else value
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return LocationResult(*(self._value(field, i) for field in RESULT_FIELDS))
+
+    def column(self, field: str) -> list:
+        """One field for every result, decoded as in the result dicts"""
+        if field in self.categories:
+            return list(map(self.categories[field].__getitem__, self.columns[field]))
+        return self.columns[field].tolist()
+
+    def to_dicts(self) -> List[Dict]:
+        """The results as the usual list of dicts"""
+        columns = [self.column(field) for field in RESULT_FIELDS]
+        return [dict(zip(RESULT_FIELDS, values)) for values in zip(*columns)]
+
+    def to_dataframe(self):
+        """pandas DataFrame with categorical text columns"""
+        import pandas as pd
+        data = {}
+        for field in RESULT_FIELDS:
+            names = self.categories.get(field)
+            if names is None:
+                data[field] = self.columns[field]
+            elif all(isinstance(name, str) for name in names):
+                data[field] = pd.Categorical.from_codes(list(self.columns[field]), names)
+            else:
+                data[field] = self.column(field)
+        return pd.DataFrame(data)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers and category tables"""
+        size = sum(column.itemsize * len(column) for column in self.columns.values())
+        return size + sum(sys.getsizeof(v) for names in self.categories.values() for v in names)
@@ -0,0 +1,462 @@
+"""
+Sharded lookups for Location Wizard
+Partitions the layers by state or by spatial tile so each node holds only
+its shard; a small router grid sends every coordinate to the shard that
+owns it, and batches are split across the shards
+
+Usage: python sharding.py OUTPUT_DIR [--shards 4] [--by state|tile] [--data-dir DIR]
+"""
+
+import argparse
+import collections
+import importlib.util
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import metrics
+from batch import hilbert_index
+from engine import LAYER_FILES, Layer, LookupEngine, empty_result, load_layers
+
+DEFAULT_SHARDS = 4
+
+# Degrees per side of a router cell; 0.25 gives ~14k cells over India
+CELL_SIZE = 0.25
+
+# Router file written next to the shard directories
+ROUTER_FILE = 'router.json'
+
+_HAVE_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+class ShardRouter:
+    """
+    Grid of cells over the layers' extent, each owned by one shard
+
+    A coordinate belongs to the shard owning its cell; coordinates outside
+    the grid are outside every layer and belong to no shard. The grid is a
+    couple of bytes per cell, so every node and client can keep one.
+
+    Args:
+        origin: (min_lon, min_lat) of the grid
+        cell_size: Cell side in degrees
+        cols: Cells per row
+        rows: Cells per column
+        owners: Shard of each cell, row by row from the south-west corner
+        labels: Optional description per shard, e.g. its states
+    """
+
+    def __init__(self, origin: Sequence[float], cell_size: float, cols: int, rows: int,
+                 owners: Sequence[int], labels: Optional[List[List[str]]] = None):
+        if len(owners) != cols * rows:
+            raise ValueError(f"Expected {cols * rows} cell owners, got {len(owners)}")
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.cell_size = float(cell_size)
+        self.cols = cols
+        self.rows = rows
+        self.owners = array('H', owners)
+        self.shards = max(self.owners) + 1 if self.owners else 0
+        self.labels = labels or [[] for _ in range(self.shards)]
+        self._owners_np = None
+
+    @property
+    def extent(self):
+        min_x, min_y = self.origin
+        return min_x, min_y, min_x + self.cols * self.cell_size, min_y + self.rows * self.cell_size
+
+    def cell(self, lat: float, lon: float) -> Optional[int]:
+        """Cell index of a coordinate, or None outside the grid"""
+        min_x, min_y, max_x, max_y = self.extent
+        if not (min_x <= lon <= max_x and min_y <= lat <= max_y):
+            return None
+        col = min(int((lon - min_x) / self.cell_size), self.cols - 1)
+        row = min(int((lat - min_y) / self.cell_size), self.rows - 1)
+        return row * self.cols + col
+
+    def shard_of(self, lat: float, lon: float) -> Optional[int]:
+        """Shard owning a coordinate, or None outside the grid"""
+        cell = self.cell(lat, lon)
+        return None if cell is None else self.owners[cell]
+
+    def cell_range(self, bbox):
+        """(col range, row range) of the cells a (min_lon, min_lat, max_lon, max_lat) box touches"""
+        min_x, min_y = self.origin
+        index = lambda value, low, limit: min(max(int(math.floor((value - low) / self.cell_size)), 0), limit - 1)
+        cols = range(index(bbox[0], min_x, self.cols), index(bbox[2], min_x, self.cols) + 1)
+        rows = range(index(bbox[1], min_y, self.rows), index(bbox[3], min_y, self.rows) + 1)
+        return cols, rows
+
+    def shards_touching(self, bbox) -> set:
+        """Shards owning a cell that a bounding box overlaps"""
+        cols, rows = self.cell_range(bbox)
+        owners = self.owners
+        return {owners[row * self.cols + col] for row in rows for col in cols}
+
+    def split(self, lats: Sequence[float], lons: Sequence[float]) -> Dict[Optional[int], Sequence[int]]:
+        """Positions of the points per shard; points outside the grid under None"""
+        if _HAVE_NUMPY:
+            return self._split_numpy(lats, lons)
+        groups = collections.defaultdict(list)
+        for i, (lat, lon) in enumerate(zip(lats, lons)):
+            groups[self.shard_of(float(lat), float(lon))].append(i)
+        return dict(groups)
+
+    def _split_numpy(self, lats, lons):
+        import numpy as np
+        if self._owners_np is None:
+            self._owners_np = np.frombuffer(self.owners, dtype=np.uint16)
+        lat = np.asarray(lats, dtype=float)
+        lon = np.asarray(lons, dtype=float)
+        min_x, min_y, max_x, max_y = self.extent
+        inside = (lon >= min_x) & (lon <= max_x) & (lat >= min_y) & (lat <= max_y)
+        cols = np.minimum(((lon[inside] - min_x) / self.cell_size).astype(np.int64), self.cols - 1)
+        rows = np.minimum(((lat[inside] - min_y) / self.cell_size).astype(np.int64), self.rows - 1)
+        positions = np.flatnonzero(inside)
+        shards = self._owners_np[rows * self.cols + cols]
+        groups = {}
+        order = np.argsort(shards, kind='stable')
+        shards, positions = shards[order], positions[order]
+        bounds = np.flatnonzero(np.diff(shards)) + 1
+        for chunk, owned in zip(np.split(positions, bounds), np.split(shards, bounds)):
+            if len(chunk):
+                groups[int(owned[0])] = chunk
+        outside = np.flatnonzero(~inside)
+        if len(outside):
+            groups[None] = outside
+        return groups
+
+    def to_dict(self) -> Dict:
+        """JSON-ready form, with the owners run-length encoded"""
+        runs = []
+        for owner in self.owners:
+            if runs and runs[-1][0] == owner:
+                runs[-1][1] += 1
+            else:
+                runs.append([owner, 1])
+        return {'origin': list(self.origin), 'cell_size': self.cell_size, 'cols': self.cols,
+                'rows': self.rows, 'owners': runs, 'labels': self.labels}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ShardRouter':
+        owners = [owner for owner, count in data['owners'] for _ in range(count)]
+        return cls(data['origin'], data['cell_size'], data['cols'], data['rows'], owners, data.get('labels'))
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str) -> 'ShardRouter':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _grid(layers: Dict[str, Layer], cell_size: float):
+    """(origin, cols, rows) of a cell grid covering every feature"""
+    bboxes = [bbox for layer in layers.values() for bbox in layer.bboxes]
+    if not bboxes:
+        raise ValueError("Cannot shard layers without features")
+    min_x = math.floor(min(b[0] for b in bboxes) / cell_size) * cell_size
+    min_y = math.floor(min(b[1] for b in bboxes) / cell_size) * cell_size
+    cols = max(1, math.ceil((max(b[2] for b in bboxes) - min_x) / cell_size))
+    rows = max(1, math.ceil((max(b[3] for b in bboxes) - min_y) / cell_size))
+    return (min_x, min_y), cols, rows
+
+def _cell_loads(layers: Dict[str, Layer], router: ShardRouter) -> List[int]:
+    """Per cell, 1 plus the number of features whose bounding box overlaps it"""
+    loads = [1] * (router.cols * router.rows)
+    for layer in layers.values():
+        for bbox in layer.bboxes:
+            cols, rows = router.cell_range(bbox)
+            for row in rows:
+                for col in cols:
+                    loads[row * router.cols + col] += 1
+    return loads
+
+def _tile_owners(router: ShardRouter, loads: List[int], shards: int) -> List[int]:
+    """Cells cut into shards of similar load along a Hilbert curve, so each shard is one compact region"""
+    order = max(1, math.ceil(math.log2(max(router.cols, router.rows))))
+    cells = sorted(range(len(loads)), key=lambda c: hilbert_index(c % router.cols, c // router.cols, order))
+    total = sum(loads)
+    owners = [0] * len(loads)
+    done = 0
+    for cell in cells:
+        owners[cell] = min(shards - 1, done * shards // total)
+        done += loads[cell]
+    return owners
+
+def _cell_states(layers: Dict[str, Layer], router: ShardRouter) -> List[str]:
+    """State of the admin feature at each cell centre; cells outside every state take the nearest state's"""
+    admin = layers.get('admin')
+    if admin is None or not any(p.get('STATE') for p in admin.properties):
+        raise ValueError("Sharding by state needs an admin layer with STATE properties")
+    min_x, min_y = router.origin
+    half = router.cell_size / 2
+    lats = [min_y + (c // router.cols) * router.cell_size + half for c in range(router.cols * router.rows)]
+    lons = [min_x + (c % router.cols) * router.cell_size + half for c in range(router.cols * router.rows)]
+    _, found = LookupEngine({'admin': admin}).locate_many(lats, lons)['admin']
+    states = [None if i is None else admin.properties[i].get('STATE') or None for i in found]
+
+    # Breadth-first fill from the cells that have a state
+    queue = collections.deque(c for c, state in enumerate(states) if state)
+    while queue:
+        cell = queue.popleft()
+        col, row = cell % router.cols, cell // router.cols
+        for dc, dr in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            c, r = col + dc, row + dr
+            if 0 <= c < router.cols and 0 <= r < router.rows and states[r * router.cols + c] is None:
+                states[r * router.cols + c] = states[cell]
+                queue.append(r * router.cols + c)
+    if not any(states):
+        raise ValueError("No router cell falls inside a state; try a smaller cell_size")
+    return states
+
+def partition(layers: Dict[str, Layer], shards: int = DEFAULT_SHARDS, by: str = 'state',
+              cell_size: float = CELL_SIZE) -> ShardRouter:
+    """
+    Router splitting the layers' extent into shards of similar load
+
+    Load is the number of features a cell overlaps, so dense admin areas
+    spread over more shards than open sea or large hazard zones.
+
+    Args:
+        layers: Layer name -> Layer, as returned by load_layers()
+        shards: Number of shards
+        by: 'state' keeps every state whole on one shard (states are packed
+            largest first onto the least loaded shard); 'tile' cuts the
+            grid into compact regions along a Hilbert curve
+        cell_size: Router cell side in degrees
+    """
+    if by not in ('state', 'tile'):
+        raise ValueError(f"Unknown partitioning '{by}', expected 'state' or 'tile'")
+    if shards < 1:
+        raise ValueError("Need at least one shard")
+    origin, cols, rows = _grid(layers, cell_size)
+    router = ShardRouter(origin, cell_size, cols, rows, [0] * (cols * rows))
+    loads = _cell_loads(layers, router)
+    if by == 'tile':
+        return ShardRouter(origin, cell_size, cols, rows, _tile_owners(router, loads, shards))
+
+    states = _cell_states(layers, router)
+    state_loads = collections.Counter()
+    for state, load in zip(states, loads):
+        state_loads[state] += load
+    shard_loads = [0] * shards
+    labels = [[] for _ in range(shards)]
+    shard_of_state = {}
+    for state, load in sorted(state_loads.items(), key=lambda item: (-item[1], item[0])):
+        shard = shard_loads.index(min(shard_loads))
+        shard_of_state[state] = shard
+        shard_loads[shard] += load
+        labels[shard].append(state)
+    return ShardRouter(origin, cell_size, cols, rows, [shard_of_state[s] for s in states], labels)
+
+def shard_layers(layers: Dict[str, Layer], router: ShardRouter) -> List[Dict[str, Layer]]:
+    """
+    Per shard, the features of each layer that overlap one of its cells
+
+    Features keep their layer order, so first-match precedence within a
+    shard is the same as over the full layer. Features crossing a shard
+    border are copied to both shards; layers with no feature in a shard
+    are left out of it.
+    """
+    result = [{} for _ in range(router.shards)]
+    for name, layer in layers.items():
+        parts = [Layer(name, []) for _ in range(router.shards)]
+        for i, bbox in enumerate(layer.bboxes):
+            for shard in router.shards_touching(bbox):
+                part = parts[shard]
+                part.properties.append(layer.properties[i])
+                part.geometries.append(layer.geometries[i])
+                part.rings.append(layer.rings[i])
+                part.bboxes.append(bbox)
+        for shard, part in enumerate(parts):
+            if len(part):
+                result[shard][name] = part
+    return result
+
+def write_shards(layers: Dict[str, Layer], router: ShardRouter, output_dir: str) -> List[str]:
+    """
+    Write the router and one directory of GeoJSON layers per shard
+
+    Each shard directory can be served on its own node, e.g. with
+    python daemon.py --data-dir OUTPUT_DIR/shard_00. Every LAYER_FILES layer
+    gets a file in every shard, empty where the shard has none of its
+    features, so a node never falls back to other layer files. Returns the
+    directories.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    router.save(os.path.join(output_dir, ROUTER_FILE))
+    names = list(LAYER_FILES) + [name for name in layers if name not in LAYER_FILES]
+    directories = []
+    for shard, shard_layer in enumerate(shard_layers(layers, router)):
+        directory = os.path.join(output_dir, f"shard_{shard:02d}")
+        os.makedirs(directory, exist_ok=True)
+        for name in names:
+            layer = shard_layer.get(name) or Layer(name, [])
+            features = [{"type": "Feature", "properties": p, "geometry": g}
+                        for p, g in zip(layer.properties, layer.geometries)]
+            with open(os.path.join(directory, LAYER_FILES.get(name, f"{name}.geojson")), 'w') as f:
+                json.dump({"type": "FeatureCollection", "features": features}, f, separators=(',', ':'))
+        directories.append(directory)
+    return directories
+
+
+class ShardedEngine:
+    """
+    lookup() / lookup_many() over shard nodes, with LookupEngine's result schema
+
+    Batches are split by the router and the sub-batches sent to their nodes
+    in parallel; points outside every shard get empty results.
+
+    Args:
+        router: ShardRouter the nodes were partitioned with
+        nodes: Shard -> anything with lookup_many(lats, lons): a
+            LookupEngine for a shard held in this process, or a
+            client.LocationClient for a daemon serving one shard directory
+        workers: Threads sending sub-batches (default: one per node)
+    """
+
+    def __init__(self, router: ShardRouter, nodes: Dict[int, object], workers: Optional[int] = None):
+        self.router = router
+        self.nodes = nodes
+        self._executor = ThreadPoolExecutor(max_workers=workers or max(1, len(nodes)),
+                                            thread_name_prefix='shard')
+
+    def _node(self, shard: Optional[int]):
+        return None if shard is None else self.nodes.get(shard)
+
+    def lookup(self, lat: float, lon: float) -> Dict:
+        """Seismic, wind and admin properties for one location"""
+        shard = self.router.shard_of(lat, lon)
+        node = self._node(shard)
+        if node is None:
+            return empty_result(lat, lon)
+        metrics.incr('shard_points', shard=str(shard))
+        return node.lookup_many([lat], [lon])[0]
+
+    def lookup_many(self, lats: Sequence[float], lons: Sequence[float]) -> List[Dict]:
+        """lookup() over a batch, one request per shard"""
+        results = [None] * len(lats)
+        requests = {}
+        for shard, positions in self.router.split(lats, lons).items():
+            node = self._node(shard)
+            if node is None:
+                for i in positions:
+                    results[i] = empty_result(float(lats[i]), float(lons[i]))
+                continue
+            metrics.incr('shard_points', len(positions), shard=str(shard))
+            sub_lats = [float(lats[i]) for i in positions]
+            sub_lons = [float(lons[i]) for i in positions]
+            requests[self._executor.submit(node.lookup_many, sub_lats, sub_lons)] = positions
+        for future, positions in requests.items():
+            for i, result in zip(positions, future.result()):
+                results[i] = result
+        return results
+
+    def close(self):
+        """Stop the worker threads and close node connections"""
+        self._executor.shutdown(wait=False)
+        for node in self.nodes.values():
+            if hasattr(node, 'close'):
+                node.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def local_engine(layers: Optional[Dict[str, Layer]] = None, shards: int = DEFAULT_SHARDS, by: str = 'state',
+                 backend: Optional[str] = None, cell_size: float = CELL_SIZE) -> ShardedEngine:
+    """ShardedEngine with every shard in this process, e.g. to check a partitioning"""
+    layers = layers if layers is not None else load_layers()
+    router = partition(layers, shards, by, cell_size)
+    nodes = {shard: LookupEngine(shard_layer, backend=backend)
+             for shard, shard_layer in enumerate(shard_layers(layers, router)) if shard_layer}
+    return ShardedEngine(router, nodes)
+
+
+class LocalCluster:
+    """
+    One daemon.py process per shard directory, each on its own Unix socket
+
+    Stands in for separate nodes: every shard lives in its own process
+    with its own memory, and lookups cross the same socket protocol a
+    remote node would be reached by.
+
+    Args:
+        shard_dir: Output directory of write_shards()
+        socket_dir: Directory for the sockets; a temp directory by default
+        timeout: Seconds to wait for the daemons to come up
+    """
+
+    def __init__(self, shard_dir: str, socket_dir: Optional[str] = None, timeout: float = 60.0):
+        from client import LocationClient
+
+        self.router = ShardRouter.load(os.path.join(shard_dir, ROUTER_FILE))
+        self.socket_dir = socket_dir or tempfile.mkdtemp(prefix='location_wizard_shards-')
+        daemon = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'daemon.py')
+        self.processes = {}
+        clients = {}
+        for shard in range(self.router.shards):
+            directory = os.path.join(shard_dir, f"shard_{shard:02d}")
+            if not os.path.isdir(directory) or not os.listdir(directory):
+                continue
+            path = os.path.join(self.socket_dir, f"shard_{shard:02d}.sock")
+            self.processes[shard] = subprocess.Popen([sys.executable, daemon, '--socket', path, '--data-dir', directory],
+                                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            clients[shard] = LocationClient(path, timeout=timeout)
+        self.engine = ShardedEngine(self.router, clients)
+        deadline = time.monotonic() + timeout
+        for shard, client in clients.items():
+            while not (os.path.exists(client.path) and client.ping()):
+                if self.processes[shard].poll() is not None or time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError(f"Shard {shard} daemon did not start")
+                time.sleep(0.05)
+
+    def close(self):
+        self.engine.close()
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition the layers into shards, one directory per node")
+    parser.add_argument('output_dir', help="Directory for router.json and the shard_NN directories")
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS)
+    parser.add_argument('--by', choices=('state', 'tile'), default='state')
+    parser.add_argument('--cell-size', type=float, default=CELL_SIZE, help="Router cell side in degrees")
+    parser.add_argument('--data-dir', help="Directory with the layer GeoJSON files")
+    args = parser.parse_args()
+
+    layers = load_layers(args.data_dir)
+    router = partition(layers, args.shards, args.by, args.cell_size)
+    directories = write_shards(layers, router, args.output_dir)
+    print(f"   Router: {router.cols} x {router.rows} cells -> {os.path.join(args.output_dir, ROUTER_FILE)}")
+    for shard, directory in enumerate(directories):
+        files = os.listdir(directory)
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in files)
+        states = f" ({', '.join(router.labels[shard])})" if router.labels[shard] else ''
+        print(f"   {directory}: {router.owners.count(shard)} cells, {size / 2**20:.1f} MB{states}")
+    print(f" Serve each shard with: python daemon.py --socket SHARD.sock --data-dir {directories[0]}")
+
+if __name__ == "__main__":
+    main()
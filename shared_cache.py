@@ -0,0 +1,189 @@
+"""
+Shared result cache for Location Wizard
+One SQLite file in WAL mode, shared by every process on a node, keyed by
+geohash cell and tagged with the data-layer version so entries stop matching
+as soon as a layer file changes
+
+Enable in core.py with LOCATION_WIZARD_CACHE=/path/to/cache.sqlite
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from engine import LAYER_FILES
+
+# Geohash length of a cache cell; 9 characters is about 5 m x 5 m, well
+# inside the accuracy of the digitized zone maps
+GEOHASH_PRECISION = 9
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# (path, size, mtime) -> content digest, so unchanged files are hashed once
+_file_digests = {}
+
+
+def geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Standard base-32 geohash of a point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+def geohash_bbox(cell: str) -> Tuple[float, float, float, float]:
+    """(min_lon, min_lat, max_lon, max_lat) of a geohash cell"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return lon_range[0], lat_range[0], lon_range[1], lat_range[1]
+
+def layers_version(data_dir: str, files: Optional[Iterable[str]] = None) -> str:
+    """Digest of the layer files in data_dir; changes whenever one of them does"""
+    digest = hashlib.sha1()
+    for name in sorted(files or LAYER_FILES.values()):
+        path = os.path.join(data_dir, name)
+        if not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if key not in _file_digests:
+            file_digest = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    file_digest.update(chunk)
+            _file_digests[key] = file_digest.hexdigest()
+        digest.update(f"{name}:{_file_digests[key]}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+class SharedCache:
+    """
+    Cross-process key-value cache in a SQLite WAL file
+
+    Entries are (kind, key) -> JSON value, stored under the cache's version;
+    entries written under another version are never returned. Each thread
+    gets its own connection.
+
+    Args:
+        path: SQLite file, created if missing
+        version: Data version, e.g. layers_version(data_dir)
+        precision: Geohash length used for point keys
+        max_age: Seconds after which entries are ignored; None keeps them
+            until the version changes
+    """
+
+    def __init__(self, path: str, version: str, precision: int = GEOHASH_PRECISION,
+                 max_age: Optional[float] = None):
+        self.path = path
+        self.version = version
+        self.precision = precision
+        self.max_age = max_age
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS entries (kind TEXT NOT NULL, key TEXT NOT NULL, version TEXT NOT NULL, "
+            "value TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (kind, key, version)) WITHOUT ROWID")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def cell(self, lat: float, lon: float) -> str:
+        """Cache key of the cell holding a point"""
+        return geohash(lat, lon, self.precision)
+
+    def get(self, kind: str, key: str) -> Optional[Dict]:
+        """Cached value, or None on a miss"""
+        row = self._connect().execute(
+            "SELECT value, created FROM entries WHERE kind = ? AND key = ? AND version = ?",
+            (kind, key, self.version)).fetchone()
+        if row is None or (self.max_age is not None and time.time() - row[1] > self.max_age):
+            return None
+        return json.loads(row[0])
+
+    def put(self, kind: str, key: str, value):
+        """Store a JSON-serializable value"""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (kind, key, version, value, created) VALUES (?, ?, ?, ?, ?)",
+            (kind, key, self.version, json.dumps(value), time.time()))
+
+    def get_point(self, kind: str, lat: float, lon: float) -> Optional[Dict]:
+        return self.get(kind, self.cell(lat, lon))
+
+    def put_point(self, kind: str, lat: float, lon: float, value):
+        self.put(kind, self.cell(lat, lon), value)
+
+    def prune(self) -> int:
+        """Delete entries of other versions (and expired ones); returns the count"""
+        connection = self._connect()
+        cursor = connection.execute("DELETE FROM entries WHERE version != ?", (self.version,))
+        removed = cursor.rowcount
+        if self.max_age is not None:
+            removed += connection.execute("DELETE FROM entries WHERE created < ?",
+                                          (time.time() - self.max_age,)).rowcount
+        return removed
+
+    def migrate(self, version: str, stale: Callable[[str, str], bool]) -> Tuple[int, int]:
+        """
+        Move entries to a new data version, dropping those stale(kind, key) flags
+
+        Used after an incremental layer update, so results outside the
+        changed areas stay cached; the cache then reads and writes the new
+        version.
+
+        Returns:
+            (entries kept, entries dropped)
+        """
+        connection = self._connect()
+        rows = connection.execute("SELECT kind, key FROM entries WHERE version = ?", (self.version,)).fetchall()
+        keep = [(version, kind, key, self.version) for kind, key in rows if not stale(kind, key)]
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Entries another process already wrote under the new version win
+            connection.executemany("UPDATE OR IGNORE entries SET version = ? WHERE kind = ? AND key = ? AND version = ?",
+                                   keep)
+            connection.execute("DELETE FROM entries WHERE version = ?", (self.version,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        self.version = version
+        return len(keep), len(rows) - len(keep)
+
+    def close(self):
+        """Close this thread's connection"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -6,116 +6,29 @@ Uses only Python standard library
 import json
 import os
 
-def point_in_polygon_simple(lat, lon, polygon_coords):
-    """
-    Simple point-in-polygon test using ray casting algorithm
-    polygon_coords: list of [lon, lat] coordinate pairs
-    """
-    x, y = lon, lat
-    n = len(polygon_coords)
-    inside = False
-    
-    p1x, p1y = polygon_coords[0]
-    for i in range(1, n + 1):
-        p2x, p2y = polygon_coords[i % n]
-        if y > min(p1y, p2y):
-            if y <= max(p1y, p2y):
-                if x <= max(p1x, p2x):
-                    if p1y != p2y:
-                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                    if p1x == p2x or x <= xinters:
-                        inside = not inside
-        p1x, p1y = p2x, p2y
-    
-    return inside
+import profiling
+
+from engine import DATA_DIR, LAYER_FILES, get_engine
+from geometry import point_in_polygon_simple, points_in_polygon_vectorized, polygon_edges  # noqa: F401
 
 def load_zone_data():
-    """Load zone data from JSON files"""
-    data_dir = os.path.join(os.path.dirname(__file__), 'data')
-    
-    # Load seismic zones
-    seismic_file = os.path.join(data_dir, 'seismic_zones.geojson')
-    seismic_data = None
-    if os.path.exists(seismic_file):
-        with open(seismic_file, 'r') as f:
-            seismic_data = json.load(f)
-    
-    # Load wind zones
-    wind_file = os.path.join(data_dir, 'wind_zones.geojson')
-    wind_data = None
-    if os.path.exists(wind_file):
-        with open(wind_file, 'r') as f:
-            wind_data = json.load(f)
-    
-    return seismic_data, wind_data
+    """Load the raw seismic and wind GeoJSON (None for a missing file)"""
+    collections = []
+    for name in ('seismic', 'wind'):
+        path = os.path.join(DATA_DIR, LAYER_FILES[name])
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                collections.append(json.load(f))
+        else:
+            collections.append(None)
+    return tuple(collections)
 
 def get_location_properties_standalone(lat, lon):
     """
-    Get location properties using only standard library
+    Get location properties using the shared lookup engine
+    Falls back to pure Python ray casting when shapely/numpy are missing
     """
-    seismic_data, wind_data = load_zone_data()
-    
-    # Zone factors from IS 1893
-    zone_factors = {
-        "II": 0.10,
-        "III": 0.16,
-        "IV": 0.24,
-        "V": 0.36
-    }
-    
-    # Initialize result
-    result = {
-        "lat": lat,
-        "lon": lon,
-        "seismic_zone": "Unknown",
-        "zone_factor": None,
-        "basic_wind_speed": None,
-        "place_name": "Unknown",
-        "state": "Unknown"
-    }
-    
-    # Check seismic zones
-    if seismic_data:
-        for feature in seismic_data.get('features', []):
-            geometry = feature.get('geometry', {})
-            if geometry.get('type') == 'Polygon':
-                coords = geometry.get('coordinates', [[]])[0]  # Get exterior ring
-                if point_in_polygon_simple(lat, lon, coords):
-                    zone = feature.get('properties', {}).get('zone', 'Unknown')
-                    result["seismic_zone"] = zone
-                    result["zone_factor"] = zone_factors.get(zone)
-                    break
-    
-    # Check wind zones
-    if wind_data:
-        for feature in wind_data.get('features', []):
-            geometry = feature.get('geometry', {})
-            if geometry.get('type') == 'Polygon':
-                coords = geometry.get('coordinates', [[]])[0]  # Get exterior ring
-                if point_in_polygon_simple(lat, lon, coords):
-                    wind_speed = feature.get('properties', {}).get('Vb')
-                    if wind_speed:
-                        result["basic_wind_speed"] = float(wind_speed)
-                    break
-    
-    # Simple place name lookup for major cities
-    major_cities = {
-        "Delhi": {"lat_range": (28.4, 28.9), "lon_range": (76.8, 77.3), "state": "Delhi"},
-        "Mumbai": {"lat_range": (18.9, 19.3), "lon_range": (72.7, 73.0), "state": "Maharashtra"},
-        "Chennai": {"lat_range": (12.9, 13.2), "lon_range": (80.1, 80.4), "state": "Tamil Nadu"},
-        "Kolkata": {"lat_range": (22.4, 22.7), "lon_range": (88.2, 88.5), "state": "West Bengal"},
-        "Bangalore": {"lat_range": (12.8, 13.1), "lon_range": (77.4, 77.8), "state": "Karnataka"}
-    }
-    
-    for city, bounds in major_cities.items():
-        lat_min, lat_max = bounds["lat_range"]
-        lon_min, lon_max = bounds["lon_range"]
-        if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max:
-            result["place_name"] = city
-            result["state"] = bounds["state"]
-            break
-    
-    return result
+    return get_engine().lookup(lat, lon)
 
 def demo_locations():
     """Test the location wizard with known coordinates"""
@@ -207,7 +120,9 @@ def interactive_test():
     print("\n Goodbye!")
 
 if __name__ == "__main__":
-    demo_locations()
+    # Set LOCATION_WIZARD_PROFILE=DIR to profile the demo run (see profiling.py)
+    with profiling.from_env():
+        demo_locations()
     
     # Ask if user wants interactive mode
     try:
@@ -7,7 +7,9 @@ import streamlit as st
 import folium
 from streamlit_folium import st_folium
 import pandas as pd
-from core import get_location_properties, search_location, get_nearby_cities, get_reverse_geocoding, get_search_suggestions
+import nominatim
+from core import get_location_properties, search_location, get_nearby_cities, get_address, get_search_suggestions
+from design import wind_class as classify_wind
 
 # Page configuration
 st.set_page_config(
@@ -117,7 +119,7 @@ with col1:
     search_query = st.text_input(
         "Search Location",
         placeholder="🏙️ Enter city name (e.g., 'Delhi') or coordinates (e.g., '28.6139, 77.2090')",
-        help="Search by address, landmark, or coordinates (latitude, longitude)",
+        help="Search by address, landmark, or coordinates: decimal or DMS lat/lon, UTM (43Q 276689 2110589), Plus Code or SoI toposheet (53H/13)",
         label_visibility="collapsed"
     )
 
@@ -261,6 +263,8 @@ if search_button and search_query:
             st.session_state.search_performed = True
             st.session_state.search_result = search_result
             st.success(f"✅ **Found:** {search_result['display_name']}")
+            if search_result.get('offline'):
+                st.caption("OpenStreetMap is unavailable; position taken from the offline gazetteer")
         else:
             st.error("❌ **Location not found.** Try different keywords or check spelling.")
 
@@ -363,14 +367,8 @@ with col2:
             # Get comprehensive location properties
             props = get_location_properties(lat, lon)
             
-            # Enhanced reverse geocoding
-            if auto_geocode:
-                try:
-                    place_name = get_reverse_geocoding(lat, lon)
-                    if place_name and len(place_name) > len(props.get('place_name', '')):
-                        props['place_name'] = place_name
-                except:
-                    pass
+            # Offline address; Nominatim only adds its display name
+            props['address'] = get_address(lat, lon, enrich=auto_geocode)
             
             # Store results in session
             st.session_state.location_props = props
@@ -430,21 +428,7 @@ with col2:
             st.success(f"💨 **Basic Wind Speed (Vb):** {wind_speed} m/s")
             
             # Wind classification with detailed categories
-            if wind_speed >= 50:
-                wind_class = "🌪️ Very High - Cyclonic Areas"
-                wind_color = "🔴"
-            elif wind_speed >= 47:
-                wind_class = "🌊 High - Coastal Regions"  
-                wind_color = "🟠"
-            elif wind_speed >= 44:
-                wind_class = "🌾 Moderate - Plains & Valleys"
-                wind_color = "🟡"
-            elif wind_speed >= 39:
-                wind_class = "🏔️ Low - Hilly Regions"
-                wind_color = "🟢"
-            else:
-                wind_class = "🛡️ Very Low - Protected Areas"
-                wind_color = "🔵"
+            wind_class, wind_color = classify_wind(wind_speed)
             
             st.info(f"{wind_color} **Classification:** {wind_class}")
             st.caption("Based on IS 875 Part 3:2015 - Wind Loads")
@@ -455,11 +439,18 @@ with col2:
         st.markdown("### 🏛️ Administrative Details")
         place_name = props.get('place_name', 'Unknown')
         state = props.get('state', 'Unknown')
+        address = props.get('address') or {}
         
+        if address.get('locality'):
+            st.info(f"🏘️ **Nearest {address['locality_type']}:** {address['locality']} ({address['locality_distance_km']:.1f} km)")
         if place_name != 'Unknown':
-            st.info(f"📍 **Location:** {place_name}")
+            st.info(f"📍 **Nearest place:** {place_name}")
         if state != 'Unknown':
             st.info(f"🗺️ **State/UT:** {state}")
+        if address.get('osm_display_name'):
+            st.caption(f"OpenStreetMap: {address['osm_display_name']}")
+        elif 'osm_display_name' in address and not nominatim.available():
+            st.caption("OpenStreetMap is unavailable; showing the offline address")
         
         # Nearby cities analysis
         if show_nearby:
@@ -488,7 +479,7 @@ with col2:
 Coordinates: {props['lat']:.6f}°N, {props['lon']:.6f}°E
 Seismic Zone: {seismic_zone} (Factor: {zone_factor or 'N/A'})
 Wind Speed: {wind_speed or 'N/A'} m/s
-Location: {place_name}, {state}
+Location: {address.get('display_name') or f'{place_name}, {state}'}
 Analysis Date: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')}"""
                 st.code(summary, language="text")
         
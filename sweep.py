@@ -0,0 +1,441 @@
+"""
+Grid sweeps for Location Wizard
+Evaluates zone attributes on a regular lon/lat grid over a bounding box,
+tile by tile in a process pool, and streams the bands to NumPy (.npy),
+GeoTIFF (.tif, needs rasterio) or Parquet (.parquet, needs pyarrow)
+
+Memory use depends on the tile size and worker count, not the bbox.
+
+Usage: python sweep.py OUTPUT --bbox 72.6 15.6 80.9 22.1 --resolution 0.001 [--workers 4]
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import profiling
+from engine import BACKENDS, LAYER_FIELDS, Layer, apply_layer, empty_result, load_layers
+from geometry import EARTH_RADIUS_KM, polygon_edges
+
+# Bands written when none are given
+DEFAULT_BANDS = ('seismic_zone', 'zone_factor', 'basic_wind_speed')
+
+# Pixels per tile side
+TILE_SIZE = 512
+
+# Result field -> layer that sets it
+FIELD_LAYERS = {field: name for name, fields in LAYER_FIELDS.items() for field in fields}
+
+# Per-worker state set by _init_worker()
+_worker = None
+
+
+def metres_to_degrees(metres: float) -> float:
+    """Grid step in degrees of latitude for a resolution in metres"""
+    return metres / (EARTH_RADIUS_KM * 1000 * math.pi / 180)
+
+
+class GridSpec:
+    """
+    North-up grid of pixel centres over a bbox
+
+    Args:
+        bbox: (min_lon, min_lat, max_lon, max_lat); the grid starts at the
+            north-west corner and is extended to whole pixels
+        resolution: Pixel size in degrees
+    """
+
+    def __init__(self, bbox: Sequence[float], resolution: float):
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox)
+        if resolution <= 0 or max_lon <= min_lon or max_lat <= min_lat:
+            raise ValueError("Need a positive resolution and a non-empty bbox")
+        self.min_lon, self.max_lat = min_lon, max_lat
+        self.resolution = float(resolution)
+        self.width = math.ceil(round((max_lon - min_lon) / resolution, 9))
+        self.height = math.ceil(round((max_lat - min_lat) / resolution, 9))
+
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        return (self.min_lon, self.max_lat - self.height * self.resolution,
+                self.min_lon + self.width * self.resolution, self.max_lat)
+
+    def lons(self, col: int, count: int) -> np.ndarray:
+        return self.min_lon + (np.arange(col, col + count) + 0.5) * self.resolution
+
+    def lats(self, row: int, count: int) -> np.ndarray:
+        return self.max_lat - (np.arange(row, row + count) + 0.5) * self.resolution
+
+    def tile_bbox(self, tile: Tuple[int, int, int, int]) -> Tuple[float, float, float, float]:
+        """(min_lon, min_lat, max_lon, max_lat) of a (row, col, rows, cols) window"""
+        row, col, rows, cols = tile
+        max_lat = self.max_lat - row * self.resolution
+        min_lon = self.min_lon + col * self.resolution
+        return min_lon, max_lat - rows * self.resolution, min_lon + cols * self.resolution, max_lat
+
+    def tiles(self, tile_size: int = TILE_SIZE) -> Iterator[Tuple[int, int, int, int]]:
+        """(row, col, rows, cols) windows covering the grid, row-major"""
+        for row in range(0, self.height, tile_size):
+            for col in range(0, self.width, tile_size):
+                yield row, col, min(tile_size, self.height - row), min(tile_size, self.width - col)
+
+
+class _LayerRaster:
+    """Feature codes of one layer over tiles, by scanline fill or point lookups"""
+
+    def __init__(self, layer: Layer, method: str, backend: Optional[str]):
+        self.layer = layer
+        self.method = method
+        self.bboxes = np.asarray(layer.bboxes, dtype=float).reshape(-1, 4)
+        if method == 'lookup':
+            self.index = BACKENDS[backend or 'python'](layer)
+        else:
+            self.edges = [None] * len(layer.rings)
+
+    def codes(self, spec: GridSpec, row: int, col: int, rows: int, cols: int) -> np.ndarray:
+        """First matching feature index per pixel, -1 outside every feature"""
+        lats, lons = spec.lats(row, rows), spec.lons(col, cols)
+        if self.method == 'lookup':
+            grid_lon, grid_lat = np.meshgrid(lons, lats)
+            found = self.index.locate_many(grid_lon.ravel(), grid_lat.ravel())
+            return np.fromiter((-1 if i is None else i for i in found), dtype=np.int32, count=rows * cols).reshape(rows, cols)
+
+        out = np.full((rows, cols), -1, dtype=np.int32)
+        hits = np.nonzero((self.bboxes[:, 0] <= lons[-1]) & (self.bboxes[:, 2] >= lons[0]) &
+                          (self.bboxes[:, 1] <= lats[0]) & (self.bboxes[:, 3] >= lats[-1]))[0]
+        for i in hits.tolist():
+            if self.edges[i] is None:
+                self.edges[i] = polygon_edges(self.layer.rings[i])
+            inside = scanline_fill(self.edges[i], lats[::-1], lons[0] - 0.5 * spec.resolution, spec.resolution, cols)[::-1]
+            # First match wins, as in the engine
+            out[inside & (out < 0)] = i
+        return out
+
+
+def scanline_fill(edges, ys, x0: float, step: float, cols: int) -> np.ndarray:
+    """
+    Even-odd fill of a feature on a row of pixel centres per y
+
+    Uses the crossing rule of point_in_polygon_simple() at pixel centres
+    x0 + (c + 0.5) * step, so the result matches point lookups.
+
+    Args:
+        edges: Edge arrays from polygon_edges()
+        ys: Ascending row latitudes
+        x0: Western edge of the first column
+        step: Column width
+        cols: Number of columns
+
+    Returns:
+        (len(ys), cols) boolean array
+    """
+    x1, y1, dx, dy, y_min, y_max = edges
+    rows = len(ys)
+    starts = np.searchsorted(ys, y_min, side='right')
+    stops = np.searchsorted(ys, y_max, side='right')
+    spans = stops - starts
+    active = np.nonzero(spans > 0)[0]
+    if not len(active):
+        return np.zeros((rows, cols), dtype=bool)
+
+    # One crossing per (edge, row) pair in the edge's latitude band
+    edge = np.repeat(active, spans[active])
+    offsets = np.arange(len(edge)) - np.repeat(np.cumsum(spans[active]) - spans[active], spans[active])
+    row = starts[edge] + offsets
+    x = (ys[row] - y1[edge]) * dx[edge] / dy[edge] + x1[edge]
+
+    # Inside between crossing pairs: x_2k < px <= x_2k+1
+    order = np.lexsort((x, row))
+    row, x = row[order], x[order]
+    first = np.floor((x[0::2] - x0) / step - 0.5).astype(np.int64) + 1
+    last = np.floor((x[1::2] - x0) / step - 0.5).astype(np.int64) + 1
+    width = cols + 1
+    base = row[0::2] * width
+    diff = np.bincount(base + np.clip(first, 0, cols), minlength=rows * width) - \
+        np.bincount(base + np.clip(last, 0, cols), minlength=rows * width)
+    return np.cumsum(diff.reshape(rows, width)[:, :cols], axis=1) > 0
+
+
+def band_tables(layers: Dict[str, Layer], bands: Sequence[str]) -> Dict[str, Tuple[np.ndarray, Optional[List[str]]]]:
+    """
+    Per band, a value per feature code and the category names of text bands
+
+    The last entry of each table is the value outside every feature, so
+    code -1 indexes it directly. Numeric bands are float32 with NaN for
+    missing values; text bands hold category codes.
+    """
+    tables = {}
+    for band in bands:
+        if band not in FIELD_LAYERS:
+            raise ValueError(f"Unknown band '{band}', expected one of {sorted(FIELD_LAYERS)}")
+        name = FIELD_LAYERS[band]
+        if name not in layers:
+            raise ValueError(f"Band '{band}' needs the '{name}' layer")
+        values = [apply_layer(empty_result(0.0, 0.0), name, props)[band] for props in layers[name].properties]
+        values.append(empty_result(0.0, 0.0)[band])
+        if all(v is None or isinstance(v, (int, float)) for v in values):
+            tables[band] = (np.asarray([np.nan if v is None else v for v in values], dtype=np.float32), None)
+        else:
+            categories = sorted({str(v) for v in values})
+            lookup = {c: k for k, c in enumerate(categories)}
+            tables[band] = (np.asarray([lookup[str(v)] for v in values], dtype=np.float32), categories)
+    return tables
+
+
+def _init_worker(layers, bands, spec, method, backend):
+    global _worker
+    _worker = {
+        'spec': spec,
+        'bands': bands,
+        'tables': band_tables(layers, bands),
+        'rasters': {name: _LayerRaster(layers[name], method, backend) for name in {FIELD_LAYERS[b] for b in bands}}
+    }
+
+def _sweep_tile(tile) -> np.ndarray:
+    """(bands, rows, cols) float32 values of one tile in the current worker"""
+    state = _worker
+    codes = {name: raster.codes(state['spec'], *tile) for name, raster in state['rasters'].items()}
+    return np.stack([state['tables'][band][0][codes[FIELD_LAYERS[band]]] for band in state['bands']])
+
+def sweep_tiles(spec: GridSpec, layers: Dict[str, Layer], bands: Sequence[str] = DEFAULT_BANDS,
+                tile_size: int = TILE_SIZE, workers: Optional[int] = None, method: str = 'rasterize',
+                backend: Optional[str] = None,
+                tiles: Optional[Sequence[Tuple[int, int, int, int]]] = None) -> Iterator[Tuple[Tuple[int, int, int, int], np.ndarray]]:
+    """
+    Evaluate the grid tile by tile
+
+    Args:
+        spec: Grid to evaluate
+        layers: Layer name -> Layer
+        bands: Result fields to evaluate
+        tile_size: Pixels per tile side
+        workers: Worker processes; 1 runs in-process, None uses os.cpu_count()
+        method: 'rasterize' (scanline fill) or 'lookup' (engine backend
+            containment at every pixel centre)
+        backend: Engine backend for method='lookup'
+        tiles: Windows to evaluate; every tile of the grid by default
+
+    Yields:
+        ((row, col, rows, cols), values) in row-major tile order, with values
+        a (bands, rows, cols) float32 array; at most 2 tiles per worker are
+        in flight
+    """
+    if method not in ('rasterize', 'lookup'):
+        raise ValueError(f"Unknown method '{method}', expected 'rasterize' or 'lookup'")
+    bands = tuple(bands)
+    tiles = spec.tiles(tile_size) if tiles is None else tiles
+    workers = workers or os.cpu_count() or 1
+    init_args = (layers, bands, spec, method, backend)
+    if workers == 1:
+        _init_worker(*init_args)
+        for tile in tiles:
+            yield tile, _sweep_tile(tile)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+        pending = deque()
+        for tile in tiles:
+            pending.append((tile, pool.submit(_sweep_tile, tile)))
+            if len(pending) >= 2 * workers:
+                tile, future = pending.popleft()
+                yield tile, future.result()
+        while pending:
+            tile, future = pending.popleft()
+            yield tile, future.result()
+
+
+class _NumpyWriter:
+    def __init__(self, path, spec, bands, categories, update=False):
+        if update:
+            self.array = np.load(path, mmap_mode='r+')
+        else:
+            self.array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                                   shape=(len(bands), spec.height, spec.width))
+
+    def write(self, tile, values):
+        row, col, rows, cols = tile
+        self.array[:, row:row + rows, col:col + cols] = values
+
+    def close(self):
+        self.array.flush()
+        del self.array
+
+
+class _GeoTiffWriter:
+    def __init__(self, path, spec, bands, categories, update=False):
+        import rasterio
+        from rasterio.transform import from_origin
+        from rasterio.windows import Window
+
+        self._window = Window
+        if update:
+            self.dataset = rasterio.open(path, 'r+')
+            return
+        self.dataset = rasterio.open(
+            path, 'w', driver='GTiff', width=spec.width, height=spec.height, count=len(bands),
+            dtype='float32', crs='EPSG:4326', nodata=float('nan'), compress='deflate', tiled=True,
+            transform=from_origin(spec.min_lon, spec.max_lat, spec.resolution, spec.resolution))
+        for k, band in enumerate(bands, start=1):
+            self.dataset.set_band_description(k, band)
+        self.dataset.update_tags(categories=json.dumps(categories))
+
+    def write(self, tile, values):
+        row, col, rows, cols = tile
+        self.dataset.write(values, window=self._window(col, row, cols, rows))
+
+    def close(self):
+        self.dataset.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path, spec, bands, categories):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.spec = spec
+        self.bands = bands
+        self.categories = {band: pa.array(names) for band, names in categories.items()}
+        fields = [pa.field('lat', pa.float64()), pa.field('lon', pa.float64())]
+        for band in bands:
+            kind = pa.dictionary(pa.int32(), pa.string()) if band in categories else pa.float32()
+            fields.append(pa.field(band, kind))
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, tile, values):
+        pa = self.pa
+        row, col, rows, cols = tile
+        lon, lat = np.meshgrid(self.spec.lons(col, cols), self.spec.lats(row, rows))
+        columns = [pa.array(lat.ravel()), pa.array(lon.ravel())]
+        for band, data in zip(self.bands, values):
+            data = data.ravel()
+            if band in self.categories:
+                columns.append(pa.DictionaryArray.from_arrays(pa.array(data.astype(np.int32)), self.categories[band]))
+            else:
+                columns.append(pa.array(data, from_pandas=True))
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {'.npy': _NumpyWriter, '.tif': _GeoTiffWriter, '.tiff': _GeoTiffWriter, '.parquet': _ParquetWriter}
+
+
+def sweep(path: str, bbox: Sequence[float], resolution: float, bands: Sequence[str] = DEFAULT_BANDS,
+          layers: Optional[Dict[str, Layer]] = None, data_dir: Optional[str] = None, **kwargs) -> GridSpec:
+    """
+    Evaluate a grid and stream it to disk
+
+    The output format follows the extension of path (.npy, .tif/.tiff or
+    .parquet). Raster outputs hold one float32 band per field, NaN where a
+    numeric field is missing, and category codes for text fields; a JSON
+    sidecar (path + '.json') records the grid and the category names.
+
+    Args:
+        path: Output file
+        bbox: (min_lon, min_lat, max_lon, max_lat)
+        resolution: Pixel size in degrees, see metres_to_degrees()
+        bands: Result fields to write
+        layers: Layer name -> Layer; loaded from data_dir by default
+        data_dir: Directory with the layer GeoJSON files
+        **kwargs: tile_size, workers, method and backend for sweep_tiles()
+
+    Returns:
+        The GridSpec that was written
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unknown output format '{extension}', expected one of {sorted(WRITERS)}")
+    layers = layers if layers is not None else load_layers(data_dir)
+    spec = GridSpec(bbox, resolution)
+    bands = tuple(bands)
+    categories = {band: names for band, (_, names) in band_tables(layers, bands).items() if names is not None}
+
+    writer = WRITERS[extension](path, spec, bands, categories)
+    try:
+        for tile, values in sweep_tiles(spec, layers, bands, **kwargs):
+            writer.write(tile, values)
+    finally:
+        writer.close()
+
+    if extension != '.parquet':
+        with open(path + '.json', 'w') as f:
+            json.dump({'bbox': spec.bbox, 'resolution': spec.resolution, 'width': spec.width,
+                       'height': spec.height, 'bands': list(bands), 'categories': categories}, f, indent=2)
+    return spec
+
+def update_sweep(path: str, changed: Callable[[Tuple[float, float, float, float]], bool],
+                 layers: Optional[Dict[str, Layer]] = None, data_dir: Optional[str] = None, **kwargs) -> int:
+    """
+    Re-evaluate, in place, only the tiles of a sweep() output where layers changed
+
+    Works on .npy and GeoTIFF outputs and their JSON sidecar; Parquet files
+    cannot be patched, and a change in a text band's category names
+    renumbers its codes, so both need a new sweep().
+
+    Args:
+        path: Output of an earlier sweep()
+        changed: Called with each tile's bbox; True if results may differ
+            there, e.g. lambda bbox: layer_diff.affected(diffs, bbox)
+        layers: Layer name -> Layer after the change; loaded from data_dir
+            by default
+        data_dir: Directory with the layer GeoJSON files
+        **kwargs: tile_size, workers, method and backend for sweep_tiles()
+
+    Returns:
+        Number of tiles rewritten
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.npy', '.tif', '.tiff'):
+        raise ValueError(f"Cannot update '{extension}' outputs in place, run sweep() again")
+    with open(path + '.json') as f:
+        meta = json.load(f)
+    layers = layers if layers is not None else load_layers(data_dir)
+    spec = GridSpec(meta['bbox'], meta['resolution'])
+    bands = tuple(meta['bands'])
+    categories = {band: names for band, (_, names) in band_tables(layers, bands).items() if names is not None}
+    if categories != meta['categories']:
+        raise ValueError("Category names changed, run sweep() again")
+
+    tiles = [tile for tile in spec.tiles(kwargs.pop('tile_size', TILE_SIZE)) if changed(spec.tile_bbox(tile))]
+    if tiles:
+        writer = WRITERS[extension](path, spec, bands, categories, update=True)
+        try:
+            for tile, values in sweep_tiles(spec, layers, bands, tiles=tiles, **kwargs):
+                writer.write(tile, values)
+        finally:
+            writer.close()
+    return len(tiles)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a zone grid for a bounding box")
+    parser.add_argument('output', help="Output file (.npy, .tif or .parquet)")
+    parser.add_argument('--bbox', type=float, nargs=4, required=True, metavar=('MIN_LON', 'MIN_LAT', 'MAX_LON', 'MAX_LAT'))
+    resolution = parser.add_mutually_exclusive_group(required=True)
+    resolution.add_argument('--resolution', type=float, help="Pixel size in degrees")
+    resolution.add_argument('--resolution-m', type=float, help="Pixel size in metres (of latitude)")
+    parser.add_argument('--bands', nargs='+', default=list(DEFAULT_BANDS), choices=sorted(FIELD_LAYERS))
+    parser.add_argument('--data-dir', help="Directory with the layer GeoJSON files")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE)
+    parser.add_argument('--method', choices=('rasterize', 'lookup'), default='rasterize')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # LOCATION_WIZARD_PROFILE=DIR profiles the parent process; use --workers 1 to see the tile work
+    with profiling.from_env():
+        spec = sweep(args.output, args.bbox, args.resolution or metres_to_degrees(args.resolution_m), args.bands,
+                     data_dir=args.data_dir, tile_size=args.tile_size, workers=args.workers, method=args.method)
+    print(f"   {spec.width} x {spec.height} pixels, {len(args.bands)} bands -> {args.output}")
+    print(f" Swept in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Synthetic SoI-scale zone layers for load testing Location Wizard
+Generates admin, seismic and wind GeoJSON in the bundled schema using only
+the Python standard library
+
+Usage: python synthetic_data.py OUTPUT_DIR [--admin-cells 20000] [--seed 1893]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from typing import Dict, List, Tuple
+
+# Bounding box of the bundled layers (min_lon, min_lat, max_lon, max_lat)
+INDIA_EXTENT = (68.0, 6.0, 97.0, 37.0)
+
+SEISMIC_ZONES = ["II", "III", "IV", "V"]
+WIND_SPEEDS = [33, 39, 44, 47, 50, 55]
+
+_CRS = {"type": "name", "properties": {"name": "urn:ogc:def:crs:OGC:1.3:CRS84"}}
+
+
+class Tessellation:
+    """
+    Jittered lattice of quadrilateral cells with wiggly shared edges
+
+    Every lattice edge is subdivided once and cached, so the two cells on
+    either side of it get exactly the same vertices (in opposite order).
+    """
+
+    def __init__(self, nx: int, ny: int, extent: Tuple[float, float, float, float],
+                 vertices_per_edge: int, seed: int, jitter: float = 0.25, wiggle: float = 0.08):
+        self.nx, self.ny = nx, ny
+        self.vertices_per_edge = max(1, vertices_per_edge)
+        self.seed = seed
+        self.wiggle = wiggle
+        min_x, min_y, max_x, max_y = extent
+        self.dx = (max_x - min_x) / nx
+        self.dy = (max_y - min_y) / ny
+
+        rng = random.Random(seed)
+        self.nodes = []
+        for j in range(ny + 1):
+            for i in range(nx + 1):
+                x, y = min_x + i * self.dx, min_y + j * self.dy
+                # Keep the outer frame straight so layers tile the extent exactly
+                if 0 < i < nx:
+                    x += rng.uniform(-jitter, jitter) * self.dx
+                if 0 < j < ny:
+                    y += rng.uniform(-jitter, jitter) * self.dy
+                self.nodes.append((x, y))
+        self._edges = {}
+
+    def node(self, i: int, j: int) -> int:
+        return j * (self.nx + 1) + i
+
+    def _edge_points(self, key: Tuple[int, int]) -> List[Tuple[float, float]]:
+        """Vertices from the lower node of an edge up to (excluding) the higher one"""
+        points = self._edges.get(key)
+        if points is None:
+            (ax, ay), (bx, by) = self.nodes[key[0]], self.nodes[key[1]]
+            length = math.hypot(bx - ax, by - ay)
+            nx_, ny_ = -(by - ay) / length, (bx - ax) / length
+            rng = random.Random(f"{self.seed}:{key[0]}:{key[1]}")
+            waves = [(rng.uniform(-1, 1) / k, k, rng.uniform(0, 2 * math.pi)) for k in (1, 2, 3, 5)]
+            # Frame edges stay straight; interior edges wiggle, tapered to zero at the nodes
+            frame = self._on_frame(key[0]) and self._on_frame(key[1])
+            points = []
+            n = self.vertices_per_edge
+            for s in range(n):
+                t = s / n
+                offset = 0.0
+                if not frame and s:
+                    offset = self.wiggle * length * math.sin(math.pi * t) * sum(
+                        amp * math.sin(k * math.pi * t + phase) for amp, k, phase in waves)
+                points.append((ax + (bx - ax) * t + nx_ * offset, ay + (by - ay) * t + ny_ * offset))
+            self._edges[key] = points
+        return points
+
+    def _on_frame(self, node: int) -> bool:
+        i, j = node % (self.nx + 1), node // (self.nx + 1)
+        return i in (0, self.nx) or j in (0, self.ny)
+
+    def ring(self, i: int, j: int) -> List[Tuple[float, float]]:
+        """Closed counter-clockwise exterior ring of cell (i, j)"""
+        corners = [self.node(i, j), self.node(i + 1, j), self.node(i + 1, j + 1), self.node(i, j + 1)]
+        ring = []
+        for a, b in zip(corners, corners[1:] + corners[:1]):
+            ring.extend(self._walk(a, b))
+        return ring + ring[:1]
+
+    def _walk(self, a: int, b: int) -> List[Tuple[float, float]]:
+        """Vertices along edge a -> b, starting at a and excluding b"""
+        key = (min(a, b), max(a, b))
+        points = self._edge_points(key)
+        if a == key[0]:
+            return list(points)
+        # Reverse direction: start at node a (= key[1]) and drop node b
+        return [self.nodes[a]] + points[:0:-1]
+
+    def center(self, i: int, j: int) -> Tuple[float, float]:
+        corners = [self.nodes[self.node(i + di, j + dj)] for di, dj in ((0, 0), (1, 0), (1, 1), (0, 1))]
+        return sum(x for x, _ in corners) / 4, sum(y for _, y in corners) / 4
+
+
+def _round_ring(ring, digits=6):
+    return [[round(x, digits), round(y, digits)] for x, y in ring]
+
+def _circle(cx: float, cy: float, rx: float, ry: float, n: int, clockwise: bool) -> List[Tuple[float, float]]:
+    step = -1 if clockwise else 1
+    ring = [(cx + rx * math.cos(2 * math.pi * k / n), cy + ry * math.sin(2 * math.pi * k / n))
+            for k in range(0, step * n, step)]
+    return ring + ring[:1]
+
+def _lattice_shape(cells: int, extent) -> Tuple[int, int]:
+    """Lattice columns and rows giving about `cells` cells with square-ish cells"""
+    min_x, min_y, max_x, max_y = extent
+    nx = max(1, round(math.sqrt(cells * (max_x - min_x) / (max_y - min_y))))
+    return nx, max(1, round(cells / nx))
+
+def _field(x: float, y: float, seed: int) -> float:
+    """Smooth pseudo-random field in [-1, 1] used to assign zone values"""
+    rng = random.Random(seed)
+    terms = [(rng.uniform(0.05, 0.3), rng.uniform(0.05, 0.3), rng.uniform(0, 2 * math.pi)) for _ in range(4)]
+    return sum(math.sin(fx * x + fy * y + phase) for fx, fy, phase in terms) / len(terms)
+
+def _collection(features: List[Dict]) -> Dict:
+    return {"type": "FeatureCollection", "crs": _CRS, "features": features}
+
+def _feature(properties: Dict, polygons: List[List[list]]) -> Dict:
+    if len(polygons) == 1:
+        geometry = {"type": "Polygon", "coordinates": polygons[0]}
+    else:
+        geometry = {"type": "MultiPolygon", "coordinates": polygons}
+    return {"type": "Feature", "properties": properties, "geometry": geometry}
+
+def generate_admin(cells: int = 20000, vertices_per_edge: int = 24, hole_fraction: float = 0.03,
+                   multipart_fraction: float = 0.02, states: int = 36, seed: int = 1893,
+                   extent=INDIA_EXTENT) -> Dict:
+    """
+    Admin layer: a tessellation of districts grouped into states
+
+    A hole_fraction of districts get an enclave (a hole filled by its own
+    feature) and a multipart_fraction absorb a non-adjacent cell as a
+    second part, giving MultiPolygons.
+    """
+    nx, ny = _lattice_shape(cells, extent)
+    grid = Tessellation(nx, ny, extent, vertices_per_edge, seed)
+    rng = random.Random(seed + 1)
+    side = max(1, round(math.sqrt(states)))
+
+    # Pick exclave donors first so they are skipped as districts
+    cells_ij = [(i, j) for j in range(ny) for i in range(nx)]
+    absorbed = {}
+    for i, j in rng.sample(cells_ij, int(len(cells_ij) * multipart_fraction)):
+        donor = (i + 2, j)
+        if i + 2 < nx and donor not in absorbed and (i, j) not in absorbed \
+                and donor not in absorbed.values() and (i, j) not in absorbed.values():
+            absorbed[(i, j)] = donor
+    donors = set(absorbed.values())
+
+    features = []
+    for i, j in cells_ij:
+        if (i, j) in donors:
+            continue
+        state = f"State {(j * side // ny) * side + (i * side // nx) + 1:02d}"
+        name = f"District {j:03d}-{i:03d}"
+        exterior = grid.ring(i, j)
+        polygon = [_round_ring(exterior)]
+        if rng.random() < hole_fraction and (i, j) not in absorbed:
+            cx, cy = grid.center(i, j)
+            rx, ry = 0.15 * grid.dx, 0.15 * grid.dy
+            hole = _circle(cx, cy, rx, ry, 4 * vertices_per_edge, clockwise=True)
+            polygon.append(_round_ring(hole))
+            features.append(_feature({"NAME": f"Enclave {j:03d}-{i:03d}", "STATE": state, "TYPE": "Enclave"},
+                                     [[_round_ring(hole[::-1])]]))
+        polygons = [polygon]
+        if (i, j) in absorbed:
+            polygons.append([_round_ring(grid.ring(*absorbed[(i, j)]))])
+        features.append(_feature({"NAME": name, "STATE": state, "TYPE": "District"}, polygons))
+    return _collection(features)
+
+def generate_hazard(layer: str, cells: int = 1500, vertices_per_edge: int = 64, seed: int = 1893,
+                    extent=INDIA_EXTENT) -> Dict:
+    """Seismic ('zone') or wind ('Vb') layer on its own coarser tessellation"""
+    nx, ny = _lattice_shape(cells, extent)
+    grid = Tessellation(nx, ny, extent, vertices_per_edge, seed + (11 if layer == 'wind' else 7))
+    min_x, min_y, max_x, max_y = extent
+    features = []
+    for j in range(ny):
+        for i in range(nx):
+            cx, cy = grid.center(i, j)
+            if layer == 'seismic':
+                # Higher zones towards the north, perturbed by a smooth field
+                level = 0.7 * (cy - min_y) / (max_y - min_y) + 0.3 * (_field(cx, cy, seed) + 1) / 2
+                properties = {"zone": SEISMIC_ZONES[min(len(SEISMIC_ZONES) - 1, int(level * len(SEISMIC_ZONES)))]}
+            else:
+                # Higher speeds near the frame, standing in for the coast
+                edge = min(cx - min_x, max_x - cx, cy - min_y) / (0.5 * (max_x - min_x))
+                level = 0.7 * (1 - min(1.0, edge)) + 0.3 * (_field(cx, cy, seed + 1) + 1) / 2
+                properties = {"Vb": WIND_SPEEDS[min(len(WIND_SPEEDS) - 1, int(level * len(WIND_SPEEDS)))]}
+            features.append(_feature(properties, [[_round_ring(grid.ring(i, j))]]))
+    return _collection(features)
+
+def generate_layers(admin_cells: int = 20000, hazard_cells: int = 1500, vertices_per_edge: int = 24,
+                    seed: int = 1893, extent=INDIA_EXTENT) -> Dict[str, Dict]:
+    """All three layers keyed like engine.LAYER_FILES"""
+    return {
+        'seismic': generate_hazard('seismic', hazard_cells, vertices_per_edge * 3, seed, extent),
+        'wind': generate_hazard('wind', hazard_cells, vertices_per_edge * 3, seed, extent),
+        'admin': generate_admin(admin_cells, vertices_per_edge, seed=seed, extent=extent)
+    }
+
+def write_layers(directory: str, **kwargs) -> Dict[str, str]:
+    """Generate the layers and write them as GeoJSON; returns layer -> path"""
+    from engine import LAYER_FILES
+
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name, collection in generate_layers(**kwargs).items():
+        paths[name] = os.path.join(directory, LAYER_FILES[name])
+        with open(paths[name], 'w') as f:
+            json.dump(collection, f, separators=(',', ':'))
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic SoI-scale zone layers")
+    parser.add_argument('output_dir', help="Directory for the GeoJSON files")
+    parser.add_argument('--admin-cells', type=int, default=20000, help="Approximate number of districts")
+    parser.add_argument('--hazard-cells', type=int, default=1500, help="Cells in the seismic and wind layers")
+    parser.add_argument('--vertices-per-edge', type=int, default=24, help="Vertices per district edge")
+    parser.add_argument('--seed', type=int, default=1893)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = write_layers(args.output_dir, admin_cells=args.admin_cells, hazard_cells=args.hazard_cells,
+                         vertices_per_edge=args.vertices_per_edge, seed=args.seed)
+    for name, path in paths.items():
+        print(f"   {name}: {path} ({os.path.getsize(path) / 2**20:.1f} MB)")
+    print(f" Generated in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Unit tests for batch pre-processing
+Deduplication, space-filling curve order and scatter back to input order
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+from batch import BatchPlan, hilbert_index, lookup_batch, z_index
+from engine import LookupEngine, load_layers
+
+def duplicated_points(seed=32):
+    """Survey-like batch: 300 sites, each repeated with sub-millimetre jitter"""
+    rng = random.Random(seed)
+    sites = [(rng.uniform(8.0, 35.0), rng.uniform(69.0, 96.0)) for _ in range(300)]
+    lats, lons = [], []
+    for _ in range(3000):
+        lat, lon = rng.choice(sites)
+        lats.append(lat + rng.choice([0.0, 0.0, 1e-9]))
+        lons.append(lon)
+    return lats, lons
+
+@pytest.fixture(params=['numpy', 'python'])
+def implementation(request, monkeypatch):
+    """Run with and without the NumPy planner"""
+    if request.param == 'numpy':
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(batch, '_HAVE_NUMPY', request.param == 'numpy')
+    return request.param
+
+class TestBatch:
+    """Test cases for batch.py"""
+
+    def test_hilbert_is_continuous(self):
+        """Consecutive Hilbert indices are neighbouring cells"""
+        order = 4
+        cells = {hilbert_index(x, y, order): (x, y) for x in range(16) for y in range(16)}
+        assert sorted(cells) == list(range(256))
+        for d in range(255):
+            (x0, y0), (x1, y1) = cells[d], cells[d + 1]
+            assert abs(x0 - x1) + abs(y0 - y1) == 1
+
+    def test_z_index(self):
+        """Morton codes interleave x and y bits"""
+        assert z_index(0b11, 0b00, 2) == 0b0101
+        assert z_index(0b00, 0b11, 2) == 0b1010
+
+    @pytest.mark.parametrize("curve", ['hilbert', 'z', None])
+    def test_matches_plain_lookup(self, implementation, curve):
+        """Deduped, reordered lookups equal one lookup per input point"""
+        engine = LookupEngine(load_layers(), backend='python')
+        lats, lons = duplicated_points()
+        expected = engine.lookup_many(lats, lons)
+        assert lookup_batch(engine, lats, lons, curve=curve) == expected
+
+    def test_dedupe_counts(self, implementation):
+        """Exact and quantized duplicates collapse to one lookup each"""
+        lats, lons = duplicated_points()
+        assert BatchPlan(lats, lons).unique_count <= 310
+        assert BatchPlan(lats, lons, precision=None).unique_count > BatchPlan(lats, lons).unique_count
+        assert BatchPlan([], []).unique_count == 0
+
+    def test_results_are_independent(self, implementation):
+        """Duplicate inputs get separate result dicts"""
+        engine = LookupEngine(load_layers(), backend='python')
+        results = lookup_batch(engine, [28.6139, 28.6139], [77.2090, 77.2090])
+        results[0]['place_name'] = 'Edited'
+        assert results[1]['place_name'] == 'Delhi'
+
+    def test_non_finite_points(self, implementation):
+        """NaN and inf points get empty results and leave the curve order of the rest intact"""
+        import math
+        import warnings
+        from engine import empty_result
+        engine = LookupEngine(load_layers(), backend='python')
+        lats, lons = duplicated_points()
+        bad_lats = [math.inf, math.nan, 28.6139] + lats
+        bad_lons = [math.inf, 77.0, math.nan] + lons
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            plan = BatchPlan(bad_lats, bad_lons)
+            results = lookup_batch(engine, bad_lats, bad_lons)
+            compact = lookup_batch(engine, bad_lats, bad_lons, compact=True)
+        assert plan.nonfinite == 3
+        assert plan.unique_count == BatchPlan(lats, lons).unique_count
+        assert list(plan.lats) == list(BatchPlan(lats, lons).lats)
+        assert results[3:] == engine.lookup_many(lats, lons)
+        for result in results[:3]:
+            assert {k: v for k, v in result.items() if k not in ('lat', 'lon')} == \
+                   {k: v for k, v in empty_result(0.0, 0.0).items() if k not in ('lat', 'lon')}
+        assert [r['state'] for r in compact] == [r['state'] for r in results]
+
+    def test_unknown_curve(self):
+        with pytest.raises(ValueError):
+            BatchPlan([1.0], [1.0], curve='peano')
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,123 @@
+"""
+Unit tests for zone boundary proximity
+Indexed answers must match a brute-force scan of the labelled segments
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("shapely")
+np = pytest.importorskip("numpy")
+
+from boundaries import BoundaryIndex, _local_distance, nearest_boundaries
+from engine import Layer, LookupEngine, load_layers
+from geometry import haversine_km
+from synthetic_data import generate_layers
+
+@pytest.fixture(scope="module")
+def layers():
+    return load_layers()
+
+@pytest.fixture(scope="module")
+def seismic(layers):
+    return BoundaryIndex('seismic', layers['seismic'], backend='python')
+
+def brute_force(index, lat, lon, higher=False):
+    """Nearest qualifying segment by scanning every labelled segment"""
+    zone = index.zones.index(index._keys([lat], [lon])[0])
+    best = None
+    for k in range(len(index.a)):
+        if zone not in (index.left[k], index.right[k]):
+            continue
+        other = index.right[k] if index.left[k] == zone else index.left[k]
+        if higher and not index._rank(index.zones[other]) > index._rank(index.zones[zone]):
+            continue
+        distance = _local_distance(np, np.array([lat]), np.array([lon]), index.a[k:k + 1], index.b[k:k + 1])[0][0]
+        if best is None or distance < best[0]:
+            best = (distance, index.zones[other])
+    return best
+
+class TestBoundaryIndex:
+    """Test cases for boundaries.py"""
+
+    def test_segments_separate_different_zones(self, seismic, layers):
+        """Each kept segment has its two labelled zones on either side"""
+        engine = LookupEngine({'seismic': layers['seismic']}, backend='python')
+        for a, b, left, right in zip(seismic.a, seismic.b, seismic.left, seismic.right):
+            assert left != right
+            lon, lat = (a + b) / 2
+            d = b - a
+            nx, ny = -d[1] / np.hypot(*d) * 1e-4, d[0] / np.hypot(*d) * 1e-4
+            assert engine.lookup(lat + ny, lon + nx)['seismic_zone'] == seismic.zones[left][0]
+            assert engine.lookup(lat - ny, lon - nx)['seismic_zone'] == seismic.zones[right][0]
+
+    def test_nested_zone_edges(self, seismic):
+        """Mumbai (zone III) is 1 degree of latitude south of the zone IV edge"""
+        result = seismic.query([19.07], [72.87])[0]
+        assert result['adjacent'] == {'seismic_zone': 'IV', 'zone_factor': 0.24}
+        assert result['boundary_lat'] == pytest.approx(20.0)
+        assert result['distance_km'] == pytest.approx(haversine_km(19.07, 72.87, 20.0, 72.87), rel=1e-3)
+
+    @pytest.mark.parametrize("higher", [False, True])
+    def test_matches_brute_force(self, seismic, higher):
+        """Indexed nearest boundary equals a scan of all segments"""
+        rng = np.random.default_rng(3)
+        lats, lons = rng.uniform(6, 37, 200), rng.uniform(68, 97, 200)
+        for lat, lon, result in zip(lats, lons, seismic.query(lats, lons, higher=higher)):
+            expected = brute_force(seismic, lat, lon, higher)
+            if expected is None:
+                assert result is None
+                continue
+            assert result['distance_km'] == pytest.approx(expected[0])
+            assert tuple(result['adjacent'].values()) == expected[1]
+
+    def test_higher_skips_lower_zones(self, seismic):
+        """Towards higher zones only: Delhi (IV) looks past II/III to zone V"""
+        assert seismic.query([28.6], [77.2], higher=True)[0]['adjacent']['seismic_zone'] == 'V'
+
+    def test_max_km(self, seismic):
+        """Boundaries beyond max_km are not reported"""
+        lats, lons = [19.07, 19.9], [72.87, 72.87]
+        full = seismic.query(lats, lons)
+        near = seismic.query(lats, lons, max_km=20)
+        assert near[0] is None
+        assert near[1] == full[1]
+
+    def test_non_finite_points(self, seismic):
+        """NaN and inf points have no boundary; the others are unaffected"""
+        lats, lons = [float('nan'), 19.07, float('inf'), 28.6], [72.87, 72.87, 77.2, float('-inf')]
+        for max_km in (None, 50.0):
+            results = seismic.query(lats, lons, max_km=max_km)
+            assert results[0] is None and results[2] is None and results[3] is None
+            assert results[1] == seismic.query([19.07], [72.87], max_km=max_km)[0]
+
+    def test_synthetic_partition(self):
+        """Cell edges inside one zone are dropped; answers match brute force"""
+        synthetic = generate_layers(admin_cells=50, hazard_cells=40, vertices_per_edge=4, seed=5)
+        index = BoundaryIndex('wind', Layer.from_geojson('wind', synthetic['wind']), backend='python')
+        assert len(index.a) > 0
+        rng = np.random.default_rng(4)
+        lats, lons = rng.uniform(8, 35, 50), rng.uniform(69, 96, 50)
+        for lat, lon, result in zip(lats, lons, index.query(lats, lons)):
+            expected = brute_force(index, lat, lon)
+            assert result['distance_km'] == pytest.approx(expected[0])
+
+    def test_admin_has_no_ranking(self, layers):
+        index = BoundaryIndex('admin', layers['admin'])
+        with pytest.raises(ValueError):
+            index.query([19.07], [72.87], higher=True)
+
+    def test_nearest_boundaries(self, seismic, layers):
+        """Per-point dicts keyed by layer name"""
+        wind = BoundaryIndex('wind', layers['wind'])
+        results = nearest_boundaries({'seismic': seismic, 'wind': wind}, [19.07, 28.6], [72.87, 77.2])
+        assert len(results) == 2
+        assert set(results[0]) == {'seismic', 'wind'}
+        assert results[0]['wind']['adjacent'] == {'basic_wind_speed': 44.0}
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,146 @@
+"""
+Unit tests for local coordinate parsing
+Every supported format must resolve without a network call
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coords import (parse_coordinates, parse_coordinates_batch, parse_degrees, parse_plus_code,
+                    parse_toposheet, toposheet_bbox)
+
+DELHI = (28.6139, 77.2090)
+
+class TestDegrees:
+    """Test cases for decimal and DMS input"""
+
+    @pytest.mark.parametrize("text", [
+        "28.6139, 77.2090", "28.6139 77.2090", "28.6139N 77.2090E", "N28.6139 E77.2090",
+        "77.2090°E, 28.6139°N",
+    ])
+    def test_decimal(self, text):
+        found = parse_degrees(text)
+        assert (found['lat'], found['lon']) == pytest.approx(DELHI)
+        assert found['format'] == 'decimal'
+
+    @pytest.mark.parametrize("text", [
+        "28°36'50\"N 77°12'32\"E", "28° 36′ 50″ N, 77° 12′ 32″ E", "28 36 50 N 77 12 32 E",
+        "28°36'50''N 77°12'32''E", "77°12'32\"E 28°36'50\"N", "28 36 50 77 12 32",
+    ])
+    def test_dms(self, text):
+        found = parse_degrees(text)
+        assert found['lat'] == pytest.approx(28 + 36 / 60 + 50 / 3600)
+        assert found['lon'] == pytest.approx(77 + 12 / 60 + 32 / 3600)
+        assert found['format'] == 'dms'
+
+    def test_southern_and_western(self):
+        found = parse_degrees("33°52'S 151°12'E")
+        assert found['lat'] == pytest.approx(-(33 + 52 / 60))
+
+    @pytest.mark.parametrize("text", [
+        "Mumbai", "28.6", "1, 2, 3", "28°75'N 77°E", "28.6N 77.2N", "28.5°30'N 77°E", "95, 77",
+    ])
+    def test_rejected(self, text):
+        assert parse_degrees(text) is None
+
+class TestUTM:
+    """Test cases for UTM input"""
+
+    @pytest.mark.parametrize("text", [
+        "43Q 276689 2110589", "UTM 43 276689mE 2110589mN", "43N 276689 2110589", "43Q 2110589 276689",
+    ])
+    def test_mumbai(self, text):
+        pytest.importorskip("pyproj")
+        found = parse_coordinates(text)
+        assert (found['lat'], found['lon']) == pytest.approx((19.0760, 72.8777), abs=1e-4)
+        assert found['format'] == 'utm' and found['crs'] == 'EPSG:32643'
+
+    def test_band_mismatch(self):
+        """A band that disagrees with the projected point means a misread string"""
+        pytest.importorskip("pyproj")
+        assert parse_coordinates("43R 276689 2110589") is None
+
+class TestPlusCodes:
+    """Test cases for Open Location Code input"""
+
+    def test_full_code(self):
+        found = parse_plus_code("7JWVJ67H+22")
+        assert found['lat'] == pytest.approx(28.6125625) and found['lon'] == pytest.approx(77.2275625)
+
+    def test_short_code_with_locality(self):
+        places = {'New Delhi': DELHI}
+        found = parse_plus_code("J67H+22 New Delhi", places)
+        assert (found['lat'], found['lon']) == pytest.approx((28.6125625, 77.2275625))
+
+    def test_short_code_recovers_nearest(self):
+        """A reference just across a cell edge still finds the nearby code"""
+        found = parse_plus_code("J67H+22", reference=(29.01, 76.95))
+        assert (found['lat'], found['lon']) == pytest.approx((28.6125625, 77.2275625))
+
+    def test_short_code_without_reference(self):
+        assert parse_plus_code("J67H+22") is None
+        assert parse_plus_code("J67H+22 Atlantis", {'New Delhi': DELHI}) is None
+
+class TestToposheets:
+    """Test cases for SoI toposheet numbers"""
+
+    @pytest.mark.parametrize("sheet, point", [
+        ("53H", (28.6139, 77.2090)), ("47A", (19.0760, 72.8777)), ("57H", (12.9716, 77.5946)),
+        ("56K", (17.3850, 78.4867)), ("79B", (22.5726, 88.3639)), ("45N", (26.9124, 75.7873)),
+    ])
+    def test_city_sheets(self, sheet, point):
+        min_lon, min_lat, max_lon, max_lat = toposheet_bbox(sheet)
+        assert min_lat <= point[0] <= max_lat and min_lon <= point[1] <= max_lon
+
+    def test_subdivisions(self):
+        assert toposheet_bbox("53H/1") == (77.0, 28.75, 77.25, 29.0)
+        assert toposheet_bbox("53H/16/SE") == (77.875, 28.0, 78.0, 28.125)
+        found = parse_toposheet("SoI toposheet 53 H 13")
+        assert (found['lat'], found['lon']) == (28.875, 77.875)
+        assert found['sheet'] == '53H/13'
+
+    def test_rejected(self):
+        assert toposheet_bbox("53H/17") is None
+        assert toposheet_bbox("99A") is None
+
+class TestBatch:
+    """Test cases for coords.parse_coordinates_batch"""
+
+    def test_mixed_formats(self):
+        pytest.importorskip("pyproj")
+        texts = ["28.6139, 77.2090", "43Q 276689 2110589", "Mumbai", "", "44Q 500000 2000000", "53H/13"]
+        found = parse_coordinates_batch(texts)
+        assert [f and f['format'] for f in found] == ['decimal', 'utm', None, None, 'utm', 'toposheet']
+        assert found[1] == parse_coordinates(texts[1])
+
+class TestSearch:
+    """core.search_location resolves coordinates without Nominatim"""
+
+    @pytest.fixture(autouse=True)
+    def _offline(self, monkeypatch):
+        pytest.importorskip("geopandas")
+        import requests
+        def fail(*args, **kwargs):
+            raise AssertionError("network call")
+        monkeypatch.setattr(requests, 'get', fail)
+
+    def test_formats_offline(self):
+        import core
+        for query in ["28°36'50\"N 77°12'32\"E", "43Q 276689 2110589", "J67H+22 New Delhi", "53H/13"]:
+            assert core.search_location(query) is not None
+
+    def test_outside_india(self):
+        import core
+        assert core.search_location("40.7128, -74.0060") is None
+
+    def test_site_list(self):
+        import core
+        found = core.search_locations(["19.0760, 72.8777", "Some Village"], online=False)
+        assert found[0]['lat'] == 19.0760 and found[1] is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,93 @@
+"""
+Unit tests for corridor profiling
+Intervals must agree with point lookups sampled inside them
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corridor import CorridorProfiler, alignment_vertices
+from engine import LookupEngine, load_layers
+from geometry import haversine_km
+
+# Mumbai -> Ahmedabad -> Delhi, crossing seismic, wind and admin boundaries
+ALIGNMENT = [(19.0760, 72.8777), (23.0225, 72.5714), (28.6139, 77.2090)]
+
+def point_at(chainage_m):
+    """(lat, lon) at a chainage along ALIGNMENT"""
+    for (lat_a, lon_a), (lat_b, lon_b) in zip(ALIGNMENT, ALIGNMENT[1:]):
+        length = haversine_km(lat_a, lon_a, lat_b, lon_b) * 1000
+        if chainage_m <= length:
+            t = chainage_m / length
+            return lat_a + (lat_b - lat_a) * t, lon_a + (lon_b - lon_a) * t
+        chainage_m -= length
+    return ALIGNMENT[-1]
+
+@pytest.fixture(params=['shapely', 'python'])
+def profiler(request):
+    """Profiler with and without the shapely crossing search"""
+    engine = LookupEngine(load_layers(), backend='python')
+    if request.param == 'shapely':
+        pytest.importorskip("shapely")
+        return CorridorProfiler(engine)
+    profiler = CorridorProfiler(engine)
+    profiler._tree = None
+    return profiler
+
+class TestCorridor:
+    """Test cases for corridor.py"""
+
+    def test_intervals_match_sampled_lookups(self, profiler):
+        """Points sampled inside each interval have that interval's attributes"""
+        profile = profiler.profile(ALIGNMENT)
+        assert len(profile) >= 3
+        for interval in profile:
+            for f in (0.01, 0.5, 0.99):
+                lat, lon = point_at(interval['start_m'] + f * interval['length_m'])
+                result = profiler.engine.lookup(lat, lon)
+                assert result['seismic_zone'] == interval['seismic_zone']
+                assert result['basic_wind_speed'] == interval['basic_wind_speed']
+                assert result['place_name'] == interval['place_name']
+
+    def test_chainage_is_contiguous(self, profiler):
+        """Intervals cover the alignment end to end without gaps"""
+        profile = profiler.profile(ALIGNMENT)
+        assert profile[0]['start_m'] == 0.0
+        for a, b in zip(profile, profile[1:]):
+            assert a['end_m'] == pytest.approx(b['start_m'])
+        assert sum(i['length_m'] for i in profile) == pytest.approx(profile[-1]['end_m'])
+        assert profile[-1]['end_m'] == pytest.approx(1215.7e3, rel=1e-3)
+
+    def test_known_crossings(self, profiler):
+        """Seismic IV starts at latitude 20 and Delhi's boundary at 28.4"""
+        profile = profiler.profile(ALIGNMENT, fields=['seismic_zone'])
+        assert [i['seismic_zone'] for i in profile] == ['III', 'IV']
+        assert profile[1]['start_lat'] == pytest.approx(20.0)
+        delhi = [i for i in profiler.profile(ALIGNMENT, fields=['place_name']) if i['place_name'] == 'Delhi']
+        assert delhi[0]['start_lat'] == pytest.approx(28.4)
+
+    def test_backends_agree(self):
+        """Shapely and pure Python crossing searches give the same profile"""
+        pytest.importorskip("shapely")
+        profiler = CorridorProfiler(LookupEngine(load_layers(), backend='python'))
+        with_tree = profiler.profile(ALIGNMENT)
+        profiler._tree = None
+        without_tree = profiler.profile(ALIGNMENT)
+        assert len(with_tree) == len(without_tree)
+        for a, b in zip(with_tree, without_tree):
+            assert a['start_m'] == pytest.approx(b['start_m'])
+            assert a['seismic_zone'] == b['seismic_zone'] and a['place_name'] == b['place_name']
+
+    def test_input_formats(self):
+        """LineString-style input is lon/lat, vertex lists are lat/lon"""
+        assert alignment_vertices({"type": "LineString", "coordinates": [[72.0, 19.0], [77.0, 28.0]]}) == \
+            [(19.0, 72.0), (28.0, 77.0)]
+        with pytest.raises(ValueError):
+            CorridorProfiler(LookupEngine(load_layers(), backend='python')).profile([(19.0, 72.0)])
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,130 @@
+"""
+Unit tests for projected query coordinates
+Reprojected lookups must match the same points given in WGS84
+"""
+
+import pytest
+import threading
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("pyproj")
+
+from crs import get_transformer, is_wgs84, point_to_wgs84, to_wgs84, utm_crs
+
+# (lat, lon) of a few cities inside UTM zone 43N
+CITIES = [(19.0760, 72.8777), (18.5204, 73.8567), (23.0225, 72.5714)]
+
+def to_utm(points, zone=43):
+    from pyproj import Transformer
+    transformer = Transformer.from_crs('EPSG:4326', utm_crs(zone), always_xy=True)
+    eastings, northings = transformer.transform([lon for _, lon in points], [lat for lat, _ in points])
+    return list(northings), list(eastings)
+
+class TestReprojection:
+    """Test cases for crs.to_wgs84 and crs.point_to_wgs84"""
+
+    def test_round_trip(self):
+        northings, eastings = to_utm(CITIES)
+        lats, lons = to_wgs84(northings, eastings, 'EPSG:32643')
+        for (lat, lon), y, x in zip(CITIES, lats, lons):
+            assert y == pytest.approx(lat, abs=1e-7) and x == pytest.approx(lon, abs=1e-7)
+        assert point_to_wgs84(northings[0], eastings[0], 32643) == pytest.approx(CITIES[0], abs=1e-7)
+
+    def test_wgs84_passthrough(self):
+        lats, lons = [19.0], [72.8]
+        assert to_wgs84(lats, lons, None) == (lats, lons)
+        assert to_wgs84(lats, lons, 'epsg:4326')[0] is lats
+        assert is_wgs84('WGS84') and not is_wgs84('EPSG:32643')
+
+    def test_utm_crs(self):
+        assert utm_crs(43) == 'EPSG:32643'
+        assert utm_crs(43, south=True) == 'EPSG:32743'
+        with pytest.raises(ValueError):
+            utm_crs(61)
+
+class TestTransformerCache:
+    """Test cases for crs.get_transformer"""
+
+    def test_reused(self):
+        assert get_transformer('EPSG:32644') is get_transformer('EPSG:32644')
+
+    def test_per_thread(self):
+        """Transformers are not thread-safe, so each thread gets its own"""
+        mine = get_transformer('EPSG:32645')
+        theirs = []
+        thread = threading.Thread(target=lambda: theirs.append(get_transformer('EPSG:32645')))
+        thread.start()
+        thread.join()
+        assert theirs[0] is not mine
+
+class TestCoreCRS:
+    """Lookups through core.py with a source CRS"""
+
+    @pytest.fixture(autouse=True)
+    def _need_geopandas(self):
+        pytest.importorskip("geopandas")
+
+    def test_single(self):
+        import core
+        northings, eastings = to_utm(CITIES[:1])
+        result = core.get_location_properties(northings[0], eastings[0], crs='EPSG:32643')
+        expected = core.get_location_properties(*CITIES[0])
+        assert result['lat'] == pytest.approx(CITIES[0][0], abs=1e-7)
+        assert {k: v for k, v in result.items() if k not in ('lat', 'lon')} == \
+               {k: v for k, v in expected.items() if k not in ('lat', 'lon')}
+
+    def test_batch_matches_wgs84(self):
+        import core
+        northings, eastings = to_utm(CITIES)
+        results = core.get_location_properties_batch(northings, eastings, crs=utm_crs(43))
+        expected = core.get_location_properties_batch([p[0] for p in CITIES], [p[1] for p in CITIES])
+        assert [r['state'] for r in results] == [r['state'] for r in expected]
+        assert [r['seismic_zone'] for r in results] == [r['seismic_zone'] for r in expected]
+        assert results[0]['lon'] == pytest.approx(CITIES[0][1], abs=1e-7)
+
+    def test_batch_outside_domain(self):
+        """Points the CRS cannot reproject come back empty, without numpy warnings"""
+        import warnings
+        import core
+        northings, eastings = to_utm(CITIES)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            results = core.get_location_properties_batch([1e12] + northings, [1e12] + eastings, crs=utm_crs(43))
+        assert results[0]['state'] == 'Unknown' and results[0]['zone_factor'] is None
+        expected = core.get_location_properties_batch([p[0] for p in CITIES], [p[1] for p in CITIES])
+        assert [r['state'] for r in results[1:]] == [r['state'] for r in expected]
+
+    def test_address(self):
+        import core
+        northings, eastings = to_utm(CITIES[:1])
+        assert core.get_address(northings[0], eastings[0], crs='EPSG:32643')['state'] == 'Maharashtra'
+
+    def test_address_outside_domain(self):
+        """Unprojectable and NaN points get an empty address"""
+        import core
+        northings, eastings = to_utm(CITIES[:1])
+        addresses = core.get_addresses_batch([1e12, float('nan')] + northings, [1e12, 0.0] + eastings,
+                                             crs=utm_crs(43))
+        for address in addresses[:2]:
+            assert address['locality'] is None and address['nearby'] == []
+            assert address['state'] == 'Unknown'
+        assert addresses[2]['state'] == 'Maharashtra'
+        single = core.get_address(1e12, 1e12, crs=utm_crs(43), enrich=True)
+        assert single['display_name'] == 'Unknown' and single['osm_display_name'] is None
+        assert core.get_addresses_batch([float('nan'), float('inf')], [77.2, 77.2])[1]['nearby'] == []
+
+    def test_boundaries_outside_domain(self):
+        """Unprojectable, NaN and inf points have no nearest boundary"""
+        import core
+        assert core.get_zone_boundaries(1e12, 1e12, crs=utm_crs(43)) == {'seismic': None, 'wind': None}
+        results = core.get_zone_boundaries_batch([float('nan'), float('inf'), 28.6], [77.2, 77.2, 77.2])
+        assert results[0] == results[1] == {'seismic': None, 'wind': None}
+        assert results[2] == core.get_zone_boundaries(28.6, 77.2)
+        assert core.get_zone_boundaries_batch([float('nan')], [77.2], max_km=50) == [{'seismic': None, 'wind': None}]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,125 @@
+"""
+Unit tests for the warm daemon and its client
+Answers over the socket must equal in-process core.py results
+"""
+
+import pytest
+import threading
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import client
+from client import DaemonError, LocationClient, decode_records, encode_records
+
+@pytest.fixture(scope="module")
+def daemon(tmp_path_factory):
+    """A daemon serving from a background thread"""
+    pytest.importorskip("geopandas")
+    from daemon import LocationDaemon
+    path = str(tmp_path_factory.mktemp("daemon") / "lw.sock")
+    server = LocationDaemon(path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+class TestRecords:
+    """Test cases for the packed record encoding"""
+
+    def test_round_trip(self):
+        results = [
+            {'lat': 28.6, 'lon': 77.2, 'seismic_zone': 'IV', 'zone_factor': 0.24,
+             'basic_wind_speed': 47.0, 'place_name': 'New Delhi', 'state': 'Delhi'},
+            {'lat': 0.0, 'lon': 0.0, 'seismic_zone': 'Unknown', 'zone_factor': None,
+             'basic_wind_speed': None, 'place_name': 'Unknown', 'state': 'Unknown'}
+        ]
+        assert decode_records(encode_records(results), [28.6, 0.0], [77.2, 0.0]) == results
+
+    def test_extra_fields_not_packed(self):
+        """Results outside the record layout go as JSON instead"""
+        assert encode_records([{'lat': 1.0, 'lon': 2.0, 'overlaps': {}}]) is None
+
+class TestDaemon:
+    """Test cases for daemon.LocationDaemon through client.LocationClient"""
+
+    def test_lookup_matches_core(self, daemon):
+        import core
+        with LocationClient(daemon.path) as c:
+            assert c.ping()
+            assert c.lookup(19.0760, 72.8777) == core.get_location_properties(19.0760, 72.8777)
+
+    def test_batch(self, daemon):
+        import core
+        lats, lons = [28.6139, 13.0827, 0.0], [77.2090, 80.2707, 0.0]
+        with LocationClient(daemon.path) as c:
+            assert c.lookup_many(lats, lons) == core.get_location_properties_batch(lats, lons)
+
+    def test_call(self, daemon):
+        with LocationClient(daemon.path) as c:
+            address = c.call('get_address', 19.07, 72.87)
+            assert address['state'] == 'Maharashtra'
+            assert c.call('get_search_suggestions', 'mum') == ['Mumbai']
+
+    def test_errors_keep_connection(self, daemon):
+        """A failed request is reported and the connection stays usable"""
+        with LocationClient(daemon.path) as c:
+            with pytest.raises(DaemonError):
+                c.call('clear_cache')
+            assert c.ping()
+
+    def test_socket_private(self, daemon):
+        assert os.stat(daemon.path).st_mode & 0o777 == 0o600
+
+    def test_live_socket_kept(self, daemon, monkeypatch):
+        """A second daemon on the same path does not take over a running one's socket"""
+        import daemon as daemon_module
+        from daemon import LocationDaemon
+        probes = []
+
+        class Probe(LocationClient):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                probes.append(self)
+
+        monkeypatch.setattr(daemon_module, 'LocationClient', Probe)
+        with pytest.raises(OSError):
+            LocationDaemon(daemon.path, warm=False)
+        assert len(probes) == 1 and probes[0]._sock is None
+        with LocationClient(daemon.path) as c:
+            assert c.ping()
+
+    def test_stale_socket_replaced(self, tmp_path):
+        pytest.importorskip("geopandas")
+        import socket
+        from daemon import LocationDaemon
+        path = str(tmp_path / "stale.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server = LocationDaemon(path, warm=False)
+        try:
+            assert os.stat(path).st_mode & 0o777 == 0o600
+        finally:
+            server.server_close()
+
+class TestClientFallback:
+    """The client without a running daemon"""
+
+    def test_ping_without_daemon(self, tmp_path):
+        assert not LocationClient(str(tmp_path / "missing.sock")).ping()
+
+    def test_fallback_to_core(self, tmp_path, monkeypatch):
+        pytest.importorskip("geopandas")
+        import core
+        monkeypatch.setenv('LOCATION_WIZARD_SOCKET', str(tmp_path / "missing.sock"))
+        monkeypatch.setattr(client, '_client', None)
+        assert client.get_location_properties(28.6139, 77.2090) == core.get_location_properties(28.6139, 77.2090)
+        with pytest.raises(OSError):
+            client.get_location_properties(28.6139, 77.2090, fallback=False)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,79 @@
+"""
+Unit tests for design parameters
+Vectorized results must match the IS 1893 / IS 875 formulas and tables
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+import design
+from core import get_location_properties_batch
+
+class TestDesignParameters:
+    """Test cases for design.py"""
+
+    def test_spectral_acceleration(self):
+        """Plateau, 1/T branch and long-period constant per soil type"""
+        sa = design.spectral_acceleration([0.2, 1.0, 5.0], 1)
+        assert sa.tolist() == pytest.approx([2.5, 1.0, 0.25])
+        assert design.spectral_acceleration(1.0, [1, 2, 3]).tolist() == pytest.approx([1.0, 1.36, 1.67])
+        assert design.spectral_acceleration(0.05, 2, static=False) == pytest.approx(1.75)
+        with pytest.raises(ValueError):
+            design.spectral_acceleration(1.0, 4)
+
+    def test_horizontal_coefficient(self):
+        """Ah = Z/2 * I/R * Sa/g, at least Z/2 for rigid structures"""
+        ah = design.horizontal_coefficient([0.36, 0.10], 1.2, 5.0, 2.5)
+        assert ah.tolist() == pytest.approx([0.36 / 2 * 1.2 / 5 * 2.5, 0.10 / 2 * 1.2 / 5 * 2.5])
+        assert design.horizontal_coefficient(0.36, 1.0, 5.0, 2.5, period=0.05) == pytest.approx(0.18)
+        assert np.isnan(design.horizontal_coefficient(np.nan))
+
+    def test_terrain_factor(self):
+        """k2 interpolates Table 2 in height and clamps at its ends"""
+        assert design.terrain_factor([5, 10, 12.5, 600], 2).tolist() == pytest.approx([1.0, 1.0, 1.025, 1.38])
+        assert design.terrain_factor(10, [1, 2, 3, 4]).tolist() == pytest.approx([1.05, 1.0, 0.91, 0.80])
+        with pytest.raises(ValueError):
+            design.terrain_factor(10, 5)
+
+    def test_risk_coefficient(self):
+        assert design.risk_coefficient([33, 55], 100).tolist() == pytest.approx([1.05, 1.08])
+        assert design.risk_coefficient(44).tolist() == 1.0
+        with pytest.raises(ValueError):
+            design.risk_coefficient(44, 10)
+
+    def test_wind_class_matches_thresholds(self):
+        """Vectorized classes agree with the app's thresholds"""
+        speeds = [55, 50, 49.9, 47, 44, 43, 39, 33]
+        expected = [0, 0, 1, 1, 2, 3, 3, 4]
+        assert design.wind_class_index(speeds).tolist() == expected
+        assert design.wind_class_index([np.nan]).tolist() == [-1]
+        assert design.wind_class(33)[1] == "🔵"
+        assert design.wind_class(np.nan) is None
+        with pytest.raises(ValueError):
+            design.wind_class_index([44, -1])
+        with pytest.raises(ValueError):
+            design.wind_class(-5)
+
+    def test_design_parameters_from_batch(self):
+        """Columns computed from batch lookup output, NaN outside the layers"""
+        results = get_location_properties_batch([28.6139, 0.0], [77.2090, 0.0])
+        params = design.design_parameters(results, importance=1.2, response_reduction=5, height=30, terrain_category=3)
+        assert params['Ah'][0] == pytest.approx(0.24 / 2 * 1.2 / 5 * 2.5)
+        assert params['Vz'][0] == pytest.approx(44.0 * 1.06)
+        assert np.isnan(params['Ah'][1]) and np.isnan(params['Vz'][1])
+
+    def test_per_site_inputs(self):
+        """Per-site arrays broadcast against the batch"""
+        columns = {'zone_factor': np.full(4, 0.16), 'basic_wind_speed': np.full(4, 47.0)}
+        params = design.design_parameters(columns, height=[10, 20, 50, 100], terrain_category=[1, 2, 3, 4], k3=1.1)
+        assert params['Vz'].tolist() == pytest.approx((47.0 * np.array([1.05, 1.07, 1.12, 1.20]) * 1.1).tolist())
+        assert params['k3'].shape == (4,)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
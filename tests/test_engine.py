@@ -0,0 +1,101 @@
+"""
+Unit tests for the shared lookup engine
+Differential tests check that every available backend gives the same answers
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import BACKENDS, Layer, LookupEngine, available_backends, empty_result, load_layers
+
+def random_points(n, seed=1893):
+    """Random points over the India extent and a margin around it"""
+    rng = random.Random(seed)
+    return [rng.uniform(4.0, 39.0) for _ in range(n)], [rng.uniform(66.0, 99.0) for _ in range(n)]
+
+def holed_layer():
+    """A square with a hole, a two-part multipolygon and an overlapping square"""
+    return Layer('admin', [
+        {"properties": {"NAME": "Ring", "STATE": "A"},
+         "geometry": {"type": "Polygon", "coordinates": [
+             [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]],
+             [[3, 3], [7, 3], [7, 7], [3, 7], [3, 3]]]}},
+        {"properties": {"NAME": "Islands", "STATE": "B"},
+         "geometry": {"type": "MultiPolygon", "coordinates": [
+             [[[20, 0], [25, 0], [25, 5], [20, 5], [20, 0]]],
+             [[[30, 0], [35, 0], [35, 5], [30, 5], [30, 0]]]]}},
+        {"properties": {"NAME": "Under", "STATE": "C"},
+         "geometry": {"type": "Polygon", "coordinates": [
+             [[-5, -5], [40, -5], [40, 15], [-5, 15], [-5, -5]]]}}
+    ])
+
+class TestLookupEngine:
+    """Test cases for the lookup engine and its backends"""
+
+    @pytest.mark.parametrize("backend", available_backends())
+    def test_backends_agree_on_bundled_layers(self, backend):
+        """Every backend matches the pure Python reference on random points"""
+        layers = load_layers()
+        lats, lons = random_points(2000)
+        reference = LookupEngine(layers, backend='python').lookup_many(lats, lons)
+        assert LookupEngine(layers, backend=backend).lookup_many(lats, lons) == reference
+
+    @pytest.mark.parametrize("backend", available_backends())
+    def test_single_and_batch_agree(self, backend):
+        """lookup() and lookup_many() return the same results"""
+        engine = LookupEngine(load_layers(), backend=backend)
+        lats, lons = random_points(200, seed=875)
+        assert [engine.lookup(lat, lon) for lat, lon in zip(lats, lons)] == engine.lookup_many(lats, lons)
+
+    @pytest.mark.parametrize("backend", available_backends())
+    def test_holes_and_multipolygons(self, backend):
+        """Holes fall through to later features and every part of a multipolygon matches"""
+        engine = LookupEngine({'admin': holed_layer()}, backend=backend)
+        assert engine.lookup(1.5, 1.5)['place_name'] == 'Ring'
+        assert engine.lookup(5.5, 5.5)['place_name'] == 'Under'
+        assert engine.lookup(2.5, 22.5)['place_name'] == 'Islands'
+        assert engine.lookup(2.5, 32.5)['place_name'] == 'Islands'
+        assert engine.lookup(2.5, 27.5)['place_name'] == 'Under'
+        assert engine.lookup(50.0, 50.0) == empty_result(50.0, 50.0)
+
+    def test_result_schema(self):
+        """All backends share the core result schema"""
+        for backend in available_backends():
+            result = LookupEngine(load_layers(), backend=backend).lookup(28.6139, 77.2090)
+            assert list(result) == list(empty_result(0.0, 0.0))
+            assert result['seismic_zone'] == 'IV'
+            assert result['zone_factor'] == 0.24
+
+    def test_standalone_matches_core(self):
+        """standalone_demo and core give identical answers"""
+        pytest.importorskip("geopandas")
+        from core import get_location_properties
+        from standalone_demo import get_location_properties_standalone
+
+        for lat, lon in [(28.6139, 77.2090), (19.0760, 72.8777), (13.0827, 80.2707), (12.9716, 77.5946)]:
+            assert get_location_properties(lat, lon) == get_location_properties_standalone(lat, lon)
+
+    def test_standalone_public_names(self):
+        """standalone_demo keeps re-exporting the geometry kernels and load_zone_data"""
+        import geometry
+        import standalone_demo
+        assert standalone_demo.point_in_polygon_simple is geometry.point_in_polygon_simple
+        assert standalone_demo.points_in_polygon_vectorized is geometry.points_in_polygon_vectorized
+        assert standalone_demo.polygon_edges is geometry.polygon_edges
+        seismic, wind = standalone_demo.load_zone_data()
+        assert seismic['type'] == wind['type'] == 'FeatureCollection'
+
+    def test_unknown_backend(self):
+        """Unknown backend names are rejected"""
+        with pytest.raises(ValueError):
+            LookupEngine(load_layers(), backend='gpu')
+        assert set(available_backends()) <= set(BACKENDS)
+        assert 'python' in available_backends()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
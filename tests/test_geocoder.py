@@ -0,0 +1,109 @@
+"""
+Unit tests for offline reverse geocoding
+Settlement search must agree with a full scan; addresses need no network
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import LookupEngine, load_layers
+from geocoder import ReverseGeocoder, SettlementIndex, display_name, load_settlements
+from geometry import haversine_km
+
+def random_settlements(n, seed=37):
+    rng = random.Random(seed)
+    return [{'name': f"Village {i}", 'type': 'village', 'lat': rng.uniform(6, 37),
+             'lon': rng.uniform(68, 97), 'state': 'Unknown'} for i in range(n)]
+
+@pytest.fixture(scope="module")
+def geocoder():
+    return ReverseGeocoder(LookupEngine(load_layers(), backend='python'))
+
+class TestSettlementIndex:
+    """Test cases for geocoder.SettlementIndex"""
+
+    @pytest.mark.parametrize("cell_size", [0.05, 0.25, 2.0])
+    def test_matches_full_scan(self, cell_size):
+        """k nearest equal a sort over every settlement, at any cell size"""
+        settlements = random_settlements(5000)
+        index = SettlementIndex(settlements, cell_size)
+        rng = random.Random(1)
+        for _ in range(100):
+            lat, lon, k = rng.uniform(4, 39), rng.uniform(66, 99), rng.choice([1, 2, 5])
+            expected = sorted(settlements, key=lambda s: haversine_km(lat, lon, s['lat'], s['lon']))[:k]
+            assert [s['name'] for s in index.nearest(lat, lon, k)] == [s['name'] for s in expected]
+
+    def test_more_than_available(self):
+        index = SettlementIndex(random_settlements(3))
+        assert len(index.nearest(20.0, 80.0, k=10)) == 3
+
+    def test_empty(self):
+        assert SettlementIndex([]).nearest(20.0, 80.0) == []
+
+    def test_non_finite(self):
+        index = SettlementIndex(random_settlements(3))
+        for lat, lon in [(float('nan'), 80.0), (20.0, float('inf')), (float('-inf'), float('nan'))]:
+            assert index.nearest(lat, lon) == []
+
+    def test_bundled_settlements(self):
+        settlements = load_settlements()
+        assert {'New Delhi', 'Mumbai', 'Chennai'} <= {s['name'] for s in settlements}
+        assert all(6 <= s['lat'] <= 37 and 68 <= s['lon'] <= 97 for s in settlements)
+
+class TestReverseGeocoder:
+    """Test cases for geocoder.ReverseGeocoder"""
+
+    def test_structured_address(self, geocoder):
+        """Locality from the nearest settlement, district/state from admin polygons"""
+        address = geocoder.reverse(19.07, 72.87, k=3)
+        assert address['locality'] == 'Mumbai'
+        assert address['locality_type'] == 'city'
+        assert address['locality_distance_km'] < 2
+        assert (address['district'], address['state']) == ('Mumbai', 'Maharashtra')
+        assert address['display_name'] == 'Mumbai, Maharashtra'
+        assert [s['name'] for s in address['nearby']] == ['Mumbai', 'Thane', 'Alibag']
+
+    def test_outside_admin_polygons(self, geocoder):
+        """Far from any settlement the locality is 'near' and admin is Unknown"""
+        address = geocoder.reverse(25.0, 80.0)
+        assert address['district'] == 'Unknown'
+        assert address['display_name'].startswith('near ')
+
+    def test_batch_matches_single(self, geocoder):
+        lats, lons = [28.61, 13.08, 22.57], [77.21, 80.27, 88.36]
+        assert geocoder.reverse_many(lats, lons) == [geocoder.reverse(lat, lon) for lat, lon in zip(lats, lons)]
+
+    def test_no_network(self, geocoder, monkeypatch):
+        """Offline lookups never call requests"""
+        requests = pytest.importorskip("requests")
+
+        def no_network(*args, **kwargs):
+            raise AssertionError("network used")
+
+        monkeypatch.setattr(requests, 'get', no_network)
+        assert geocoder.reverse(12.97, 77.59)['locality'] == 'Bangalore'
+
+    def test_display_name(self):
+        assert display_name({'locality': None, 'district': 'Unknown', 'state': 'Unknown'}) == 'Unknown'
+        assert display_name({'locality': 'Pune', 'locality_distance_km': 1.0,
+                             'district': 'Pune', 'state': 'Maharashtra'}) == 'Pune, Maharashtra'
+
+    def test_core_enrichment_keeps_offline_fields(self, monkeypatch):
+        """Nominatim only adds osm_display_name and is skipped by default"""
+        pytest.importorskip("geopandas")
+        import core
+        calls = []
+        monkeypatch.setattr(core, 'get_reverse_geocoding', lambda lat, lon: calls.append(1) or "Somewhere long, India")
+        assert 'osm_display_name' not in core.get_address(19.07, 72.87)
+        address = core.get_address(19.07, 72.87, enrich=True)
+        assert address['osm_display_name'] == "Somewhere long, India"
+        assert address['district'] == 'Mumbai'
+        assert calls == [1]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
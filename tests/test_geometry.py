@@ -0,0 +1,68 @@
+"""
+Unit tests for the ray casting helpers
+Checks the vectorized kernel against point_in_polygon_simple
+"""
+
+import pytest
+import math
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geometry import jit_available, point_in_polygon_simple, point_in_rings
+
+def star_rings():
+    """A 40-vertex star with a square hole"""
+    star = []
+    for k in range(40):
+        r = 10.0 if k % 2 else 4.0
+        angle = 2 * math.pi * k / 40
+        star.append((20.0 + r * math.cos(angle), 75.0 + r * math.sin(angle)))
+    star.append(star[0])
+    hole = [(18.0, 73.0), (22.0, 73.0), (22.0, 77.0), (18.0, 77.0), (18.0, 73.0)]
+    return [star, hole]
+
+class TestGeometry:
+    """Test cases for point-in-polygon kernels"""
+
+    def test_simple_square(self):
+        """Ray casting on a unit square"""
+        square = [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]
+        assert point_in_polygon_simple(0.5, 0.5, square)
+        assert not point_in_polygon_simple(1.5, 0.5, square)
+
+    def test_hole_excluded(self):
+        """Points inside a hole are outside the feature"""
+        rings = star_rings()
+        assert point_in_rings(75.0, 20.0, rings) is False
+        assert point_in_rings(75.0, 23.5, rings) is True
+
+    @pytest.mark.parametrize("use_jit", [False, True])
+    def test_vectorized_matches_simple(self, use_jit):
+        """Vectorized kernel agrees with the scalar one point for point"""
+        np = pytest.importorskip("numpy")
+        from geometry import points_in_polygon_vectorized, polygon_edges
+        if use_jit and not jit_available():
+            pytest.skip("numba not installed")
+
+        rng = random.Random(27)
+        xs = [rng.uniform(8.0, 32.0) for _ in range(5000)]
+        ys = [rng.uniform(63.0, 87.0) for _ in range(5000)]
+        rings = star_rings()
+        # Rings are (x, y) = (lon, lat) pairs
+        expected = [point_in_rings(y, x, rings) for x, y in zip(xs, ys)]
+        inside = points_in_polygon_vectorized(ys, xs, polygon_edges(rings), use_jit=use_jit)
+        assert inside.dtype == np.bool_
+        assert inside.tolist() == expected
+
+    def test_vectorized_empty(self):
+        """Empty inputs give empty results"""
+        pytest.importorskip("numpy")
+        from geometry import points_in_polygon_vectorized, polygon_edges
+        assert len(points_in_polygon_vectorized([], [], polygon_edges(star_rings()))) == 0
+
+if __name__ == "__main__":
+    pytest.main([__file__])
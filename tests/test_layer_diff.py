@@ -0,0 +1,194 @@
+"""
+Unit tests for incremental layer updates
+An updated engine, grid or cache must match a rebuild from the new files
+"""
+
+import copy
+import json
+import pytest
+import random
+import shutil
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import DATA_DIR, LAYER_FILES, GridBackend, Layer, LookupEngine, available_backends
+from layer_diff import LayerDiff, affected, update_engine, update_layer
+from synthetic_data import generate_layers
+
+@pytest.fixture(scope="module")
+def revision():
+    """Synthetic layers and a revision with edited, reshaped, removed and added features"""
+    old = generate_layers(admin_cells=400, hazard_cells=60, vertices_per_edge=4)
+    new = copy.deepcopy(old)
+    rng = random.Random(40)
+    for k in rng.sample(range(len(new['seismic']['features'])), 3):
+        new['seismic']['features'][k]['properties']['revision'] = 2
+    for k in rng.sample(range(len(new['wind']['features'])), 3):
+        ring = new['wind']['features'][k]['geometry']['coordinates'][0]
+        new['wind']['features'][k]['geometry']['coordinates'][0] = [[x + 0.05, y] for x, y in ring]
+    admin = new['admin']['features']
+    del admin[10:12]
+    admin.insert(200, copy.deepcopy(admin[5]))
+    return old, new
+
+def random_points(n, seed=1):
+    rng = random.Random(seed)
+    return [rng.uniform(6, 37) for _ in range(n)], [rng.uniform(68, 97) for _ in range(n)]
+
+class TestLayerDiff:
+    """Test cases for layer_diff.LayerDiff and update_layer"""
+
+    def test_counts(self, revision):
+        old, new = revision
+        counts = {}
+        for name in old:
+            _, diff = update_layer(Layer.from_geojson(name, old[name]), new[name]['features'])
+            summary = diff.summary()
+            counts[name] = (summary['added'], summary['removed'], summary['modified'])
+        assert counts == {'seismic': (0, 0, 3), 'wind': (0, 0, 3), 'admin': (1, 2, 0)}
+
+    def test_no_changes(self, revision):
+        old, _ = revision
+        layer = Layer.from_geojson('wind', old['wind'])
+        updated, diff = update_layer(layer, old['wind']['features'])
+        assert not diff
+        assert diff.sources == list(range(len(layer)))
+        assert updated.rings[0] is layer.rings[0]
+
+    def test_affects_every_changed_point(self, revision):
+        """Results can only differ where the diff says they may"""
+        old, new = revision
+        lats, lons = random_points(5000)
+        before = LookupEngine({n: Layer.from_geojson(n, c) for n, c in old.items()}, 'numpy').lookup_many(lats, lons)
+        after = LookupEngine({n: Layer.from_geojson(n, c) for n, c in new.items()}, 'numpy').lookup_many(lats, lons)
+        diffs = {n: update_layer(Layer.from_geojson(n, old[n]), new[n]['features'])[1] for n in old}
+        changed = [a != b for a, b in zip(before, after)]
+        assert any(changed)
+        for lat, lon, differs in zip(lats, lons, changed):
+            if differs:
+                assert any(d.affects(lat, lon) for d in diffs.values())
+                assert affected(diffs, (lon - 1e-6, lat - 1e-6, lon + 1e-6, lat + 1e-6))
+
+    def test_reshape_only_affects_moved_area(self):
+        """Keeping attributes, only the area between old and new outline matters"""
+        square = lambda x0: {'type': 'Polygon', 'coordinates': [[[x0, 0], [x0 + 2, 0], [x0 + 2, 2], [x0, 2], [x0, 0]]]}
+        old = Layer('wind', [{'geometry': square(0), 'properties': {'Vb': 44}}])
+        new = Layer('wind', [{'geometry': square(1), 'properties': {'Vb': 44}}])
+        diff = LayerDiff(old, new)
+        assert diff.affects(1.0, 0.5) and diff.affects(1.0, 2.5)
+        assert not diff.affects(1.0, 1.5)
+
+class TestEngineUpdate:
+    """Test cases for LookupEngine.update through layer_diff.update_engine"""
+
+    @pytest.mark.parametrize("backend", available_backends())
+    def test_matches_rebuild(self, revision, backend):
+        old, new = revision
+        engine = LookupEngine({n: Layer.from_geojson(n, c) for n, c in old.items()}, backend)
+        updated, diffs = update_engine(engine, new)
+        assert set(diffs) == {'seismic', 'wind', 'admin'}
+        rebuilt = LookupEngine({n: Layer.from_geojson(n, c) for n, c in new.items()}, backend)
+        lats, lons = random_points(3000, seed=2)
+        assert updated.lookup_many(lats, lons) == rebuilt.lookup_many(lats, lons)
+
+    def test_unchanged_layers_shared(self, revision):
+        old, new = revision
+        engine = LookupEngine({n: Layer.from_geojson(n, c) for n, c in old.items()}, 'grid')
+        updated, diffs = update_engine(engine, {'wind': new['wind']})
+        assert list(diffs) == ['wind']
+        assert updated.layers['seismic'] is engine.layers['seismic']
+        assert updated._indexes['admin'] is engine._indexes['admin']
+
+    def test_grid_cells_match_rebuild(self, revision):
+        old, new = revision
+        engine = LookupEngine({n: Layer.from_geojson(n, c) for n, c in old.items()}, 'grid')
+        updated, _ = update_engine(engine, new)
+        for name, index in updated._indexes.items():
+            assert index._cells == GridBackend(updated.layers[name], index._n)._cells
+
+class TestSweepUpdate:
+    """Test cases for sweep.update_sweep"""
+
+    def test_matches_new_sweep(self, revision, tmp_path):
+        np = pytest.importorskip("numpy")
+        from sweep import sweep, update_sweep
+        old, new = revision
+        old_layers = {n: Layer.from_geojson(n, c) for n, c in old.items()}
+        new_layers = {n: Layer.from_geojson(n, c) for n, c in new.items()}
+        diffs = {n: update_layer(old_layers[n], new[n]['features'])[1] for n in old}
+        bbox = (72.0, 15.0, 82.0, 24.0)
+        sweep(str(tmp_path / "a.npy"), bbox, 0.02, layers=old_layers, workers=1, tile_size=64)
+        tiles = update_sweep(str(tmp_path / "a.npy"), lambda b: affected(diffs, b), layers=new_layers,
+                             workers=1, tile_size=64)
+        sweep(str(tmp_path / "b.npy"), bbox, 0.02, layers=new_layers, workers=1, tile_size=64)
+        assert 0 < tiles < 64
+        assert np.array_equal(np.load(tmp_path / "a.npy"), np.load(tmp_path / "b.npy"), equal_nan=True)
+
+    def test_parquet_refused(self, tmp_path):
+        pytest.importorskip("numpy")
+        from sweep import update_sweep
+        with pytest.raises(ValueError):
+            update_sweep(str(tmp_path / "grid.parquet"), lambda bbox: True)
+
+class TestCoreUpdate:
+    """core.update_layers keeps what a revision does not touch"""
+
+    def test_targeted_cache_invalidation(self, tmp_path, monkeypatch):
+        pytest.importorskip("geopandas")
+        import core
+        for filename in LAYER_FILES.values():
+            shutil.copy(os.path.join(DATA_DIR, filename), tmp_path / filename)
+        monkeypatch.setenv('LOCATION_WIZARD_CACHE', str(tmp_path / "cache.sqlite"))
+        core.clear_cache()
+        try:
+            core.load_shapefiles(str(tmp_path))
+            engine = core.get_lookup_engine()
+            assert core.get_location_properties(13.0827, 80.2707)['basic_wind_speed'] == 47.0
+            core.get_location_properties(28.6139, 77.2090)
+
+            # Revise the east coast wind speed in place
+            path = tmp_path / LAYER_FILES['wind']
+            wind = json.loads(path.read_text())
+            wind['features'][1]['properties']['Vb'] = 50.5
+            path.write_text(json.dumps(wind))
+            record = core.update_layers(changelog=str(tmp_path / "changes.jsonl"))
+
+            assert list(record['layers']) == ['wind']
+            assert (record['cache_kept'], record['cache_dropped']) == (1, 1)
+            assert core.get_lookup_engine()._indexes['seismic'] is engine._indexes['seismic']
+            assert core.get_location_properties(13.0827, 80.2707)['basic_wind_speed'] == 50.5
+            cache = core.get_shared_cache()
+            assert cache.get_point('properties', 28.6139, 77.2090) is not None
+            logged = json.loads((tmp_path / "changes.jsonl").read_text())
+            assert logged['layers']['wind']['changes'][0]['old_properties']['Vb'] == 47
+        finally:
+            core.clear_cache()
+
+    def test_missing_layer_file_refused(self, tmp_path, monkeypatch):
+        """A directory lacking a loaded layer is refused and nothing switches"""
+        pytest.importorskip("geopandas")
+        import core
+        revised = tmp_path / "revised"
+        revised.mkdir()
+        for name in ('seismic', 'wind'):
+            shutil.copy(os.path.join(DATA_DIR, LAYER_FILES[name]), revised / LAYER_FILES[name])
+        monkeypatch.setenv('LOCATION_WIZARD_CACHE', str(tmp_path / "cache.sqlite"))
+        core.clear_cache()
+        try:
+            core.load_shapefiles()
+            engine = core.get_lookup_engine()
+            version = core.get_shared_cache().version
+            with pytest.raises(FileNotFoundError, match=LAYER_FILES['admin']):
+                core.update_layers(str(revised))
+            assert core._data_dir == DATA_DIR
+            assert core.get_lookup_engine() is engine
+            assert core.get_shared_cache().version == version
+            assert core.get_location_properties(28.6139, 77.2090)['state'] == 'Delhi'
+        finally:
+            core.clear_cache()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,98 @@
+"""
+Unit tests for the load-test harness
+Histograms, point samplers, the stub geocoder and the runner
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest import (LatencyHistogram, LoadResult, PointSampler, StubGeocoder, compare, make_target,
+                      run_load, saturation_point)
+from synthetic_data import INDIA_EXTENT
+
+class TestLatencyHistogram:
+    """Test cases for loadtest.LatencyHistogram"""
+
+    def test_percentiles_within_bucket_resolution(self):
+        rng = random.Random(5)
+        samples = [rng.lognormvariate(-5, 1) for _ in range(10000)]
+        histogram = LatencyHistogram()
+        for s in samples:
+            histogram.record(s)
+        samples.sort()
+        for q in (50, 95, 99):
+            exact = samples[int(len(samples) * q / 100) - 1]
+            assert exact <= histogram.percentile(q) <= exact * 1.13
+        assert histogram.max == samples[-1]
+        assert histogram.mean == pytest.approx(sum(samples) / len(samples))
+
+    def test_merge(self):
+        a, b = LatencyHistogram(), LatencyHistogram()
+        a.record(0.001)
+        b.record(0.1)
+        merged = a.merge(b)
+        assert merged.count == 2 and merged.max == 0.1
+        assert merged.percentile(50) <= 0.001 * 1.13
+        assert LatencyHistogram().render() == "(no samples)"
+        assert merged.render().count('#') > 0
+
+class TestPointSampler:
+    """Test cases for loadtest.PointSampler"""
+
+    @pytest.mark.parametrize("distribution", ['uniform', 'cities', 'hotspot', 'mixed'])
+    def test_points_near_india(self, distribution):
+        sampler = PointSampler(distribution, seed=3)
+        lats, lons = sampler.points(500)
+        min_x, min_y, max_x, max_y = INDIA_EXTENT
+        assert all(min_y - 1 <= lat <= max_y + 1 for lat in lats)
+        assert all(min_x - 1 <= lon <= max_x + 1 for lon in lons)
+
+    def test_hotspots_repeat(self):
+        lats, _ = PointSampler('hotspot', seed=3).points(500)
+        assert len(set(lats)) <= 50
+
+    def test_reproducible(self):
+        assert PointSampler('mixed', seed=9).points(20) == PointSampler('mixed', seed=9).points(20)
+
+class TestRunner:
+    """Test cases for loadtest.run_load and the report helpers"""
+
+    def test_request_count_and_errors(self):
+        calls = []
+
+        def request(sampler):
+            calls.append(sampler.point())
+            if len(calls) % 10 == 0:
+                raise RuntimeError("boom")
+
+        result = run_load(request, 4, requests=100)
+        assert len(calls) == 100
+        assert result.errors == 10 and result.requests == 90
+        assert result.summary()['throughput'] > 0
+
+    def test_saturation_and_regressions(self):
+        def result(concurrency, throughput):
+            histogram = LatencyHistogram()
+            histogram.record(0.01)
+            return LoadResult(concurrency, histogram, 0, 1.0 / throughput)
+        results = [result(1, 100), result(2, 190), result(4, 200)]
+        assert saturation_point(results) == 2
+        baseline = [r.summary() for r in results]
+        slower = [dict(s, p95_s=s['p95_s'] * 2) for s in baseline]
+        assert compare(baseline, baseline) == []
+        assert len(compare(slower, baseline)) == 3
+
+    def test_address_against_stub(self):
+        pytest.importorskip("geopandas")
+        with StubGeocoder(latency=0.001, jitter=0) as stub:
+            result = run_load(make_target('address'), 2, requests=10, distribution='cities')
+        assert result.errors == 0 and result.requests == 10
+        assert stub.requests >= 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,104 @@
+"""
+Unit tests for the instrumentation layer
+Stage timers, cache counters, geocoding failures and sink output
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+from engine import LookupEngine, available_backends, load_layers
+
+@pytest.fixture
+def sink():
+    sink = metrics.enable(metrics.PrometheusSink())
+    yield sink
+    metrics.disable()
+
+class TestMetrics:
+    """Test cases for metrics.py"""
+
+    def test_disabled_is_noop(self):
+        """Timers are a shared no-op and counters are dropped while disabled"""
+        metrics.disable()
+        assert metrics.timer('load') is metrics.timer('geocode')
+        metrics.incr('lookups')
+        assert metrics.get_sink() is None
+
+    @pytest.mark.parametrize("backend", available_backends())
+    def test_timed_lookup_matches_untimed(self, sink, backend):
+        """Instrumented lookups give the same answers and record both stages"""
+        engine = LookupEngine(load_layers(), backend=backend)
+        timed = engine.lookup(28.6139, 77.2090)
+        metrics.disable()
+        assert engine.lookup(28.6139, 77.2090) == timed
+        stages = {dict(labels)['stage'] for (_, labels) in sink.timings}
+        assert {'engine_build', 'index_query', 'exact_test'} <= stages
+
+    def test_batch_stage(self, sink):
+        """Batch lookups are timed per layer"""
+        LookupEngine(load_layers(), backend='python').lookup_many([28.6, 19.0], [77.2, 72.8])
+        layers = {dict(labels).get('layer') for (_, labels) in sink.timings if dict(labels)['stage'] == 'batch_query'}
+        assert layers == {'seismic', 'wind', 'admin'}
+
+    def test_cache_hit_ratio(self, sink):
+        """Cache hit ratio from hit and miss counters"""
+        assert sink.cache_hit_ratio('layers') is None
+        metrics.cache('layers', False)
+        for _ in range(3):
+            metrics.cache('layers', True)
+        assert sink.cache_hit_ratio('layers') == 0.75
+
+    def test_geocode_timeouts_and_failures(self, sink, monkeypatch):
+        """Timeouts and other errors are counted separately"""
+        requests = pytest.importorskip("requests")
+        pytest.importorskip("geopandas")
+        import core
+
+        def timeout(*args, **kwargs):
+            raise requests.exceptions.ReadTimeout("slow")
+
+        def refused(*args, **kwargs):
+            raise requests.exceptions.ConnectionError("down")
+
+        monkeypatch.setattr(requests, 'get', timeout)
+        assert core.get_reverse_geocoding(28.6, 77.2) is None
+        monkeypatch.setattr(requests, 'get', refused)
+        assert core.search_location("Nowhere") is None
+        assert sink.counter('geocode_timeouts', operation='reverse') == 1
+        assert sink.counter('geocode_failures', operation='search') == 1
+
+    def test_prometheus_render(self, sink):
+        """Text exposition has TYPE lines and labelled samples"""
+        metrics.cache('engine', True)
+        with metrics.timer('load'):
+            pass
+        text = sink.render()
+        assert '# TYPE location_wizard_cache_hits_total counter' in text
+        assert 'location_wizard_cache_hits_total{cache="engine"} 1' in text
+        assert 'location_wizard_stage_seconds_count{stage="load"} 1' in text
+
+    def test_prometheus_escapes_label_values(self, sink):
+        """Backslashes, quotes and newlines in label values are escaped"""
+        metrics.incr('odd', reason='C:\\tmp "x"\nend')
+        text = sink.render()
+        assert 'location_wizard_odd_total{reason="C:\\\\tmp \\"x\\"\\nend"} 1' in text
+        assert all(line.startswith(('#', 'location_wizard_')) for line in text.splitlines())
+
+    def test_log_sink(self, caplog):
+        """Log sink writes one JSON record per event"""
+        import logging
+        metrics.enable(metrics.LogSink(level=logging.INFO))
+        try:
+            with caplog.at_level(logging.INFO, logger='location_wizard.metrics'):
+                metrics.incr('lookups', layer='admin')
+        finally:
+            metrics.disable()
+        assert '"metric": "lookups"' in caplog.text
+
+if __name__ == "__main__":
+    pytest.main([__file__])
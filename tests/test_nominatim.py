@@ -0,0 +1,206 @@
+"""
+Unit tests for deadline-aware geocoding
+Callers must get an answer or a fallback within the budget, whatever the upstream does
+"""
+
+import pytest
+import time
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nominatim
+from nominatim import CircuitBreaker, Unavailable
+
+PRIMARY = 'http://primary.test'
+SECONDARY = 'http://secondary.test'
+
+requests = pytest.importorskip("requests")
+
+class Response:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+@pytest.fixture(autouse=True)
+def upstream(monkeypatch):
+    """Endpoints whose behaviour a test sets per URL: a delay, an error or an answer"""
+    monkeypatch.setenv('LOCATION_WIZARD_NOMINATIM_URL', PRIMARY)
+    monkeypatch.delenv('LOCATION_WIZARD_NOMINATIM_SECONDARY', raising=False)
+    monkeypatch.setenv('LOCATION_WIZARD_HEDGE_DELAY', '0.05')
+    nominatim.reset()
+    behaviour = {}
+    calls = []
+
+    def get(url, params=None, headers=None, timeout=None):
+        base = url.rsplit('/', 1)[0]
+        calls.append(base)
+        delay, result = behaviour.get(base, (0, {'display_name': base}))
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result if isinstance(result, Response) else Response(result)
+
+    monkeypatch.setattr(requests, 'get', get)
+    yield behaviour, calls
+    nominatim.reset()
+
+class TestCircuitBreaker:
+    """Test cases for nominatim.CircuitBreaker"""
+
+    def test_trips_and_recovers(self):
+        now = [0.0]
+        breaker = CircuitBreaker('x', failure_threshold=2, reset_after=10, clock=lambda: now[0])
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == 'open' and not breaker.allow()
+        now[0] = 10.0
+        assert breaker.allow() and not breaker.allow()   # one probe in half-open state
+        breaker.record_success()
+        assert breaker.state == 'closed' and breaker.allow()
+
+    def test_failed_probe_reopens(self):
+        now = [0.0]
+        breaker = CircuitBreaker('x', failure_threshold=1, reset_after=10, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 10.0
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == 'open'
+
+class TestGetJson:
+    """Test cases for nominatim.get_json"""
+
+    def test_answer(self, upstream):
+        assert nominatim.get_json('/reverse', {'lat': 1}, 'reverse') == {'display_name': PRIMARY}
+
+    def test_budget_bounds_latency(self, upstream):
+        behaviour, _ = upstream
+        behaviour[PRIMARY] = (1.0, {})
+        start = time.monotonic()
+        with pytest.raises(Unavailable):
+            nominatim.get_json('/reverse', {'lat': 1}, 'reverse', budget=0.1)
+        assert time.monotonic() - start < 0.5
+
+    def test_open_circuit_short_circuits(self, upstream):
+        behaviour, calls = upstream
+        behaviour[PRIMARY] = (0, requests.exceptions.ConnectionError("down"))
+        for _ in range(3):
+            with pytest.raises(Unavailable):
+                nominatim.get_json('/search', {'q': 'x'}, 'search')
+        assert not nominatim.available()
+        with pytest.raises(Unavailable):
+            nominatim.get_json('/search', {'q': 'x'}, 'search')
+        assert len(calls) == 3
+
+    def test_stale_answer_while_down(self, upstream):
+        behaviour, _ = upstream
+        assert nominatim.get_json('/reverse', {'lat': 1}, 'reverse') == {'display_name': PRIMARY}
+        behaviour[PRIMARY] = (0, requests.exceptions.ConnectionError("down"))
+        assert nominatim.get_json('/reverse', {'lat': 1}, 'reverse') == {'display_name': PRIMARY}
+        with pytest.raises(Unavailable):
+            nominatim.get_json('/reverse', {'lat': 2}, 'reverse')
+
+    def test_non_200_is_failure(self, upstream):
+        behaviour, _ = upstream
+        behaviour[PRIMARY] = (0, Response({}, status_code=503))
+        with pytest.raises(Unavailable):
+            nominatim.get_json('/reverse', {'lat': 1}, 'reverse')
+        assert nominatim.get_breaker(PRIMARY)._failures == 1
+
+class TestHedging:
+    """A secondary endpoint answers for a slow or failing primary"""
+
+    def test_hedge_wins_over_slow_primary(self, upstream, monkeypatch):
+        behaviour, calls = upstream
+        monkeypatch.setenv('LOCATION_WIZARD_NOMINATIM_SECONDARY', SECONDARY)
+        behaviour[PRIMARY] = (1.0, {'display_name': PRIMARY})
+        start = time.monotonic()
+        assert nominatim.get_json('/reverse', {'lat': 1}, 'reverse') == {'display_name': SECONDARY}
+        assert time.monotonic() - start < 0.5
+        assert calls == [PRIMARY, SECONDARY]
+
+    def test_no_hedge_for_fast_primary(self, upstream, monkeypatch):
+        _, calls = upstream
+        monkeypatch.setenv('LOCATION_WIZARD_NOMINATIM_SECONDARY', SECONDARY)
+        nominatim.get_json('/reverse', {'lat': 1}, 'reverse')
+        assert calls == [PRIMARY]
+
+    def test_failover(self, upstream, monkeypatch):
+        behaviour, _ = upstream
+        monkeypatch.setenv('LOCATION_WIZARD_NOMINATIM_SECONDARY', SECONDARY)
+        monkeypatch.setenv('LOCATION_WIZARD_HEDGE_DELAY', '5')
+        behaviour[PRIMARY] = (0, requests.exceptions.ConnectionError("down"))
+        start = time.monotonic()
+        assert nominatim.get_json('/reverse', {'lat': 1}, 'reverse') == {'display_name': SECONDARY}
+        assert time.monotonic() - start < 0.5
+
+    def test_preempted_half_open_secondary_stays_usable(self, upstream, monkeypatch):
+        """A half-open secondary that the primary answers for keeps its probe for later"""
+        behaviour, calls = upstream
+        monkeypatch.setenv('LOCATION_WIZARD_NOMINATIM_SECONDARY', SECONDARY)
+        for url in (PRIMARY, SECONDARY):
+            breaker = nominatim.get_breaker(url)
+            breaker._opened_at = time.monotonic() - breaker.reset_after - 1
+        assert nominatim.get_json('/reverse', {'lat': 1}, 'reverse') == {'display_name': PRIMARY}
+        assert calls == [PRIMARY]
+        assert nominatim.get_breaker(SECONDARY).state == 'half_open'
+        assert not nominatim.get_breaker(SECONDARY)._probing
+
+        behaviour[PRIMARY] = (0, requests.exceptions.ConnectionError("down"))
+        assert nominatim.get_json('/reverse', {'lat': 2}, 'reverse') == {'display_name': SECONDARY}
+        assert nominatim.get_breaker(SECONDARY).state == 'closed'
+
+    def test_half_open_primary_losing_hedge_settles(self, upstream, monkeypatch):
+        """A half-open primary outrun by the hedge still closes when its probe answers"""
+        behaviour, calls = upstream
+        monkeypatch.setenv('LOCATION_WIZARD_NOMINATIM_SECONDARY', SECONDARY)
+        primary = nominatim.get_breaker(PRIMARY)
+        primary._opened_at = time.monotonic() - primary.reset_after - 1
+        behaviour[PRIMARY] = (0.3, {'display_name': PRIMARY})
+        assert nominatim.get_json('/reverse', {'lat': 1}, 'reverse') == {'display_name': SECONDARY}
+        time.sleep(0.5)
+        assert primary.state == 'closed' and not primary._probing
+
+        behaviour[PRIMARY] = (0, {'display_name': PRIMARY})
+        del calls[:]
+        assert nominatim.get_json('/reverse', {'lat': 2}, 'reverse') == {'display_name': PRIMARY}
+        assert calls == [PRIMARY]
+
+    def test_fast_failures_report_last_error(self, upstream, monkeypatch):
+        behaviour, _ = upstream
+        monkeypatch.setenv('LOCATION_WIZARD_NOMINATIM_SECONDARY', SECONDARY)
+        behaviour[PRIMARY] = (0, requests.exceptions.ConnectionError("down"))
+        behaviour[SECONDARY] = (0, Response({}, status_code=503))
+        with pytest.raises(Unavailable, match="503"):
+            nominatim.get_json('/reverse', {'lat': 1}, 'reverse')
+
+class TestCoreDegradation:
+    """core.py geocoding while Nominatim is down"""
+
+    @pytest.fixture(autouse=True)
+    def _down(self, upstream):
+        pytest.importorskip("geopandas")
+        behaviour, _ = upstream
+        behaviour[PRIMARY] = (0, requests.exceptions.ConnectionError("down"))
+
+    def test_search_falls_back_to_gazetteer(self):
+        import core
+        found = core.search_location("Mumbai")
+        assert (found['lat'], found['lon']) == (19.0760, 72.8777) and found['offline']
+        assert core.search_location("Nowhere") is None
+
+    def test_address_keeps_offline_fields(self):
+        import core
+        address = core.get_address(19.07, 72.87, enrich=True)
+        assert address['osm_display_name'] is None
+        assert address['district'] == 'Mumbai'
+
+if __name__ == "__main__":
+    pytest.main([__file__])
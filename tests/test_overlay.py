@@ -0,0 +1,84 @@
+"""
+Unit tests for the multi-hazard overlay
+The overlay engine must answer exactly like the per-layer engine
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("shapely")
+
+from engine import OVERLAY, Layer, LookupEngine, available_backends, load_layers
+from overlay import build_overlay, load_overlay, write_overlay
+from synthetic_data import generate_layers
+
+def random_points(n, seed=31):
+    rng = random.Random(seed)
+    return [rng.uniform(4.0, 39.0) for _ in range(n)], [rng.uniform(66.0, 99.0) for _ in range(n)]
+
+@pytest.fixture(scope='module')
+def synthetic_layers():
+    collections = generate_layers(admin_cells=400, hazard_cells=60, vertices_per_edge=6, seed=5)
+    return {name: Layer(name, c['features']) for name, c in collections.items()}
+
+class TestOverlay:
+    """Test cases for overlay.py"""
+
+    @pytest.mark.parametrize("backend", available_backends())
+    def test_matches_layered_engine_bundled(self, backend):
+        """Overlay lookups equal per-layer lookups on the bundled data"""
+        layers = load_layers()
+        overlay = build_overlay(layers)
+        lats, lons = random_points(3000)
+        expected = LookupEngine(layers, backend='python').lookup_many(lats, lons)
+        assert LookupEngine(layers, backend=backend, overlay=overlay).lookup_many(lats, lons) == expected
+
+    def test_matches_layered_engine_synthetic(self, synthetic_layers):
+        """Holes, multipolygons and shared boundaries survive the overlay"""
+        lats, lons = random_points(3000, seed=13)
+        expected = LookupEngine(synthetic_layers).lookup_many(lats, lons)
+        engine = LookupEngine(synthetic_layers, overlay=True)
+        assert engine.lookup_many(lats, lons) == expected
+        assert [engine.lookup(lat, lon) for lat, lon in zip(lats[:200], lons[:200])] == expected[:200]
+
+    def test_cells_do_not_overlap(self, synthetic_layers):
+        """Cell areas add up to the area of their union"""
+        import shapely
+        from shapely.geometry import shape
+        cells = [shape(g) for g in build_overlay(synthetic_layers).geometries]
+        assert sum(c.area for c in cells) == pytest.approx(shapely.union_all(cells).area, rel=1e-9)
+
+    def test_additional_layer(self):
+        """A new hazard layer is picked up by a rebuild and reported by name"""
+        layers = load_layers()
+        layers['flood'] = Layer('flood', [{"properties": {"class": "high"}, "geometry": {
+            "type": "Polygon", "coordinates": [[[77.0, 28.5], [77.5, 28.5], [77.5, 28.8], [77.0, 28.8], [77.0, 28.5]]]}}])
+        result = LookupEngine(layers, overlay=True).lookup(28.6139, 77.2090)
+        assert result['flood'] == {"class": "high"}
+        assert result['seismic_zone'] == 'IV'
+        assert 'flood' not in LookupEngine(layers, overlay=True).lookup(19.0760, 72.8777)
+
+    def test_round_trip(self, tmp_path):
+        """Saved overlays load back without shapely and give the same answers"""
+        layers = load_layers()
+        path = str(tmp_path / 'overlay.geojson')
+        write_overlay(build_overlay(layers), path)
+        overlay = load_overlay(path)
+        assert overlay.name == OVERLAY
+        engine = LookupEngine(layers, backend='python', overlay=overlay)
+        assert engine.lookup(13.0827, 80.2707)['basic_wind_speed'] == 47.0
+
+    @pytest.mark.parametrize("backend", available_backends())
+    def test_empty_overlay_is_used(self, backend):
+        """A prebuilt overlay without cells still replaces the per-layer indexes"""
+        engine = LookupEngine(load_layers(), backend=backend, overlay=Layer(OVERLAY, []))
+        assert list(engine._indexes) == [OVERLAY]
+        assert engine.lookup(28.6139, 77.2090)['seismic_zone'] == 'Unknown'
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,124 @@
+"""
+Unit tests for the profiling hooks
+Stage-scoped timers, the stack sampler, memory tracing and profile files
+"""
+
+import pytest
+import json
+import sys
+import os
+import threading
+import time
+import tracemalloc
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core  # noqa: F401  (loaded before tracing starts)
+import metrics
+from profiling import ProfileSession, ProfilingSink, StackSampler, from_env, profile_batch
+
+class TestProfilingSink:
+    """Test cases for profiling.ProfilingSink"""
+
+    def test_scoped_timer_tracks_nested_stages(self):
+        sink = metrics.enable(ProfilingSink(memory=False))
+        try:
+            with metrics.timer('load'):
+                with metrics.timer('read_file'):
+                    assert sink.stages(threading.get_ident()) == ('load', 'read_file')
+                assert sink.stages(threading.get_ident()) == ('load',)
+            assert sink.stages(threading.get_ident()) == ()
+        finally:
+            metrics.disable()
+        report = sink.stage_report()
+        assert report['load']['calls'] == 1 and report['read_file']['calls'] == 1
+        assert 'net_bytes' not in report['load']
+
+    def test_plain_sinks_keep_plain_timer(self):
+        metrics.enable(metrics.InMemorySink())
+        try:
+            assert type(metrics.timer('load')).__name__ == '_Timer'
+        finally:
+            metrics.disable()
+
+    def test_memory_per_stage(self):
+        sink = metrics.enable(ProfilingSink())
+        tracemalloc.start()
+        try:
+            with metrics.timer('materialize'):
+                blob = [bytearray(1000) for _ in range(1000)]
+            del blob
+        finally:
+            tracemalloc.stop()
+            metrics.disable()
+        entry = sink.stage_report()['materialize']
+        assert entry['peak_bytes'] >= 1_000_000
+        assert entry['net_bytes'] >= 1_000_000
+        assert any('test_profiling.py' in line for line in sink.top_allocations['materialize'])
+
+class TestStackSampler:
+    """Test cases for profiling.StackSampler"""
+
+    def test_folded_stacks_rooted_at_stage(self, tmp_path):
+        sampler = StackSampler(0.001, stage=lambda thread_id: ('batch_query',))
+        sampler.start()
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+        sampler.stop()
+        assert sampler.samples > 0
+        path = tmp_path / 'profile.folded'
+        sampler.write_folded(str(path))
+        lines = path.read_text().splitlines()
+        assert lines
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0
+            assert stack.startswith('[batch_query];')
+        assert any('test_folded_stacks_rooted_at_stage (test_profiling.py' in line for line in lines)
+
+class TestProfileSession:
+    """Test cases for profiling.ProfileSession and the batch workload"""
+
+    @pytest.mark.parametrize("mode", ['sample', 'cprofile', 'both'])
+    def test_batch_profile_files(self, tmp_path, mode):
+        previous = metrics.enable(metrics.InMemorySink())
+        try:
+            session = ProfileSession(str(tmp_path), mode, interval=0.001)
+            with session:
+                results = profile_batch(300, compact=mode == 'both')
+            assert len(results) == 300
+            assert metrics.get_sink() is previous
+            assert not tracemalloc.is_tracing()
+        finally:
+            metrics.disable()
+
+        assert ('folded' in session.paths) == (mode != 'cprofile')
+        assert ('pstats' in session.paths) == (mode != 'sample')
+        stages = json.loads((tmp_path / 'stages.json').read_text())
+        assert {'load', 'read_file', 'batch_plan', 'batch_query', 'materialize'} <= set(stages['stages'])
+        assert stages['stages']['materialize']['peak_bytes'] > 0
+        assert (tmp_path / 'allocations.txt').read_text().startswith('== ')
+        if mode == 'cprofile':
+            import pstats
+            assert pstats.Stats(session.paths['pstats']).total_calls > 0
+        assert 'materialize' in session.summary()
+
+    def test_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            ProfileSession(str(tmp_path), 'perf')
+
+    def test_from_env(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('LOCATION_WIZARD_PROFILE', raising=False)
+        assert not isinstance(from_env(), ProfileSession)
+        monkeypatch.setenv('LOCATION_WIZARD_PROFILE', str(tmp_path))
+        monkeypatch.setenv('LOCATION_WIZARD_PROFILE_MODE', 'cprofile')
+        monkeypatch.setenv('LOCATION_WIZARD_PROFILE_MEMORY', '0')
+        session = from_env()
+        assert session.mode == 'cprofile' and session.memory is False
+        assert session.output_dir == str(tmp_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
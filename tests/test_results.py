@@ -0,0 +1,113 @@
+"""
+Unit tests for compact lookup results
+Records and batches must read exactly like the result dicts they replace
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import lookup_batch
+from engine import Layer, LookupEngine, load_layers
+from results import LocationResult, ResultBatch
+from synthetic_data import generate_layers
+
+def random_points(n, seed=41):
+    rng = random.Random(seed)
+    lats = [rng.uniform(5, 38) for _ in range(n)]
+    lons = [rng.uniform(67, 98) for _ in range(n)]
+    # Repeats exercise the deduplicated path
+    return lats + lats[:50], lons + lons[:50]
+
+@pytest.fixture(scope="module")
+def synthetic_engine():
+    collections = generate_layers(admin_cells=300, hazard_cells=40, vertices_per_edge=4)
+    return LookupEngine({name: Layer.from_geojson(name, c) for name, c in collections.items()}, 'grid')
+
+class TestLocationResult:
+    """Test cases for results.LocationResult"""
+
+    def test_reads_like_dict(self):
+        result = {'lat': 19.07, 'lon': 72.87, 'seismic_zone': 'III', 'zone_factor': 0.16,
+                  'basic_wind_speed': None, 'place_name': 'Mumbai', 'state': 'Maharashtra'}
+        record = LocationResult.from_dict(result)
+        assert record == result
+        assert record['state'] == record.state == 'Maharashtra'
+        assert record.get('missing', 'x') == 'x'
+        assert list(record.items()) == list(result.items())
+        assert record.to_dict() == result
+
+    def test_no_instance_dict(self):
+        record = LocationResult(0.0, 0.0)
+        assert not hasattr(record, '__dict__')
+        with pytest.raises(AttributeError):
+            record.extra = 1
+
+    def test_strings_interned(self):
+        name = ''.join(['Maha', 'rashtra'])
+        assert LocationResult(0.0, 0.0, state=name).state is LocationResult(1.0, 1.0, state='Maharashtra').state
+
+class TestResultBatch:
+    """Test cases for results.ResultBatch"""
+
+    @pytest.mark.parametrize("overlay", [False, True])
+    def test_matches_dicts(self, synthetic_engine, overlay):
+        if overlay:
+            pytest.importorskip("shapely")
+            engine = LookupEngine(synthetic_engine.layers, 'grid', overlay=True)
+        else:
+            engine = synthetic_engine
+        lats, lons = random_points(3000)
+        expected = lookup_batch(engine, lats, lons)
+        batch = lookup_batch(engine, lats, lons, compact=True)
+        assert len(batch) == len(expected)
+        assert batch.to_dicts() == expected
+        assert batch[7] == expected[7] and batch[-1] == expected[-1]
+
+    def test_bundled_layers(self):
+        engine = LookupEngine(load_layers(), 'python')
+        lats, lons = [28.6139, 19.0760, 0.0], [77.2090, 72.8777, 0.0]
+        batch = lookup_batch(engine, lats, lons, compact=True)
+        assert batch.column('place_name') == ['Delhi', 'Mumbai', 'Unknown']
+        assert batch.column('basic_wind_speed') == [44.0, None, None]
+
+    def test_from_results_round_trip(self, synthetic_engine):
+        lats, lons = random_points(500)
+        expected = synthetic_engine.lookup_many(lats, lons)
+        assert ResultBatch.from_results(expected).to_dicts() == expected
+
+    def test_compact_memory(self, synthetic_engine):
+        """Columns and tables take a small fraction of the dict size"""
+        lats, lons = random_points(5000)
+        batch = lookup_batch(synthetic_engine, lats, lons, compact=True)
+        assert batch.nbytes / len(batch) < 40
+        assert {batch.columns[f].typecode for f in batch.categories} <= {'B', 'H'}
+
+    def test_empty(self, synthetic_engine):
+        batch = lookup_batch(synthetic_engine, [], [], compact=True)
+        assert len(batch) == 0 and batch.to_dicts() == []
+
+    def test_dataframe(self, synthetic_engine):
+        pytest.importorskip("pandas")
+        lats, lons = random_points(200)
+        frame = lookup_batch(synthetic_engine, lats, lons, compact=True).to_dataframe()
+        assert str(frame['state'].dtype) == 'category'
+        assert frame.to_dict('records')[3]['lat'] == lats[3]
+
+class TestCoreCompact:
+    """compact=True in the core.py API"""
+
+    def test_single_and_batch(self):
+        pytest.importorskip("geopandas")
+        import core
+        assert core.get_location_properties(28.6139, 77.2090, compact=True) == core.get_location_properties(28.6139, 77.2090)
+        lats, lons = [28.6139, 13.0827], [77.2090, 80.2707]
+        batch = core.get_location_properties_batch(lats, lons, compact=True)
+        assert batch.to_dicts() == core.get_location_properties_batch(lats, lons)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,166 @@
+"""
+Unit tests for sharded lookups
+Sharded answers must equal the full engine's, with each shard holding part of the layers
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sharding
+from engine import Layer, LookupEngine, empty_result, load_layers
+from sharding import LocalCluster, ShardRouter, ShardedEngine, partition, shard_layers, write_shards
+from synthetic_data import generate_layers
+
+@pytest.fixture(scope="module")
+def layers():
+    raw = generate_layers(admin_cells=1500, hazard_cells=200, vertices_per_edge=4)
+    return {name: Layer.from_geojson(name, collection) for name, collection in raw.items()}
+
+@pytest.fixture(scope="module")
+def points():
+    rng = random.Random(7)
+    return [rng.uniform(4, 39) for _ in range(5000)], [rng.uniform(66, 99) for _ in range(5000)]
+
+class TestShardRouter:
+    """Test cases for sharding.ShardRouter"""
+
+    def test_shard_of(self):
+        router = ShardRouter((70.0, 10.0), 1.0, 2, 2, [0, 1, 2, 2])
+        assert router.shards == 3
+        assert router.shard_of(10.5, 70.5) == 0
+        assert router.shard_of(10.5, 71.5) == 1
+        assert router.shard_of(12.0, 72.0) == 2
+        assert router.shard_of(9.9, 70.5) is None
+        assert router.shards_touching((70.5, 10.5, 71.5, 10.6)) == {0, 1}
+
+    def test_round_trip(self, layers, tmp_path):
+        router = partition(layers, 3, 'state')
+        router.save(str(tmp_path / 'router.json'))
+        loaded = ShardRouter.load(str(tmp_path / 'router.json'))
+        assert loaded.owners == router.owners
+        assert loaded.labels == router.labels
+        assert loaded.extent == router.extent
+
+    def test_split_matches_python(self, layers, points, monkeypatch):
+        router = partition(layers, 4, 'tile')
+        lats, lons = points
+        fast = router.split(lats, lons)
+        monkeypatch.setattr(sharding, '_HAVE_NUMPY', False)
+        slow = router.split(lats, lons)
+        assert {shard: list(positions) for shard, positions in fast.items()} == slow
+        assert None in slow
+        assert sum(len(p) for p in slow.values()) == len(lats)
+
+class TestPartition:
+    """Test cases for sharding.partition and sharding.shard_layers"""
+
+    def test_states_stay_whole(self, layers, points):
+        router = partition(layers, 4, 'state')
+        states = [state for labels in router.labels for state in labels]
+        assert len(states) == len(set(states)) == len({p['STATE'] for p in layers['admin'].properties})
+        shard_of_state = {state: shard for shard, labels in enumerate(router.labels) for state in labels}
+        # Only router cells straddling a state border may route elsewhere
+        lats, lons = points
+        results = [r for r in LookupEngine(layers).lookup_many(lats, lons) if r['state'] != 'Unknown']
+        agree = sum(router.shard_of(r['lat'], r['lon']) == shard_of_state[r['state']] for r in results)
+        assert agree >= 0.95 * len(results)
+
+    @pytest.mark.parametrize("by", ['state', 'tile'])
+    def test_shards_are_smaller(self, layers, by):
+        router = partition(layers, 4, by)
+        parts = shard_layers(layers, router)
+        assert len(parts) == 4
+        total = sum(len(layer) for layer in layers.values())
+        for part in parts:
+            assert sum(len(layer) for layer in part.values()) < total / 2
+
+    def test_state_needs_admin(self, layers):
+        with pytest.raises(ValueError):
+            partition({'seismic': layers['seismic']}, 2, 'state')
+        with pytest.raises(ValueError):
+            partition(layers, 2, 'county')
+
+class TestShardedEngine:
+    """Test cases for sharding.ShardedEngine"""
+
+    @pytest.mark.parametrize("by", ['state', 'tile'])
+    def test_matches_full_engine(self, layers, points, by):
+        router = partition(layers, 4, by)
+        nodes = {shard: LookupEngine(part) for shard, part in enumerate(shard_layers(layers, router))}
+        full = LookupEngine(layers)
+        lats, lons = points
+        with ShardedEngine(router, nodes) as engine:
+            assert engine.lookup_many(lats, lons) == full.lookup_many(lats, lons)
+            for lat, lon in zip(lats[:200], lons[:200]):
+                assert engine.lookup(lat, lon) == full.lookup(lat, lon)
+            assert engine.lookup(50.0, 50.0) == empty_result(50.0, 50.0)
+            assert engine.lookup_many([], []) == []
+
+    def test_bundled_layers(self):
+        layers = load_layers()
+        with sharding.local_engine(layers, 2, 'state', cell_size=0.5) as engine:
+            assert engine.lookup(28.6139, 77.2090) == LookupEngine(layers).lookup(28.6139, 77.2090)
+
+class TestLocalCluster:
+    """Test cases for sharding.LocalCluster, one daemon process per shard"""
+
+    def test_cluster_matches_full_engine(self, layers, points, tmp_path):
+        pytest.importorskip("geopandas")
+        router = partition(layers, 2, 'tile')
+        directories = write_shards(layers, router, str(tmp_path / 'shards'))
+        assert len(directories) == 2
+        assert load_layers(directories[0])['admin'].properties
+        lats, lons = points
+        with LocalCluster(str(tmp_path / 'shards'), str(tmp_path)) as cluster:
+            assert set(cluster.processes) == {0, 1}
+            assert cluster.engine.lookup_many(lats[:2000], lons[:2000]) == \
+                LookupEngine(layers).lookup_many(lats[:2000], lons[:2000])
+
+
+    def test_cluster_shard_without_layer(self, tmp_path):
+        """A shard with none of a layer's features answers from its own files only"""
+        pytest.importorskip("geopandas")
+        import json
+        from engine import LAYER_FILES
+        layers = load_layers()
+        router = partition(layers, 4, 'tile')
+        parts = shard_layers(layers, router)
+        empty = [shard for shard, part in enumerate(parts) if 'admin' not in part]
+        assert empty
+        directories = write_shards(layers, router, str(tmp_path / 'shards'))
+        for directory in directories:
+            assert sorted(os.listdir(directory)) == sorted(LAYER_FILES.values())
+        with open(os.path.join(directories[empty[0]], LAYER_FILES['admin'])) as f:
+            assert json.load(f)['features'] == []
+
+        rng = random.Random(3)
+        lats = [rng.uniform(6, 37) for _ in range(2000)]
+        lons = [rng.uniform(68, 97) for _ in range(2000)]
+        with LocalCluster(str(tmp_path / 'shards'), str(tmp_path)) as cluster:
+            assert cluster.engine.lookup_many(lats, lons) == LookupEngine(layers).lookup_many(lats, lons)
+
+    def test_core_keeps_loaded_directory(self, tmp_path):
+        """Layers missing from the loaded directory are not filled in from the bundled data"""
+        pytest.importorskip("geopandas")
+        import shutil
+        import core
+        from engine import DATA_DIR, LAYER_FILES
+        shutil.copy(os.path.join(DATA_DIR, LAYER_FILES['seismic']), tmp_path / LAYER_FILES['seismic'])
+        core.clear_cache()
+        try:
+            core.load_shapefiles(str(tmp_path))
+            engine = core.get_lookup_engine()
+            assert list(engine.layers) == ['seismic']
+            assert core._data_dir == str(tmp_path)
+            assert core.get_location_properties(28.6139, 77.2090)['state'] == 'Unknown'
+        finally:
+            core.clear_cache()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,133 @@
+"""
+Unit tests for the shared result cache
+Entries must be visible across processes and vanish when layers change
+"""
+
+import multiprocessing
+import pytest
+import shutil
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+from engine import DATA_DIR, LAYER_FILES
+from shared_cache import SharedCache, geohash, layers_version
+
+def _write_entry(path, version):
+    SharedCache(path, version).put('properties', 'cell', {'seismic_zone': 'IV'})
+
+@pytest.fixture
+def core_with_cache(tmp_path, monkeypatch):
+    """core.py with the shared cache at a temporary path"""
+    pytest.importorskip("geopandas")
+    import core
+    monkeypatch.setenv('LOCATION_WIZARD_CACHE', str(tmp_path / "cache.sqlite"))
+    core.clear_cache()
+    sink = metrics.enable()
+    yield core, sink
+    metrics.disable()
+    core.clear_cache()
+
+class TestGeohash:
+    """Test cases for shared_cache.geohash"""
+
+    def test_known_values(self):
+        assert geohash(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+        assert geohash(42.6, -5.6, 5) == 'ezs42'
+
+    def test_prefixes_nest(self):
+        """Shorter hashes are prefixes of longer ones"""
+        assert geohash(28.6139, 77.2090, 9).startswith(geohash(28.6139, 77.2090, 5))
+
+class TestSharedCache:
+    """Test cases for shared_cache.SharedCache"""
+
+    def test_round_trip(self, tmp_path):
+        cache = SharedCache(str(tmp_path / "c.sqlite"), 'v1')
+        assert cache.get('properties', 'abc') is None
+        cache.put('properties', 'abc', {'zone_factor': 0.24, 'state': None})
+        assert cache.get('properties', 'abc') == {'zone_factor': 0.24, 'state': None}
+
+    def test_points_share_a_cell(self, tmp_path):
+        cache = SharedCache(str(tmp_path / "c.sqlite"), 'v1', precision=6)
+        cache.put_point('reverse', 19.0760, 72.8777, "Mumbai")
+        assert cache.get_point('reverse', 19.0761, 72.8778) == "Mumbai"
+        assert cache.get_point('reverse', 19.2, 72.8777) is None
+
+    def test_visible_across_processes(self, tmp_path):
+        """An entry written by another process is read here"""
+        path = str(tmp_path / "c.sqlite")
+        SharedCache(path, 'v1')
+        process = multiprocessing.get_context('spawn').Process(target=_write_entry, args=(path, 'v1'))
+        process.start()
+        process.join(60)
+        assert process.exitcode == 0
+        assert SharedCache(path, 'v1').get('properties', 'cell') == {'seismic_zone': 'IV'}
+
+    def test_versions_are_isolated(self, tmp_path):
+        """Entries of an old data version are ignored and pruned"""
+        path = str(tmp_path / "c.sqlite")
+        SharedCache(path, 'old').put('properties', 'abc', {'seismic_zone': 'III'})
+        cache = SharedCache(path, 'new')
+        assert cache.get('properties', 'abc') is None
+        assert cache.prune() == 1
+
+    def test_max_age(self, tmp_path):
+        cache = SharedCache(str(tmp_path / "c.sqlite"), 'v1', max_age=-1)
+        cache.put('search', 'delhi', {'lat': 28.6})
+        assert cache.get('search', 'delhi') is None
+
+    def test_layers_version_tracks_files(self, tmp_path):
+        """Editing any layer file changes the version"""
+        for name in LAYER_FILES.values():
+            shutil.copy(os.path.join(DATA_DIR, name), tmp_path / name)
+        before = layers_version(str(tmp_path))
+        assert layers_version(str(tmp_path)) == before
+        with open(tmp_path / LAYER_FILES['wind'], 'a') as f:
+            f.write(' ')
+        assert layers_version(str(tmp_path)) != before
+
+class TestCoreSharedCache:
+    """core.py reads and fills the shared cache"""
+
+    def test_properties_reused_without_loading_layers(self, core_with_cache):
+        core, sink = core_with_cache
+        first = core.get_location_properties(28.6139, 77.2090)
+        core.clear_cache()
+        second = core.get_location_properties(28.6139, 77.2090)
+        assert second == first
+        assert core._seismic_gdf is None
+        assert sink.counter('cache_hits', cache='shared') == 1
+
+    def test_reverse_geocoding_cached(self, core_with_cache, monkeypatch):
+        requests = pytest.importorskip("requests")
+        core, _ = core_with_cache
+        calls = []
+
+        class Response:
+            status_code = 200
+
+            def json(self):
+                return {'display_name': 'Connaught Place, New Delhi'}
+
+        monkeypatch.setattr(requests, 'get', lambda *a, **kw: calls.append(1) or Response())
+        assert core.get_reverse_geocoding(28.6315, 77.2167) == 'Connaught Place, New Delhi'
+        assert core.get_reverse_geocoding(28.6315, 77.2167) == 'Connaught Place, New Delhi'
+        assert calls == [1]
+
+    def test_failures_not_cached(self, core_with_cache, monkeypatch):
+        requests = pytest.importorskip("requests")
+        core, _ = core_with_cache
+
+        def down(*args, **kwargs):
+            raise requests.exceptions.ConnectionError("down")
+
+        monkeypatch.setattr(requests, 'get', down)
+        assert core.search_location("Nowhere") is None
+        assert core.get_shared_cache().get('search', 'nowhere') is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
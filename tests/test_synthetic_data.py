@@ -0,0 +1,74 @@
+"""
+Unit tests for the synthetic layer generator
+Checks schema, holes, multipolygons and that layers tile without overlap
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import Layer, LookupEngine
+from geometry import point_in_rings
+from synthetic_data import INDIA_EXTENT, generate_layers, write_layers
+
+@pytest.fixture(scope='module')
+def layers():
+    return generate_layers(admin_cells=300, hazard_cells=60, vertices_per_edge=6, seed=42)
+
+class TestSyntheticData:
+    """Test cases for synthetic_data.py"""
+
+    def test_schema(self, layers):
+        """Features carry the bundled attribute names"""
+        assert all('zone' in f['properties'] for f in layers['seismic']['features'])
+        assert all('Vb' in f['properties'] for f in layers['wind']['features'])
+        assert all({'NAME', 'STATE'} <= set(f['properties']) for f in layers['admin']['features'])
+
+    def test_holes_and_multipolygons(self, layers):
+        """Admin layer contains holed polygons and multipolygons"""
+        geometries = [f['geometry'] for f in layers['admin']['features']]
+        assert any(g['type'] == 'Polygon' and len(g['coordinates']) > 1 for g in geometries)
+        assert any(g['type'] == 'MultiPolygon' for g in geometries)
+
+    def test_layers_tile_without_overlap(self, layers):
+        """Every point in the extent falls in exactly one feature per layer"""
+        rng = random.Random(7)
+        min_x, min_y, max_x, max_y = INDIA_EXTENT
+        for name, collection in layers.items():
+            layer = Layer(name, collection['features'])
+            for _ in range(300):
+                lat, lon = rng.uniform(min_y, max_y), rng.uniform(min_x, max_x)
+                assert sum(point_in_rings(lat, lon, rings) for rings in layer.rings) == 1
+
+    def test_shared_boundaries(self, layers):
+        """Neighbouring districts share their edge vertices exactly"""
+        features = {f['properties']['NAME']: f['geometry'] for f in layers['admin']['features']}
+        left = features.get('District 005-005')
+        right = features.get('District 005-006')
+        if left is None or right is None or 'MultiPolygon' in (left['type'], right['type']):
+            pytest.skip("cells absorbed into a multipolygon for this seed")
+        shared = {tuple(p) for p in left['coordinates'][0]} & {tuple(p) for p in right['coordinates'][0]}
+        assert len(shared) >= 6
+
+    def test_deterministic(self):
+        """Same seed gives the same layers"""
+        a = generate_layers(admin_cells=50, hazard_cells=20, vertices_per_edge=4, seed=3)
+        b = generate_layers(admin_cells=50, hazard_cells=20, vertices_per_edge=4, seed=3)
+        assert a == b
+
+    def test_write_layers_loads_in_engine(self, tmp_path):
+        """Written files load through the engine like the bundled data"""
+        from engine import load_layers
+        write_layers(str(tmp_path), admin_cells=50, hazard_cells=20, vertices_per_edge=4)
+        engine = LookupEngine(load_layers(str(tmp_path)), backend='python')
+        result = engine.lookup(21.5, 80.5)
+        assert result['seismic_zone'] in ['II', 'III', 'IV', 'V']
+        assert result['basic_wind_speed'] is not None
+        assert result['state'].startswith('State')
+
+if __name__ == "__main__":
+    pytest.main([__file__])